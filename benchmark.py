@@ -0,0 +1,346 @@
+"""
+Đo hiệu năng các bước xử lý của lõi lich_giang_day trên dữ liệu giả lập.
+
+- tao_thongke_gia: file ThongKeTKB giả (đúng tên cột thật), 1k → 1M dòng
+- tao_thu_muc_tkb_gia: thư mục 10 → 10k file TKB gốc (DOCX)
+- do_kich_ban: thời gian + bộ nhớ đỉnh của từng bước, so với baseline đã lưu
+
+Chạy:
+    python benchmark.py                                # các kịch bản mặc định
+    python benchmark.py --kich-ban 1000x10,1000000x10000
+    python benchmark.py --luu-baseline                 # lưu kết quả làm baseline
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+import pandas as pd
+from openpyxl import Workbook
+
+KICH_BAN_MAC_DINH = "1000x10,10000x100,100000x1000"
+FILE_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+NGUONG_CHAM = 0.2         # Chậm hơn baseline quá 20% → cảnh báo
+NGUONG_CHAM_GIAY = 0.05   # ... và chênh quá 50 ms (bỏ qua nhiễu ở bước rất nhanh)
+
+COT_THONGKE_GIA = [
+    'STT', 'Tên lớp', 'Mã lớp', 'Thời gian', 'Số tiết', 'Tên chuyên đề',
+    'Tên giảng viên', 'Đơn vị (GV)', 'Trợ giảng', 'Đơn vị (trợ giảng)',
+]
+
+_TU_TEN_LOP = [
+    "TẬP HUẤN", "BỒI DƯỠNG", "KIẾN THỨC", "KỸ NĂNG", "NGHIỆP VỤ", "HỢP TÁC",
+    "LIÊN KẾT", "SẢN XUẤT", "NÔNG THÔN MỚI", "KHUYẾN NÔNG", "QUẢN LÝ",
+    "BẢO VỆ RỪNG", "AN TOÀN THỰC PHẨM", "CHUYỂN ĐỔI SỐ", "KINH TẾ TẬP THỂ",
+    "GIẢM NGHÈO", "THẨM ĐỊNH VIÊN", "XỬ PHẠT VI PHẠM HÀNH CHÍNH",
+]
+_TU_CHUYEN_DE = [
+    "Hướng dẫn thi hành Luật HTX", "Quản lý và điều hành HTX", "Phân tích thị trường nông sản",
+    "Kỹ năng xây dựng kế hoạch", "Chính sách phát triển nông thôn", "Tổ chức sản xuất theo chuỗi",
+]
+_HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Võ", "Đỗ", "Bùi", "Đặng", "Huỳnh"]
+_DEM = ["Văn", "Thị", "Hoàng", "Minh", "Thu", "Hữu", "Ngọc"]
+_TEN = ["An", "Bình", "Duy", "Hải", "Lan", "Tâm", "Thảo", "Trang", "Phương", "Quân", "Sơn", "Yến"]
+_HOC_VI = ["ThS.", "TS.", "PGS.TS.", "CN."]
+_THU = ["Thứ hai", "Thứ ba", "Thứ tư", "Thứ năm", "Thứ sáu", "Thứ bảy", "Chủ nhật"]
+_DON_VI = [
+    "Khoa Chính sách công", "Khoa Phát triển nông thôn", "Khoa Quản trị kinh doanh nông nghiệp",
+    "Trung tâm Kinh tế hợp tác", "Trung tâm Đào tạo nông dân", "Giảng viên mời",
+]
+
+
+# ============================================================================
+# PHẦN 1: SINH DỮ LIỆU GIẢ
+# ============================================================================
+
+def tao_cac_lop_gia(so_lop, seed=0):
+    """Danh sách lớp giả: dict ma_lop, ten_lop, bat_dau (ngày khai giảng)"""
+    rng = random.Random(seed)
+    cac_lop = []
+    for i in range(so_lop):
+        so = 100 + i
+        cac_lop.append({
+            'ma_lop': f"{so}-2025" if i % 3 == 0 else str(so),
+            'ten_lop': "LỚP " + " ".join(rng.sample(_TU_TEN_LOP, 4)) + f" KHÓA {i % 20 + 1}",
+            'bat_dau': date(2025, 1, 1) + timedelta(days=rng.randrange(365)),
+        })
+    return cac_lop
+
+
+def _ten_giang_vien(i):
+    ten = f"{_HOC_VI[i % len(_HOC_VI)]} {_HO[i % len(_HO)]} {_DEM[i // len(_HO) % len(_DEM)]} {_TEN[i // 7 % len(_TEN)]}"
+    # Hết tổ hợp thì đánh số để tên vẫn khác nhau
+    return ten if i < 840 else f"{ten} {i // 840 + 1}"
+
+
+def tao_thongke_gia(filepath, so_dong, seed=0):
+    """
+    Ghi file ThongKeTKB giả có `so_dong` dòng (ghi streaming, đủ nhanh tới 1M dòng).
+    Khoảng 30 buổi mỗi lớp; ~1% dòng có ngày không đọc được. Trả về danh sách lớp.
+    """
+    rng = random.Random(seed)
+    cac_lop = tao_cac_lop_gia(max(1, so_dong // 30), seed)
+    so_gv = max(10, so_dong // 150)
+    giang_vien = [(_ten_giang_vien(i), _DON_VI[i % len(_DON_VI)]) for i in range(so_gv)]
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("ThongKe")
+    ws.append(COT_THONGKE_GIA)
+    for stt in range(1, so_dong + 1):
+        lop = cac_lop[(stt - 1) // 30 % len(cac_lop)]
+        ngay = lop['bat_dau'] + timedelta(days=(stt - 1) % 30 // 2)
+        if rng.random() < 0.01:
+            thoi_gian = "Chưa xếp lịch"
+        else:
+            thoi_gian = f"{_THU[ngay.weekday()]} {ngay.day}/{ngay.month}/{ngay.year}"
+        ten_gv, don_vi = giang_vien[rng.randrange(so_gv)]
+        tro_giang, don_vi_tg = (None, None)
+        if rng.random() < 0.1:
+            tro_giang, don_vi_tg = giang_vien[rng.randrange(so_gv)]
+        ws.append([
+            stt, lop['ten_lop'], lop['ma_lop'], thoi_gian, rng.choice((2, 4, 4, 4, 8, 8)),
+            f"Chuyên đề {stt % 7 + 1}. {rng.choice(_TU_CHUYEN_DE)}",
+            ten_gv, don_vi, tro_giang, don_vi_tg,
+        ])
+    wb.save(filepath)
+    return cac_lop
+
+
+def _ghi_docx(filepath, cac_dong):
+    """DOCX tối thiểu (mỗi dòng một đoạn văn)"""
+    than = "".join(f"<w:p><w:r><w:t>{escape(d)}</w:t></w:r></w:p>" for d in cac_dong)
+    with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        z.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+            '</Relationships>'
+        ))
+        z.writestr("word/document.xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{than}</w:body></w:document>'
+        ))
+
+
+def tao_thu_muc_tkb_gia(thu_muc, so_file, cac_lop):
+    """
+    Tạo `so_file` file TKB gốc (DOCX) trong thư mục, lần lượt cho các lớp:
+    1/3 có mã lớp ở đầu tên file, 1/3 có "MA <mã>" giữa tên, 1/3 chỉ ghi mã
+    trong nội dung (phải khớp theo nội dung). Thừa file → file TKB không thuộc lớp nào.
+    """
+    os.makedirs(thu_muc, exist_ok=True)
+    for j in range(so_file):
+        if j < len(cac_lop):
+            lop = cac_lop[j]
+            ma = lop['ma_lop'].replace('/', '-')
+            ten_ngan = lop['ten_lop'].split()[1:4]
+            ten_file = [
+                f"{ma}_THỜI KHÓA BIỂU.docx",
+                f"MA {ma} TKB {' '.join(ten_ngan)}.docx",
+                f"TKB LỚP {j} {' '.join(ten_ngan)}.docx",
+            ][j % 3]
+            cac_dong = [
+                "THỜI KHÓA BIỂU", lop['ten_lop'],
+                f"Từ ngày {lop['bat_dau']:%d/%m/%Y} (MÃ {lop['ma_lop']})",
+                "Địa điểm: Trường Chính sách công và PTNT",
+            ]
+        else:
+            ten_file = f"TKB_KHAC_{j}.docx"
+            cac_dong = ["THỜI KHÓA BIỂU", f"LỚP KHÁC SỐ {j}"]
+        _ghi_docx(os.path.join(thu_muc, ten_file), cac_dong)
+
+
+# ============================================================================
+# PHẦN 2: ĐO TỪNG BƯỚC
+# ============================================================================
+
+class DoBuoc:
+    """Đo thời gian (perf_counter) và bộ nhớ đỉnh (tracemalloc) của từng bước"""
+
+    def __init__(self, do_bo_nho=True):
+        self.do_bo_nho = do_bo_nho
+        self.ket_qua = {}
+
+    def do(self, ten, ham, *args, **kwargs):
+        if self.do_bo_nho:
+            tracemalloc.start()
+        bat_dau = time.perf_counter()
+        try:
+            gia_tri = ham(*args, **kwargs)
+        finally:
+            giay = time.perf_counter() - bat_dau
+            dinh = 0
+            if self.do_bo_nho:
+                dinh = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        self.ket_qua[ten] = {'giay': round(giay, 4), 'mb': round(dinh / 1024 / 1024, 2)}
+        return gia_tri
+
+
+def _lam_moi_cache():
+    """Bỏ cache trong tiến trình để mỗi kịch bản đo từ trạng thái nguội"""
+    from lich_giang_day.cache import xoa_cache_tien_trinh
+    from lich_giang_day.chuan_hoa import _chuan_hoa_chuoi
+    xoa_cache_tien_trinh()
+    _chuan_hoa_chuoi.cache_clear()
+
+
+def do_kich_ban(so_dong, so_file, thu_muc_goc, do_bo_nho=True, seed=0):
+    """Sinh dữ liệu cho một kịch bản rồi đo các bước; trả về {bước: {giay, mb}}"""
+    # Import sau khi main() đặt LICH_GIANG_DAY_CACHE_DIR (cấu hình đọc lúc import)
+    from lich_giang_day.chuan_hoa import _chuan_hoa_chuoi, chuan_hoa_cot_text
+    from lich_giang_day.doc_file import _gan_file_goc, _tao_bang, _thong_ke_file_tkb, lam_sach_bang_thongke
+    from lich_giang_day.kho import KhoSuKien
+    from lich_giang_day.nap import loc_events
+    from lich_giang_day.tai_lieu_tkb import lay_chi_muc_noi_dung
+
+    thu_muc = os.path.join(thu_muc_goc, f"{so_dong}x{so_file}")
+    filepath = os.path.join(thu_muc, "ThongKeTKB_benchmark.xlsx")
+    os.makedirs(thu_muc, exist_ok=True)
+
+    bat_dau = time.perf_counter()
+    cac_lop = tao_thongke_gia(filepath, so_dong, seed)
+    tao_thu_muc_tkb_gia(thu_muc, so_file, cac_lop)
+    print(f"  (sinh dữ liệu: {time.perf_counter() - bat_dau:.1f}s)")
+
+    _lam_moi_cache()
+    d = DoBuoc(do_bo_nho)
+
+    df = d.do('doc_excel', pd.read_excel, filepath)
+    frame, invalid_dates, total_rows = d.do('lam_sach', lam_sach_bang_thongke, df)
+    d.do('chuan_hoa_text', chuan_hoa_cot_text, frame['ten_lop'])
+    _chuan_hoa_chuoi.cache_clear()
+    d.do('chi_muc_tkb', lambda: lay_chi_muc_noi_dung(thu_muc).ket_qua())
+    frame = d.do('ghep_file_tkb', _gan_file_goc, frame.copy(), thu_muc)
+
+    def tao_kho():
+        bang = _tao_bang(frame)
+        return KhoSuKien(filepath, (so_dong, so_file), {
+            'bang': bang,
+            **_thong_ke_file_tkb(bang),
+            'invalid_dates': invalid_dates,
+            'total_rows': total_rows,
+        })
+    kho = d.do('tao_kho', tao_kho)
+
+    # Lọc: lần lượt theo từng giảng viên / đơn vị / lớp đầu danh sách
+    bo_loc = [(gv, None, None) for gv in kho.danh_sach('ten_gv')[:10]]
+    bo_loc += [(None, dv, None) for dv in kho.danh_sach('don_vi')[:5]]
+    bo_loc += [(None, None, lop) for lop in kho.danh_sach('ten_lop')[:5]]
+    d.do('loc_events', lambda: [loc_events(kho, *b) for b in bo_loc])
+
+    # Gửi lịch: một tháng có nhiều buổi nhất (từ tổng hợp theo tháng của kho), như khi xem lịch tháng
+    so_buoi_thang = kho.bang_tong_hop('ten_gv', 'so_buoi').drop(columns='Tổng').sum()
+    thang = (pd.Period(pd.to_datetime(so_buoi_thang.idxmax(), format="%m/%Y"), 'M')
+             if len(so_buoi_thang) else pd.Period('2025-01', 'M'))
+    def payload_lich():
+        ids = kho.trong_khoang(thang.start_time.date(), thang.end_time.date())
+        return json.dumps(kho.payload(ids), ensure_ascii=False)
+    d.do('payload_lich', payload_lich)
+
+    d.ket_qua['tong'] = {
+        'giay': round(sum(v['giay'] for v in d.ket_qua.values()), 4),
+        'mb': max(v['mb'] for v in d.ket_qua.values()),
+    }
+    return d.ket_qua
+
+
+# ============================================================================
+# PHẦN 3: SO VỚI BASELINE
+# ============================================================================
+
+def doc_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def in_ket_qua(ten_kich_ban, ket_qua, baseline):
+    """In bảng kết quả một kịch bản; trả về danh sách bước chậm hơn baseline"""
+    goc = (baseline or {}).get('kich_ban', {}).get(ten_kich_ban, {})
+    cham = []
+    print(f"  {'Bước':<16}{'Thời gian':>12}{'Bộ nhớ đỉnh':>14}{'Baseline':>12}{'Tỉ lệ':>9}")
+    for buoc, v in ket_qua.items():
+        dong = f"  {buoc:<16}{v['giay']:>11.3f}s{v['mb']:>11.1f} MB"
+        if buoc in goc:
+            g = goc[buoc]['giay']
+            ti_le = v['giay'] / g if g > 0 else float('inf')
+            dong += f"{g:>11.3f}s{ti_le:>8.2f}x"
+            if ti_le > 1 + NGUONG_CHAM and v['giay'] - g > NGUONG_CHAM_GIAY:
+                dong += "  ⚠️ chậm hơn"
+                cham.append(buoc)
+        print(dong)
+    return cham
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Đo hiệu năng lõi lich_giang_day trên dữ liệu giả lập")
+    parser.add_argument('--kich-ban', default=KICH_BAN_MAC_DINH,
+                        help="Danh sách <số dòng>x<số file TKB>, cách nhau bởi dấu phẩy")
+    parser.add_argument('--baseline', default=FILE_BASELINE, help="File baseline (JSON)")
+    parser.add_argument('--luu-baseline', action='store_true', help="Ghi kết quả lần này làm baseline")
+    parser.add_argument('--khong-do-bo-nho', action='store_true',
+                        help="Tắt tracemalloc (thời gian sát thực tế hơn)")
+    parser.add_argument('--nghiem-ngat', action='store_true', help="Thoát mã 1 nếu có bước chậm hơn baseline")
+    parser.add_argument('--thu-muc', help="Thư mục chứa dữ liệu giả (mặc định: thư mục tạm, xóa khi xong)")
+    args = parser.parse_args(argv)
+
+    kich_ban = []
+    for muc in args.kich_ban.split(','):
+        so_dong, so_file = muc.lower().split('x')
+        kich_ban.append((int(so_dong), int(so_file)))
+
+    thu_muc_goc = args.thu_muc or tempfile.mkdtemp(prefix="lich_giang_day_bench_")
+    # Cache đĩa riêng để không dùng lại kết quả của lần chạy trước / của app
+    os.environ["LICH_GIANG_DAY_CACHE_DIR"] = os.path.join(thu_muc_goc, "cache")
+
+    baseline = doc_baseline(args.baseline)
+    do_bo_nho = not args.khong_do_bo_nho
+    if baseline and baseline.get('do_bo_nho') != do_bo_nho:
+        print("⚠️ Baseline đo ở chế độ bộ nhớ khác, thời gian không so trực tiếp được")
+
+    tat_ca, cham = {}, []
+    try:
+        for so_dong, so_file in kich_ban:
+            ten = f"{so_dong}x{so_file}"
+            print(f"\n▶ {so_dong:,} dòng · {so_file:,} file TKB")
+            tat_ca[ten] = do_kich_ban(so_dong, so_file, thu_muc_goc, do_bo_nho)
+            cham += [f"{ten}:{b}" for b in in_ket_qua(ten, tat_ca[ten], baseline)]
+    finally:
+        if not args.thu_muc:
+            shutil.rmtree(thu_muc_goc, ignore_errors=True)
+
+    if args.luu_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'do_bo_nho': do_bo_nho, 'kich_ban': tat_ca}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Đã lưu baseline: {args.baseline}")
+
+    if cham:
+        print("\n⚠️ Chậm hơn baseline: " + ", ".join(cham))
+        if args.nghiem_ngat:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""
+Dịch vụ HTTP JSON cục bộ cho các công cụ khác (đặt phòng, tính lương...) đọc lịch giảng
+mà không phải lấy dữ liệu từ trang Streamlit. Dùng chung kho sự kiện với trang
+(cache đĩa, kho dùng chung trong tiến trình, cập nhật tăng dần khi file đổi):
+không parse lại file Excel cho từng request, nhiều client đọc đồng thời.
+
+Endpoint (GET, JSON UTF-8):
+    /api/phien-ban                      phiên bản dữ liệu, số buổi
+    /api/su-kien                        buổi dạy theo ngày; lọc tu, den (YYYY-MM-DD, gồm cả ngày den),
+                                        giang_vien, don_vi, lop; phân trang trang, so_dong
+    /api/su-kien/<id>                   chi tiết một buổi (kèm cảnh báo xung đột); id là mã
+                                        theo nội dung buổi, không đổi khi file được cập nhật
+    /api/tong-hop?cot=ten_gv|don_vi|ten_lop   số buổi / số tiết theo cột (cùng bộ lọc như /api/su-kien)
+    /api/danh-sach?cot=...              các giá trị của cột (giảng viên, đơn vị, lớp)
+
+Mọi phản hồi có ETag (theo phiên bản dữ liệu + URL) và X-Phien-Ban-Du-Lieu: gửi lại
+If-None-Match → 304 khi dữ liệu không đổi. Client nhận gzip (Accept-Encoding, q > 0) → nén gzip.
+Lỗi ngoài dự kiến → 500 kèm JSON {"loi": ...} (chi tiết ghi ra stderr).
+
+Chạy:
+    python dich_vu_api.py                              # các file ThongKeTKB trong thư mục hiện tại
+    python dich_vu_api.py ThongKeTKB_a.xlsx --cong 8765 --dia-chi 127.0.0.1
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import date, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from lich_giang_day.doc_file import tim_cac_file_thongke
+from lich_giang_day.nap import lay_kho_gop, lay_kho_su_kien
+
+CONG_MAC_DINH = 8765
+SO_DONG_MAC_DINH = 500
+SO_DONG_TOI_DA = 5000
+NEN_TU_BYTES = 1024          # Phản hồi nhỏ hơn không nén (gzip không lợi)
+COT_TONG_HOP_API = ('ten_gv', 'don_vi', 'ten_lop')
+SO_TRUY_VAN_GHI_NHO = 32     # Số kết quả chọn buổi gần nhất giữ lại (lật trang không phải lọc lại)
+
+_MAU_CHI_TIET = re.compile(r'^/api/su-kien/([0-9a-f]{16}-\d+)$')
+
+# Kết quả chọn buổi gần đây của MỘT phiên bản dữ liệu: chỉ giữ mảng chỉ số, không giữ kho;
+# phiên bản đổi (kho mới) → xóa hết
+_khoa_chon = threading.Lock()
+_chon_gan_day = {'phien_ban': None, 'ket_qua': OrderedDict()}
+
+
+class LoiYeuCau(Exception):
+    """Tham số không hợp lệ / không tìm thấy: trả về mã lỗi HTTP kèm thông báo JSON"""
+
+    def __init__(self, thong_bao, ma=HTTPStatus.BAD_REQUEST):
+        super().__init__(thong_bao)
+        self.ma = ma
+
+
+# ============================================================================
+# PHẦN 1: TRUY VẤN KHO
+# ============================================================================
+
+def lay_kho(cac_file):
+    """Kho dùng chung của các file ThongKeTKB (chỉ stat file; đọc lại khi file đổi)"""
+    if len(cac_file) == 1:
+        return lay_kho_su_kien(cac_file[0])
+    return lay_kho_gop(cac_file)
+
+
+def phien_ban_du_lieu(kho):
+    """Chuỗi ngắn đổi khi dữ liệu đổi (file, thư mục TKB, lớp ghim)"""
+    return hashlib.blake2b(repr((kho.filepath, kho.phien_ban)).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _mot_tham_so(tham_so, ten, mac_dinh=None):
+    gia_tri = tham_so.get(ten)
+    return gia_tri[-1].strip() if gia_tri and gia_tri[-1].strip() else mac_dinh
+
+
+def _so_nguyen(tham_so, ten, mac_dinh, nho_nhat, lon_nhat):
+    gia_tri = _mot_tham_so(tham_so, ten)
+    if gia_tri is None:
+        return mac_dinh
+    try:
+        so = int(gia_tri)
+    except ValueError:
+        raise LoiYeuCau(f"'{ten}' phải là số nguyên") from None
+    if not nho_nhat <= so <= lon_nhat:
+        raise LoiYeuCau(f"'{ten}' phải trong khoảng {nho_nhat}..{lon_nhat}")
+    return so
+
+
+def _ngay(tham_so, ten):
+    gia_tri = _mot_tham_so(tham_so, ten)
+    if gia_tri is None:
+        return None
+    try:
+        return date.fromisoformat(gia_tri)
+    except ValueError:
+        raise LoiYeuCau(f"'{ten}' phải có dạng YYYY-MM-DD") from None
+
+
+def _cot(tham_so):
+    cot = _mot_tham_so(tham_so, 'cot')
+    if cot not in COT_TONG_HOP_API:
+        raise LoiYeuCau(f"'cot' phải là một trong: {', '.join(COT_TONG_HOP_API)}")
+    return cot
+
+
+def chon_su_kien(kho, tham_so):
+    """
+    Chỉ số các buổi thỏa bộ lọc (giang_vien, don_vi, lop qua chỉ mục của kho)
+    và khoảng ngày [tu, den], theo thứ tự ngày.
+    """
+    tu, den = _ngay(tham_so, 'tu'), _ngay(tham_so, 'den')
+    if tu and den and tu > den:
+        raise LoiYeuCau("'tu' phải trước hoặc bằng 'den'")
+    bo_loc = (
+        _mot_tham_so(tham_so, 'giang_vien'),
+        _mot_tham_so(tham_so, 'don_vi'),
+        _mot_tham_so(tham_so, 'lop'),
+        tu, den,
+    )
+    phien_ban = phien_ban_du_lieu(kho)
+    with _khoa_chon:
+        if _chon_gan_day['phien_ban'] != phien_ban:
+            _chon_gan_day['phien_ban'] = phien_ban
+            _chon_gan_day['ket_qua'].clear()
+        ket_qua = _chon_gan_day['ket_qua']
+        if bo_loc in ket_qua:
+            ket_qua.move_to_end(bo_loc)
+            return ket_qua[bo_loc]
+    
+    ids = _chon_su_kien(kho, *bo_loc)
+    with _khoa_chon:
+        if _chon_gan_day['phien_ban'] == phien_ban:
+            ket_qua[bo_loc] = ids
+            while len(ket_qua) > SO_TRUY_VAN_GHI_NHO:
+                ket_qua.popitem(last=False)
+    return ids
+
+
+def _chon_su_kien(kho, giang_vien, don_vi, lop, tu, den):
+    """Lọc qua chỉ mục của kho rồi lấy khoảng ngày [tu, den]"""
+    ids = kho.loc(giang_vien, don_vi, lop)
+    ket_thuc = den + timedelta(days=1) if den and den < date.max else date.max
+    return kho.trong_khoang(tu or date.min, ket_thuc, ids)
+
+
+def _an_duong_dan(chi_tiet):
+    """Chi tiết buổi gửi cho client: file TKB gốc chỉ còn tên file (không lộ đường dẫn trên máy chủ)"""
+    file_goc = chi_tiet.get('file_goc')
+    if isinstance(file_goc, str):
+        chi_tiet['file_goc'] = os.path.basename(file_goc)
+    return chi_tiet
+
+
+def lay_su_kien(kho, ids):
+    """Events đầy đủ của kho, id là mã ổn định của buổi (kho.ma_buoi)"""
+    events = kho.lay(ids)
+    for event, ma in zip(events, kho.ma_buoi(ids)):
+        event['id'] = ma
+        _an_duong_dan(event['extendedProps'])
+    return events
+
+
+def _trang(tham_so, tong):
+    """(trang, so_dong, so_trang, vị trí bắt đầu) của tham số phân trang"""
+    so_dong = _so_nguyen(tham_so, 'so_dong', SO_DONG_MAC_DINH, 1, SO_DONG_TOI_DA)
+    so_trang = max(1, -(-tong // so_dong))
+    trang = _so_nguyen(tham_so, 'trang', 1, 1, sys.maxsize)
+    return trang, so_dong, so_trang, (trang - 1) * so_dong
+
+
+def xu_ly(kho, duong_dan, tham_so):
+    """Nội dung JSON (dict) của một request GET"""
+    if duong_dan == '/api/phien-ban':
+        return {'so_su_kien': len(kho), 'hoan_tat': kho.hoan_tat}
+
+    if duong_dan == '/api/su-kien':
+        ids = chon_su_kien(kho, tham_so)
+        trang, so_dong, so_trang, dau = _trang(tham_so, len(ids))
+        return {
+            'tong': len(ids), 'trang': trang, 'so_dong': so_dong, 'so_trang': so_trang,
+            'su_kien': lay_su_kien(kho, ids[dau:dau + so_dong]),
+        }
+
+    khop = _MAU_CHI_TIET.match(duong_dan)
+    if khop:
+        ma = khop.group(1)
+        i = kho.tim_buoi(ma)
+        if i is None:
+            raise LoiYeuCau(f"Không có buổi {ma}", HTTPStatus.NOT_FOUND)
+        return {'id': ma, **_an_duong_dan(kho.chi_tiet(i)), 'canh_bao': kho.canh_bao(i)}
+
+    if duong_dan == '/api/tong-hop':
+        cot = _cot(tham_so)
+        loc_ngay = _mot_tham_so(tham_so, 'tu') or _mot_tham_so(tham_so, 'den')
+        ids = chon_su_kien(kho, tham_so) if loc_ngay else kho.loc(
+            _mot_tham_so(tham_so, 'giang_vien'),
+            _mot_tham_so(tham_so, 'don_vi'),
+            _mot_tham_so(tham_so, 'lop'),
+        )
+        dong = sorted(kho.tong_theo(cot, ids).items(), key=lambda kv: (-kv[1][0], kv[0]))
+        trang, so_dong, so_trang, dau = _trang(tham_so, len(dong))
+        return {
+            'cot': cot, 'tong': len(dong), 'trang': trang, 'so_dong': so_dong, 'so_trang': so_trang,
+            'tong_hop': [
+                {'gia_tri': v, 'so_buoi': so_buoi, 'so_tiet': so_tiet}
+                for v, (so_buoi, so_tiet) in dong[dau:dau + so_dong]
+            ],
+        }
+
+    if duong_dan == '/api/danh-sach':
+        cot = _cot(tham_so)
+        return {'cot': cot, 'gia_tri': kho.danh_sach(cot)}
+
+    raise LoiYeuCau(f"Không có endpoint {duong_dan}", HTTPStatus.NOT_FOUND)
+
+
+# ============================================================================
+# PHẦN 2: HTTP
+# ============================================================================
+
+def nhan_gzip(accept_encoding):
+    """
+    Client có nhận gzip không, theo q-value của Accept-Encoding: "gzip;q=0" là từ chối;
+    "*" áp cho gzip khi gzip không được nêu tên.
+    """
+    q = {}
+    for phan in accept_encoding.split(','):
+        ten, *tham_so = phan.split(';')
+        ten = ten.strip().lower()
+        if not ten:
+            continue
+        q[ten] = 1.0
+        for ts in tham_so:
+            khoa, _, gia_tri = ts.partition('=')
+            if khoa.strip().lower() == 'q':
+                try:
+                    q[ten] = float(gia_tri)
+                except ValueError:
+                    q[ten] = 0.0
+    return q.get('gzip', q.get('*', 0.0)) > 0
+
+
+class XuLyApi(BaseHTTPRequestHandler):
+    """Một request GET: ETag/304, gzip, lỗi dạng JSON {"loi": ...}"""
+
+    protocol_version = "HTTP/1.1"  # Giữ kết nối giữa các request của cùng client
+    cac_file = ()
+
+    def do_GET(self):
+        try:
+            ma, noi_dung, tieu_de = self._tra_loi()
+        except Exception:
+            # Lỗi ngoài dự kiến: client vẫn nhận JSON, chi tiết chỉ ghi ở máy chủ
+            traceback.print_exc(file=sys.stderr)
+            ma, noi_dung, tieu_de = HTTPStatus.INTERNAL_SERVER_ERROR, {'loi': "Lỗi máy chủ"}, None
+        self._gui(ma, noi_dung, tieu_de)
+
+    def _tra_loi(self):
+        """(mã HTTP, nội dung JSON, tiêu đề) của request hiện tại"""
+        url = urlsplit(self.path)
+        duong_dan = url.path.rstrip('/') or '/'
+        try:
+            kho = lay_kho(self.cac_file)
+        except ValueError as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'loi': str(e)}, None
+        if not kho.hoan_tat:
+            # File lớn đang nạp theo khối: chưa đủ dữ liệu để trả lời nhất quán
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'loi': "Đang nạp dữ liệu"}, {'Retry-After': '2'}
+
+        phien_ban = phien_ban_du_lieu(kho)
+        etag = 'W/"{}-{}"'.format(
+            phien_ban, hashlib.blake2b(f"{duong_dan}?{url.query}".encode('utf-8'), digest_size=8).hexdigest()
+        )
+        tieu_de = {'ETag': etag, 'X-Phien-Ban-Du-Lieu': phien_ban, 'Cache-Control': 'no-cache'}
+        if etag in (t.strip() for t in self.headers.get('If-None-Match', '').split(',')):
+            return HTTPStatus.NOT_MODIFIED, None, tieu_de
+
+        try:
+            noi_dung = xu_ly(kho, duong_dan, parse_qs(url.query))
+        except LoiYeuCau as e:
+            return e.ma, {'loi': str(e)}, None
+        return HTTPStatus.OK, {'phien_ban': phien_ban, **noi_dung}, tieu_de
+
+    def _gui(self, ma, noi_dung, tieu_de=None):
+        du_lieu = b"" if noi_dung is None else json.dumps(
+            noi_dung, ensure_ascii=False, default=str, separators=(',', ':')
+        ).encode('utf-8')
+        self.send_response(ma)
+        for ten, gia_tri in (tieu_de or {}).items():
+            self.send_header(ten, gia_tri)
+        if noi_dung is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Vary', 'Accept-Encoding')
+            if len(du_lieu) >= NEN_TU_BYTES and nhan_gzip(self.headers.get('Accept-Encoding', '')):
+                du_lieu = gzip.compress(du_lieu, compresslevel=6, mtime=0)
+                self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(du_lieu)))
+        self.end_headers()
+        self.wfile.write(du_lieu)
+
+    def log_message(self, format, *args):
+        pass  # Không ghi log mỗi request ra stderr
+
+
+def tao_may_chu(cac_file, dia_chi="127.0.0.1", cong=CONG_MAC_DINH):
+    """Máy chủ HTTP đa luồng (mỗi request một luồng, cùng đọc một kho)"""
+    cac_file = tuple(os.path.abspath(f) for f in cac_file)
+    xu_ly_api = type('XuLyApi', (XuLyApi,), {'cac_file': cac_file})
+    may_chu = ThreadingHTTPServer((dia_chi, cong), xu_ly_api)
+    may_chu.daemon_threads = True
+    return may_chu
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dịch vụ JSON cục bộ cho lịch giảng dạy")
+    parser.add_argument('cac_file', nargs='*',
+                        help="File ThongKeTKB (mặc định: mọi ThongKeTKB*.xlsx trong thư mục hiện tại, gộp lại)")
+    parser.add_argument('--dia-chi', default="127.0.0.1", help="Địa chỉ lắng nghe (mặc định: chỉ máy này)")
+    parser.add_argument('--cong', type=int, default=CONG_MAC_DINH, help=f"Cổng (mặc định: {CONG_MAC_DINH})")
+    args = parser.parse_args(argv)
+
+    cac_file = args.cac_file or tim_cac_file_thongke()
+    if not cac_file:
+        print("⚠️ Không tìm thấy file ThongKeTKB", file=sys.stderr)
+        return 1
+
+    may_chu = tao_may_chu(cac_file, args.dia_chi, args.cong)
+    try:
+        kho = lay_kho(may_chu.RequestHandlerClass.cac_file)  # Nạp trước để request đầu không phải chờ
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"🌐 {len(kho)} buổi · http://{args.dia_chi}:{args.cong}/api/su-kien")
+    try:
+        may_chu.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        may_chu.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Lõi dữ liệu Lịch Giảng Dạy (không phụ thuộc Streamlit): đọc file ThongKeTKB,
+tìm file TKB gốc, kho sự kiện và các truy vấn lọc / tổng hợp / xung đột / tìm kiếm.
+
+    from lich_giang_day import lay_kho_su_kien
+    kho = lay_kho_su_kien("ThongKeTKB.xlsx")
+    kho.lay(kho.loc(filter_gv="Nguyễn Văn A"))
+
+Các module con chỉ được import khi dùng tới (pandas, openpyxl, pypdf cũng vậy),
+nên tiến trình con và công cụ dòng lệnh chỉ tốn phần thật sự cần.
+"""
+
+import importlib
+
+# Tên công khai → module con chứa nó
+_CAC_TEN = {
+    'doc_file_thongke': 'nap',
+    'lay_kho_su_kien': 'nap',
+    'lay_kho_gop': 'nap',
+    'loc_events': 'nap',
+    'KhoSuKien': 'kho',
+    'ChiMucTimKiem': 'kho',
+    'KhoSQLite': 'kho_sqlite',
+    'ket_noi_sqlite': 'kho_sqlite',
+    'doc_events_co_cache': 'doc_file',
+    'doc_nhieu_file_thongke': 'doc_file',
+    'tim_file_thongke': 'doc_file',
+    'tim_cac_file_thongke': 'doc_file',
+    'chu_ky_du_lieu': 'doc_file',
+    'bang_khop_lop': 'tai_lieu_tkb',
+    'ghim_lop': 'tai_lieu_tkb',
+    'bo_ghim_lop': 'tai_lieu_tkb',
+    'tim_file_tkb_goc': 'tai_lieu_tkb',
+    'chuan_hoa_text': 'chuan_hoa',
+    'bo_dau': 'chuan_hoa',
+    'chuan_hoa_ngay': 'chuan_hoa',
+    'cache_tien_trinh': 'cache',
+    'xoa_cache_tien_trinh': 'cache',
+    'don_dep_cache': 'cache',
+    'luu_file_tai_len': 'cache',
+    'doc_file_tai_ve': 'cache',
+    'do_buoc': 'hieu_nang',
+    'nhat_ky_hieu_nang': 'hieu_nang',
+}
+
+__all__ = sorted(_CAC_TEN)
+
+
+def __getattr__(ten):
+    if ten not in _CAC_TEN:
+        raise AttributeError(f"module {__name__!r} has no attribute {ten!r}")
+    gia_tri = getattr(importlib.import_module(f".{_CAC_TEN[ten]}", __name__), ten)
+    globals()[ten] = gia_tri
+    return gia_tri
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_CAC_TEN))
@@ -0,0 +1,28 @@
+"""Nạp trễ thư viện nặng (pandas...): chỉ import khi dùng tới lần đầu"""
+
+import importlib
+import sys
+
+
+class _ModuleTre:
+    """
+    Đại diện cho một module chưa import. Lần đầu đọc thuộc tính mới import thật
+    (import của Python có khóa theo module nên an toàn khi nhiều luồng cùng gọi),
+    sau đó chép thuộc tính vào đây để các lần sau tra trực tiếp.
+    """
+    
+    def __init__(self, ten):
+        self.__dict__['_ten_module'] = ten
+    
+    def __getattr__(self, thuoc_tinh):
+        module = importlib.import_module(self._ten_module)
+        self.__dict__.update(vars(module))
+        return getattr(module, thuoc_tinh)
+    
+    def __repr__(self):
+        return f"<module {self._ten_module!r} (nạp trễ)>"
+
+
+def nap_tre(ten):
+    """Module `ten`: đã import thì trả về luôn, không thì một đại diện nạp trễ"""
+    return sys.modules.get(ten) or _ModuleTre(ten)
@@ -0,0 +1,289 @@
+"""
+Cache trong tiến trình (dùng chung mọi phiên, không cần Streamlit)
+và cache kết quả đọc file trên đĩa (dùng chung giữa các lần khởi động lại).
+"""
+
+import os
+import glob
+import collections
+import functools
+import hashlib
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+from .cau_hinh import CACHE_DIR, CACHE_MAX_AGE_DAYS, CACHE_MAX_MB, TAI_LEN_DIR, TAI_XUONG_CACHE_MB
+
+_CAC_CACHE_TIEN_TRINH = []
+
+
+def cache_tien_trinh(max_entries=None):
+    """
+    Ghi nhớ kết quả theo tham số (hashable) trong tiến trình, giữ tối đa max_entries
+    kết quả dùng gần nhất. Nhiều luồng cùng gọi một tham số thì chỉ một luồng tính,
+    các luồng khác chờ và dùng chung kết quả (như st.cache_resource).
+    """
+    def trang_tri(ham):
+        ket_qua = collections.OrderedDict()
+        dang_tinh = {}  # tham số → khóa của luồng đang tính
+        khoa_chung = threading.Lock()
+        
+        @functools.wraps(ham)
+        def boc(*args):
+            with khoa_chung:
+                if args in ket_qua:
+                    ket_qua.move_to_end(args)
+                    return ket_qua[args]
+                khoa = dang_tinh.setdefault(args, threading.Lock())
+            with khoa:
+                with khoa_chung:
+                    if args in ket_qua:
+                        return ket_qua[args]
+                try:
+                    gia_tri = ham(*args)
+                    with khoa_chung:
+                        ket_qua[args] = gia_tri
+                        while max_entries and len(ket_qua) > max_entries:
+                            ket_qua.popitem(last=False)
+                finally:
+                    with khoa_chung:
+                        dang_tinh.pop(args, None)
+            return gia_tri
+        
+        def xoa():
+            with khoa_chung:
+                ket_qua.clear()
+        
+        boc.clear = xoa
+        _CAC_CACHE_TIEN_TRINH.append(boc)
+        return boc
+    return trang_tri
+
+
+def bo_nho_tien_trinh():
+    """
+    Dict dùng chung trong tiến trình, khai báo ở mức module (nơi dùng tự giữ khóa nếu cần).
+    Được xóa cùng các cache_tien_trinh trong xoa_cache_tien_trinh.
+    """
+    bo_nho = {}
+    _CAC_CACHE_TIEN_TRINH.append(bo_nho)
+    return bo_nho
+
+
+def xoa_cache_tien_trinh():
+    """Xóa mọi kết quả ghi nhớ bằng cache_tien_trinh và các bo_nho_tien_trinh (kho, chỉ mục TKB...)"""
+    for boc in _CAC_CACHE_TIEN_TRINH:
+        boc.clear()
+
+
+def thu_muc_rieng(thu_muc):
+    """
+    Tạo thư mục chỉ người dùng hiện tại truy cập được (0o700) và trả về đường dẫn.
+    Thư mục đã có mà thuộc người dùng khác hoặc người khác ghi được → PermissionError:
+    pickle trong đó (cache, thống kê của kho SQLite) có thể đã bị cài sẵn.
+    """
+    os.makedirs(thu_muc, mode=0o700, exist_ok=True)
+    if hasattr(os, 'getuid'):
+        stat = os.stat(thu_muc)
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+            raise PermissionError(
+                f"Không dùng thư mục {thu_muc}: thuộc người dùng khác hoặc người khác ghi được"
+            )
+    return thu_muc
+
+
+def _thu_muc_cache():
+    """Thư mục cache trên đĩa (tạo nếu chưa có; PermissionError nếu không an toàn)"""
+    return thu_muc_rieng(CACHE_DIR)
+
+
+def _hash_noi_dung(filepath, chunk_size=1 << 20):
+    """Hash nội dung file (blake2b), đọc theo từng khối"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def doc_cache(khoa):
+    """Đọc kết quả đã parse từ cache trên đĩa; None nếu không có, hỏng hoặc thư mục không an toàn"""
+    try:
+        path = os.path.join(_thu_muc_cache(), f"{khoa}.pkl")
+        with open(path, 'rb') as f:
+            ket_qua = pickle.load(f)
+    except OSError:
+        return None
+    except Exception:
+        # File cache hỏng → xóa để ghi lại
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    
+    # Đánh dấu vừa dùng (dọn cache theo thời gian truy cập gần nhất)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return ket_qua
+
+
+def ghi_cache(khoa, ket_qua, don_dep=True):
+    """
+    Ghi kết quả parse vào cache (ghi file tạm rồi đổi tên để không ai đọc file dở).
+    `don_dep=False`: khi ghi hàng loạt, gọi don_dep_cache() một lần sau cùng.
+    """
+    try:
+        thu_muc = _thu_muc_cache()
+    except OSError:
+        return
+    path = os.path.join(thu_muc, f"{khoa}.pkl")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(ket_qua, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return
+    if don_dep:
+        don_dep_cache()
+
+
+def don_dep_cache(max_age_days=None, max_mb=None):
+    """Dọn cache: xóa file quá hạn, rồi xóa file cũ nhất cho tới khi dưới giới hạn dung lượng"""
+    max_age_days = CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_mb = CACHE_MAX_MB if max_mb is None else max_mb
+    
+    try:
+        thu_muc = _thu_muc_cache()
+    except OSError:
+        return
+    entries = []
+    for path in glob.glob(os.path.join(thu_muc, "*.pkl")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    now = time.time()
+    con_lai = []
+    for mtime, size, path in entries:
+        if now - mtime > max_age_days * 86400:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        else:
+            con_lai.append((mtime, size, path))
+    
+    # Cũ nhất trước
+    con_lai.sort()
+    tong = sum(size for _, size, _ in con_lai)
+    gioi_han = max_mb * 1024 * 1024
+    for mtime, size, path in con_lai:
+        if tong <= gioi_han:
+            break
+        try:
+            os.remove(path)
+            tong -= size
+        except OSError:
+            pass
+
+
+# --- FILE UPLOAD (lưu theo hash nội dung) ---
+def luu_file_tai_len(ten_file, du_lieu):
+    """
+    Lưu file upload theo hash nội dung, trả về đường dẫn <TAI_LEN_DIR>/<hash>/<tên file>.
+    Cùng nội dung → cùng đường dẫn, không ghi lại (cache đọc file và kho dùng lại được,
+    kể cả khi upload lại); khác nội dung cùng tên → khác thư mục, không đè nhau.
+    Mỗi file một thư mục và không sửa sau khi tạo: chữ ký thư mục là một phần khóa cache.
+    """
+    h = hashlib.blake2b(du_lieu, digest_size=16).hexdigest()
+    thu_muc = os.path.join(TAI_LEN_DIR, h)
+    if not os.path.isdir(thu_muc):
+        thu_muc_rieng(TAI_LEN_DIR)
+        # Ghi vào thư mục tạm rồi đổi tên: phiên khác không bao giờ thấy file ghi dở
+        tam = tempfile.mkdtemp(prefix=".tam_", dir=TAI_LEN_DIR)
+        with open(os.path.join(tam, os.path.basename(ten_file) or "ThongKeTKB.xlsx"), 'wb') as f:
+            f.write(du_lieu)
+        try:
+            os.rename(tam, thu_muc)
+        except OSError:
+            shutil.rmtree(tam, ignore_errors=True)  # Phiên khác vừa lưu cùng nội dung
+        don_dep_tai_len(giu=h)
+    # Cùng nội dung upload với tên khác → dùng file đã lưu lần đầu
+    return os.path.join(thu_muc, os.listdir(thu_muc)[0])
+
+
+def don_dep_tai_len(max_age_days=None, giu=None):
+    """Xóa các file upload lưu quá max_age_days ngày (trừ thư mục hash `giu`)"""
+    max_age_days = CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    try:
+        cac_muc = list(os.scandir(TAI_LEN_DIR))
+    except OSError:
+        return
+    now = time.time()
+    for muc in cac_muc:
+        try:
+            if muc.name != giu and muc.is_dir() and now - muc.stat().st_mtime > max_age_days * 86400:
+                shutil.rmtree(muc.path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+# --- TẢI VỀ FILE TKB GỐC ---
+class CacheNoiDungFile:
+    """
+    Bytes của các file hay tải về (LRU, giới hạn tổng dung lượng), dùng chung mọi phiên:
+    nhiều người cùng tải một file TKB chỉ đọc đĩa và giữ trong bộ nhớ một bản.
+    File lớn hơn 1/4 giới hạn không giữ lại (đọc thẳng từ đĩa mỗi lần tải).
+    Khóa gồm kích thước + mtime nên file sửa trên đĩa được đọc lại.
+    """
+    
+    def __init__(self, max_mb):
+        self.gioi_han = int(max_mb * 1024 * 1024)
+        self._du_lieu = collections.OrderedDict()
+        self._tong = 0
+        self._khoa = threading.Lock()
+    
+    def doc(self, filepath):
+        stat = os.stat(filepath)
+        khoa = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+        with self._khoa:
+            if khoa in self._du_lieu:
+                self._du_lieu.move_to_end(khoa)
+                return self._du_lieu[khoa]
+        with open(filepath, 'rb') as f:
+            du_lieu = f.read()
+        if len(du_lieu) * 4 > self.gioi_han:
+            return du_lieu
+        with self._khoa:
+            if khoa not in self._du_lieu:
+                self._du_lieu[khoa] = du_lieu
+                self._tong += len(du_lieu)
+                while self._tong > self.gioi_han:
+                    _, cu = self._du_lieu.popitem(last=False)
+                    self._tong -= len(cu)
+        return du_lieu
+    
+    def xoa(self):
+        with self._khoa:
+            self._du_lieu.clear()
+            self._tong = 0
+
+
+cache_noi_dung_file = CacheNoiDungFile(TAI_XUONG_CACHE_MB)
+
+
+def doc_file_tai_ve(filepath):
+    """Bytes của file TKB gốc để tải về (qua cache_noi_dung_file)"""
+    return cache_noi_dung_file.doc(filepath)
@@ -0,0 +1,104 @@
+"""
+Cấu hình dữ liệu (đơn vị, cột file ThongKeTKB, cache, tìm kiếm, xung đột lịch).
+Các giá trị chỉnh được qua biến môi trường LICH_GIANG_DAY_*.
+"""
+
+import os
+
+# --- MAPPING ĐƠN VỊ ---
+DON_VI_COLORS = {
+    "Khoa Chính sách công": "#4472C4",
+    "Khoa Phát triển nông thôn": "#70AD47",
+    "Khoa Quản trị kinh doanh nông nghiệp": "#ED7D31",
+    "Trung tâm Kinh tế hợp tác": "#9E480E",
+    "Trung tâm Đào tạo nông dân": "#7030A0",
+    "Giảng viên mời": "#808080",
+}
+
+DON_VI_SHORT = {
+    "Khoa Chính sách công": "CSC",
+    "Khoa Phát triển nông thôn": "PTNT",
+    "Khoa Quản trị kinh doanh nông nghiệp": "QTKDNN",
+    "Trung tâm Kinh tế hợp tác": "TT KTHT",
+    "Trung tâm Đào tạo nông dân": "TT ĐTND",
+}
+
+
+# --- CỘT FILE THONGKETKB ---
+COT_BAT_BUOC = ['Tên lớp', 'Thời gian', 'Tên chuyên đề', 'Tên giảng viên']
+COT_THONGKE = COT_BAT_BUOC + ['Mã lớp', 'Số tiết', 'Đơn vị (GV)', 'Trợ giảng', 'vị (trợ giảng)']
+
+# Khóa xác định buổi trùng khi gộp nhiều file (ngày, giảng viên, lớp, chuyên đề)
+COT_KHOA_TRUNG = ['ngay', 'ten_gv', 'ten_lop', 'ten_chuyen_de']
+
+# --- ĐỌC THEO KHỐI (file lớn: streaming, hiển thị khối đầu trước khi đọc xong) ---
+DOC_THEO_KHOI_TU_MB = float(os.environ.get("LICH_GIANG_DAY_DOC_THEO_KHOI_TU_MB", 20))
+KICH_THUOC_KHOI = int(os.environ.get("LICH_GIANG_DAY_KICH_THUOC_KHOI", 20000))
+
+# --- BẢNG BUỔI DẠY ---
+# Các cột chuỗi của bảng (lưu dạng category / mã + danh sách giá trị)
+_COT_CHUOI_BANG = (
+    'ten_gv', 'ten_lop', 'ma_lop', 'ten_chuyen_de',
+    'don_vi', 'tro_giang', 'don_vi_tg', 'file_goc',
+)
+
+
+# --- TÌM KIẾM KHÔNG DẤU (giảng viên, lớp, mã lớp, chuyên đề, đơn vị) ---
+COT_TIM_KIEM = {
+    'ten_gv': "Giảng viên",
+    'ten_lop': "Lớp",
+    'ma_lop': "Mã lớp",
+    'ten_chuyen_de': "Chuyên đề",
+    'don_vi': "Đơn vị",
+}
+DO_DAI_NGRAM = 3
+NGUONG_KHOP_NGRAM = 0.7      # Tỷ lệ n-gram của từ khóa phải có trong giá trị (chịu được gõ sai nhẹ)
+SO_KET_QUA_TIM_KIEM = 20
+
+# --- XUNG ĐỘT LỊCH ---
+GIOI_HAN_TIET_TUAN = float(os.environ.get("LICH_GIANG_DAY_GIOI_HAN_TIET_TUAN", 40))  # Tiết/tuần/giảng viên
+
+# --- CACHE TRÊN ĐĨA (dùng chung giữa các phiên và các lần khởi động lại) ---
+# Mặc định theo người dùng (~/.cache), không dùng thư mục tạm chung: cache chứa pickle,
+# người dùng khác tạo sẵn thư mục / cài file vào là chạy được mã trong tiến trình app
+CACHE_DIR = os.environ.get(
+    "LICH_GIANG_DAY_CACHE_DIR",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "lich_giang_day"
+    )
+)
+CACHE_MAX_AGE_DAYS = float(os.environ.get("LICH_GIANG_DAY_CACHE_MAX_AGE_DAYS", 30))
+CACHE_MAX_MB = float(os.environ.get("LICH_GIANG_DAY_CACHE_MAX_MB", 512))
+# Ghim thủ công lớp → file TKB (JSON, không bị dọn cùng cache)
+FILE_GHIM_LOP = os.environ.get(
+    "LICH_GIANG_DAY_FILE_GHIM", os.path.join(CACHE_DIR, "ghim_lop.json")
+)
+# File upload lưu theo hash nội dung: <thư mục>/<hash>/<tên file> (dọn theo CACHE_MAX_AGE_DAYS)
+TAI_LEN_DIR = os.environ.get("LICH_GIANG_DAY_TAI_LEN_DIR", os.path.join(CACHE_DIR, "tai_len"))
+# Bytes file TKB gốc để tải về: giữ chung cho mọi phiên, giới hạn tổng dung lượng
+TAI_XUONG_CACHE_MB = float(os.environ.get("LICH_GIANG_DAY_TAI_XUONG_CACHE_MB", 64))
+_PHIEN_BAN_CACHE = 5  # Tăng khi đổi cấu trúc dữ liệu được cache
+
+# --- KHO SQLITE (tùy chọn: dữ liệu nhiều năm truy vấn qua chỉ mục, không nạp hết vào RAM) ---
+# Đường dẫn file .sqlite; "1" → <thư mục cache>/lich_giang_day.sqlite; trống → kho trong bộ nhớ
+SQLITE_DB = os.environ.get("LICH_GIANG_DAY_SQLITE", "")
+if SQLITE_DB.lower() in ("1", "true", "yes"):
+    SQLITE_DB = os.path.join(CACHE_DIR, "lich_giang_day.sqlite")
+SO_KET_NOI_SQLITE_RANH = 8   # Số kết nối SQLite rảnh giữ lại để dùng lại (mỗi db)
+
+# --- ĐỌC NỘI DUNG FILE TKB GỐC ---
+SO_TRANG_PDF_DOC = 2         # Mã lớp / tên lớp nằm ở phần đầu file
+SO_KY_TU_NOI_DUNG = 20000    # Giới hạn văn bản trích ra mỗi file
+SO_KY_TU_TIEU_DE = 1000      # Phần đầu văn bản dùng để so tên lớp
+
+# --- ĐO HIỆU NĂNG (tắt mặc định; tắt thì không tốn gì) ---
+DO_HIEU_NANG = os.environ.get("LICH_GIANG_DAY_DO_HIEU_NANG", "").lower() in ("1", "true", "yes")
+FILE_LOG_HIEU_NANG = os.environ.get(
+    "LICH_GIANG_DAY_LOG_HIEU_NANG", os.path.join(CACHE_DIR, "hieu_nang.jsonl")
+)
+SO_BAN_GHI_HIEU_NANG = 200   # Số lần đo gần nhất giữ trong bộ nhớ
+
+# --- TIẾN TRÌNH CON (parse song song) ---
+# Trống → 'fork' nếu hệ điều hành hỗ trợ, không thì 'spawn' (tiến trình con chỉ import lõi lich_giang_day)
+KIEU_TIEN_TRINH = os.environ.get("LICH_GIANG_DAY_KIEU_TIEN_TRINH", "")
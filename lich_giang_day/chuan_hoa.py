@@ -0,0 +1,151 @@
+"""Chuẩn hóa chuỗi (bỏ dấu tiếng Việt) và ngày tháng"""
+
+import re
+import functools
+from datetime import datetime
+
+import numpy as np
+from ._nap_tre import nap_tre
+
+pd = nap_tre("pandas")
+
+# Bảng bỏ dấu tiếng Việt (dạng dựng sẵn NFC) + dấu rời (dạng tổ hợp NFD)
+_BANG_BO_DAU = {
+    ord(c): khong_dau
+    for khong_dau, cac_ky_tu in {
+        'a': 'áàảãạăắằẳẵặâấầẩẫậ',
+        'e': 'éèẻẽẹêếềểễệ',
+        'i': 'íìỉĩị',
+        'o': 'óòỏõọôốồổỗộơớờởỡợ',
+        'u': 'úùủũụưứừửữự',
+        'y': 'ýỳỷỹỵ',
+        'd': 'đ',
+    }.items()
+    for c in cac_ky_tu
+}
+_BANG_BO_DAU.update({ma: None for ma in range(0x0300, 0x0370)})
+_MAU_KHONG_PHAI_CHU = re.compile(r'\W+')
+KICH_THUOC_CACHE_CHUAN_HOA = 65536
+
+
+def bo_dau(text):
+    """Chữ thường, bỏ dấu tiếng Việt (cả dạng tổ hợp NFD); giữ khoảng trắng và ký tự khác"""
+    return text.lower().translate(_BANG_BO_DAU)
+
+
+@functools.lru_cache(maxsize=KICH_THUOC_CACHE_CHUAN_HOA)
+def _chuan_hoa_chuoi(text):
+    # Một lượt translate + một regex thay cho từng lần replace
+    return _MAU_KHONG_PHAI_CHU.sub('', bo_dau(text))
+
+
+def chuan_hoa_text(text):
+    """
+    Chuẩn hóa text để so sánh:
+    - Loại bỏ dấu tiếng Việt (cả dạng dựng sẵn lẫn tổ hợp NFD)
+    - Chuyển thành chữ thường
+    - Loại bỏ khoảng trắng và ký tự đặc biệt
+    Kết quả được ghi nhớ (LRU, giới hạn KICH_THUOC_CACHE_CHUAN_HOA chuỗi).
+    """
+    if isinstance(text, str):  # Trường hợp thường gặp: không cần tới pandas
+        return _chuan_hoa_chuoi(text) if text else ""
+    if not text or pd.isna(text):
+        return ""
+    return _chuan_hoa_chuoi(str(text))
+
+
+def chuan_hoa_cot_text(series):
+    """Chuẩn hóa cả một cột (mỗi giá trị khác nhau chỉ chuẩn hóa một lần)"""
+    codes, uniques = pd.factorize(series)
+    da_chuan_hoa = np.array([chuan_hoa_text(v) for v in uniques] + [""], dtype=object)
+    # codes = -1 (giá trị trống) → chuỗi rỗng ở cuối mảng
+    return pd.Series(da_chuan_hoa[codes], index=series.index, dtype=object)
+
+
+def trich_xuat_keywords_tu_ten_lop(ten_lop):
+    """
+    Trích xuất các từ khóa quan trọng từ tên lớp
+    VD: "LỚP TẬP HUẤN KIẾN THỨC KỸ NĂNG NGH'41" → ["41", "ngh", "kien", "thuc"]
+    """
+    if not ten_lop or pd.isna(ten_lop):
+        return []
+    
+    text = str(ten_lop).lower()
+    
+    # Tìm các số (mã lớp thường có số)
+    numbers = re.findall(r'\d+', text)
+    
+    # Tìm các từ viết tắt (chữ hoa liên tiếp)
+    abbreviations = re.findall(r'\b[A-Z]{2,}\b', str(ten_lop))
+    
+    # Chuẩn hóa text và tách thành từ
+    text_normalized = chuan_hoa_text(text)
+    
+    # Lấy các từ có ý nghĩa (bỏ qua "lop", "tap", "huan", etc.)
+    skip_words = {'lop', 'tap', 'huan', 'boi', 'duong', 'theo', 'tieu', 'chuan', 'chu'}
+    words = [w for w in re.findall(r'\w+', text_normalized) if w not in skip_words and len(w) >= 3]
+    
+    # Kết hợp tất cả keywords
+    keywords = numbers + [chuan_hoa_text(a) for a in abbreviations] + words[:5]
+    
+    return [k for k in keywords if k]  # Loại bỏ empty strings
+
+
+_MAU_NGAY = r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})'
+
+
+def chuan_hoa_ngay(text):
+    """Chuẩn hóa ngày từ text thành datetime"""
+    if pd.isna(text):
+        return None
+    
+    # Nếu đã là datetime
+    if isinstance(text, datetime):
+        return text
+    
+    text_str = str(text)
+    
+    # Tìm pattern ngày/tháng/năm
+    match = re.search(_MAU_NGAY, text_str)
+    if match:
+        try:
+            day, month, year = map(int, match.groups())
+            return datetime(year, month, day)
+        except:
+            pass
+    
+    return None
+
+
+def chuan_hoa_cot_ngay(series):
+    """
+    Chuẩn hóa cả cột ngày trong một lượt (bản vectorized của chuan_hoa_ngay).
+    Trả về Series datetime64, NaT nếu không đọc được ngày.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    
+    # Ô đã là datetime (ô kiểu Date trong Excel)
+    la_datetime = series.map(lambda v: isinstance(v, datetime)).astype(bool)
+    ngay_datetime = pd.to_datetime(series.where(la_datetime), errors='coerce')
+    
+    # Ô dạng text: tìm pattern ngày/tháng/năm
+    parts = series.where(~la_datetime).astype(str).str.extract(_MAU_NGAY)
+    ngay_text = pd.to_datetime(
+        pd.DataFrame({
+            'year': pd.to_numeric(parts[2]),
+            'month': pd.to_numeric(parts[1]),
+            'day': pd.to_numeric(parts[0]),
+        }),
+        errors='coerce'
+    )
+    
+    return ngay_datetime.where(la_datetime, ngay_text)
+
+
+def _cot_chuoi(df, col, mac_dinh=''):
+    """Lấy cả cột dạng chuỗi đã strip (ô trống hoặc thiếu cột → mac_dinh)"""
+    if col not in df.columns:
+        return pd.Series(mac_dinh, index=df.index, dtype=object)
+    s = df[col]
+    return s.astype(str).str.strip().where(s.notna(), mac_dinh).astype(object)
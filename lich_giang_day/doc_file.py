@@ -0,0 +1,547 @@
+"""Đọc, làm sạch và gộp file ThongKeTKB thành bảng buổi dạy (có cache trên đĩa)"""
+
+import os
+import glob
+import hashlib
+
+import numpy as np
+
+from ._nap_tre import nap_tre
+from .cau_hinh import (
+    COT_BAT_BUOC,
+    _COT_CHUOI_BANG,
+    COT_KHOA_TRUNG,
+    COT_THONGKE,
+    DOC_THEO_KHOI_TU_MB,
+    KICH_THUOC_KHOI,
+    _PHIEN_BAN_CACHE,
+)
+from .hieu_nang import do_buoc
+from .chuan_hoa import chuan_hoa_cot_ngay, _cot_chuoi
+from .cache import doc_cache, ghi_cache, _hash_noi_dung
+from .song_song import _tao_pool
+from .tai_lieu_tkb import (
+    _chu_ky_bo_tai_lieu,
+    _chu_ky_thu_muc,
+    doc_ghim_lop,
+    lay_chi_muc_noi_dung,
+    tim_file_cho_cac_lop,
+)
+
+pd = nap_tre("pandas")
+
+
+def tim_file_thongke():
+    """Tìm file ThongKeTKB mới nhất trong thư mục"""
+    cwd = os.getcwd()
+    list_files = glob.glob(os.path.join(cwd, "ThongKeTKB*.xlsx"))
+    if not list_files:
+        return None
+    return max(list_files, key=os.path.getctime)
+
+
+def khoa_cache_file(filepath):
+    """
+    Khóa cache của file ThongKeTKB: chỉ theo chính file đó (đường dẫn + kích thước
+    + mtime + hash nội dung) và phiên bản định dạng cache. Thêm file khác vào thư mục
+    không làm mất cache; file_goc được kiểm tra riêng khi đọc cache (doc_cache_file).
+    """
+    path = os.path.abspath(filepath)
+    stat = os.stat(path)
+    thanh_phan = (
+        _PHIEN_BAN_CACHE,
+        path,
+        stat.st_size,
+        stat.st_mtime_ns,
+        _hash_noi_dung(path),
+    )
+    return hashlib.blake2b(repr(thanh_phan).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def doc_cache_file(khoa, thu_muc):
+    """
+    Kết quả đã parse của file ThongKeTKB trong cache đĩa (None nếu chưa có).
+    Không đọc lại Excel: bộ file TKB gốc đổi từ lần ghép trước → ghép lại file_goc
+    mọi lớp; chỉ lớp ghim đổi → chỉ ghép lại các buổi của những lớp đó. Rồi ghi đè cache.
+    """
+    ket_qua = doc_cache(khoa)
+    if ket_qua is None:
+        return None
+    if ket_qua.get('chu_ky_file_goc') != _chu_ky_bo_tai_lieu(thu_muc) or ket_qua.get('ghim') is None:
+        ket_qua = ghep_lai_file_goc(ket_qua, thu_muc)
+    else:
+        doi = lop_doi_ghim(ket_qua['ghim'], doc_ghim_lop(thu_muc))
+        if not doi:
+            return ket_qua
+        ket_qua = ghep_lai_file_goc(ket_qua, thu_muc, doi)
+    ghi_cache(khoa, ket_qua)
+    return ket_qua
+
+
+def doc_events_co_cache(filepath):
+    """Đọc file ThongKeTKB qua cache trên đĩa (parse lại khi file thay đổi)"""
+    try:
+        khoa = khoa_cache_file(filepath)
+    except OSError as e:
+        raise ValueError(f"Lỗi đọc file: {e}") from e
+    
+    ket_qua = doc_cache_file(khoa, os.path.dirname(os.path.abspath(filepath)))
+    if ket_qua is None:
+        if os.path.getsize(filepath) >= DOC_THEO_KHOI_TU_MB * 1024 * 1024:
+            # File lớn: đọc streaming để giới hạn bộ nhớ
+            ket_qua = gop_ket_qua(kq for kq, _, _ in xay_dung_events_theo_khoi(filepath))
+        else:
+            ket_qua = xay_dung_events(filepath)
+        ghi_cache(khoa, ket_qua)
+    return ket_qua
+
+
+def chu_ky_du_lieu(thu_muc="."):
+    """
+    Chữ ký rẻ của thư mục dữ liệu (chỉ stat, không đọc file):
+    mtime thư mục + (tên, kích thước, mtime) các file ThongKeTKB.
+    """
+    try:
+        with os.scandir(thu_muc) as it:
+            cac_file = sorted(
+                (e.name, e.stat().st_size, e.stat().st_mtime_ns)
+                for e in it
+                if e.name.startswith("ThongKeTKB") and e.name.endswith(".xlsx")
+            )
+    except OSError:
+        return None
+    return _chu_ky_thu_muc(thu_muc), tuple(cac_file)
+
+
+def tim_cac_file_thongke():
+    """Tìm tất cả file ThongKeTKB trong thư mục (mỗi đơn vị có thể xuất một file riêng)"""
+    return sorted(glob.glob(os.path.join(os.getcwd(), "ThongKeTKB*.xlsx")))
+
+
+def loai_trung_lap(ket_qua, nguon=None):
+    """
+    Bỏ các buổi trùng theo (ngày, giảng viên, lớp, chuyên đề).
+    `nguon`: số thứ tự file của từng dòng → chỉ bỏ buổi đã có ở file đứng trước
+    (một file có thể có 2 buổi cùng khóa, VD: sáng và chiều).
+    """
+    bang = ket_qua['bang']
+    if nguon is None:
+        trung = bang.duplicated(subset=COT_KHOA_TRUNG).to_numpy()
+    else:
+        file_dau = pd.Series(nguon).groupby(
+            [bang[c] for c in COT_KHOA_TRUNG], observed=True, dropna=False
+        ).transform('min').to_numpy()
+        trung = np.asarray(nguon) != file_dau
+    so_trung = int(trung.sum())
+    if not so_trung:
+        return {**ket_qua, 'so_trung': 0}
+    
+    bang = bang[~trung].reset_index(drop=True)
+    return {
+        **ket_qua,
+        'bang': bang,
+        **_thong_ke_file_tkb(bang),
+        'total_rows': ket_qua['total_rows'] - so_trung,
+        'so_trung': so_trung,
+    }
+
+
+def doc_nhieu_file_thongke(cac_file, so_tien_trinh=None):
+    """
+    Đọc nhiều file ThongKeTKB song song, gộp và bỏ buổi trùng.
+    File đã có trong cache đĩa không parse lại: thêm một file xuất mới
+    chỉ tốn thời gian parse file đó.
+    """
+    ket_qua = {}
+    can_doc = []
+    for filepath in cac_file:
+        try:
+            kq = doc_cache_file(khoa_cache_file(filepath), os.path.dirname(os.path.abspath(filepath)))
+        except OSError as e:
+            raise ValueError(f"Lỗi đọc file {os.path.basename(filepath)}: {e}") from e
+        if kq is None:
+            can_doc.append(filepath)
+        else:
+            ket_qua[filepath] = kq
+    
+    if len(can_doc) == 1:
+        ket_qua[can_doc[0]] = doc_events_co_cache(can_doc[0])
+    elif can_doc:
+        with _tao_pool(len(can_doc), so_tien_trinh) as pool:
+            futures = {pool.submit(doc_events_co_cache, f): f for f in can_doc}
+            for future, filepath in futures.items():
+                try:
+                    ket_qua[filepath] = future.result()
+                except ValueError as e:
+                    raise ValueError(f"{os.path.basename(filepath)}: {e}") from e
+    
+    cac_ket_qua = [ket_qua[f] for f in cac_file]
+    gop = gop_ket_qua(cac_ket_qua)
+    gop['cac_file'] = [os.path.basename(f) for f in cac_file]
+    nguon = np.repeat(np.arange(len(cac_ket_qua)), [len(kq['bang']) for kq in cac_ket_qua])
+    return loai_trung_lap(gop, nguon)
+
+
+def xay_dung_events(filepath):
+    """
+    Đọc file ThongKeTKB và chuyển thành bảng buổi dạy dạng cột cho calendar
+    (không gọi giao diện). Xử lý theo cột (vectorized) thay vì duyệt từng dòng.
+    Trả về dict: bang (DataFrame: ngay, so_tiet + các cột chuỗi dạng category),
+    lop_tkb, so_co_file, so_thieu_file (xem _thong_ke_file_tkb), invalid_dates, total_rows, chu_ky_file_goc và ghim
+    (chữ ký bộ file TKB gốc và các lớp ghim lúc ghép file_goc).
+    Lỗi đọc file / thiếu cột → ValueError.
+    """
+    # Chỉ mục nội dung file TKB xây nền trong lúc đọc Excel
+    lay_chi_muc_noi_dung(os.path.dirname(filepath))
+    try:
+        with do_buoc('doc_excel', file=os.path.basename(filepath)):
+            df = pd.read_excel(filepath)
+    except Exception as e:
+        raise ValueError(f"Lỗi đọc file: {e}") from e
+    
+    return xu_ly_bang_thongke(df, os.path.dirname(filepath))
+
+
+def doc_excel_theo_khoi(filepath, kich_thuoc_khoi=None):
+    """
+    Đọc file xlsx theo từng khối dòng ở chế độ read-only (streaming) của openpyxl,
+    chỉ lấy các cột cần dùng. Mỗi khối là DataFrame có index = vị trí dòng dữ liệu
+    trong sheet (như pd.read_excel). Trả về generator (df_khoi, so_dong_da_doc, tong_so_dong).
+    """
+    from openpyxl import load_workbook  # Chỉ nạp khi thật sự parse file Excel
+    
+    kich_thuoc_khoi = kich_thuoc_khoi or KICH_THUOC_KHOI
+    try:
+        wb = load_workbook(filepath, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"Lỗi đọc file: {e}") from e
+    
+    try:
+        ws = wb.active
+        # max_row lấy từ khai báo kích thước sheet, có thể thiếu
+        tong_so_dong = ws.max_row - 1 if ws.max_row else None
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        
+        # Chỉ giữ các cột cần dùng (cột đầu tiên nếu trùng tên)
+        vi_tri = {}
+        for i, ten in enumerate(header):
+            ten = str(ten).strip() if ten is not None else ''
+            if ten in COT_THONGKE and ten not in vi_tri:
+                vi_tri[ten] = i
+        cot = list(vi_tri)
+        idx = list(vi_tri.values())
+        
+        khoi = []
+        so_dong = 0
+        for row in rows:
+            khoi.append([row[i] if i < len(row) else None for i in idx])
+            if len(khoi) >= kich_thuoc_khoi:
+                yield pd.DataFrame(khoi, columns=cot, index=pd.RangeIndex(so_dong, so_dong + len(khoi))), so_dong + len(khoi), tong_so_dong
+                so_dong += len(khoi)
+                khoi = []
+        
+        # Khối cuối (luôn trả ít nhất một khối để kiểm tra cột)
+        if khoi or so_dong == 0:
+            yield pd.DataFrame(khoi, columns=cot, index=pd.RangeIndex(so_dong, so_dong + len(khoi))), so_dong + len(khoi), tong_so_dong
+    finally:
+        wb.close()
+
+
+def xay_dung_events_theo_khoi(filepath, kich_thuoc_khoi=None):
+    """
+    Như xay_dung_events nhưng đọc streaming theo khối: trả về generator
+    (ket_qua_khoi, so_dong_da_doc, tong_so_dong); gộp lại bằng gop_ket_qua.
+    """
+    thu_muc = os.path.dirname(filepath)
+    for df, so_dong, tong_so_dong in doc_excel_theo_khoi(filepath, kich_thuoc_khoi):
+        yield xu_ly_bang_thongke(df, thu_muc), so_dong, tong_so_dong
+
+
+class _BoGopBang:
+    """
+    Gộp dần các bảng cùng cột, từng khối ngay khi có: cột chuỗi chỉ giữ mã số
+    + danh sách giá trị chung (như KhoSuKien), khối gốc bỏ được ngay sau khi gộp.
+    """
+    
+    def __init__(self, cot_chuoi):
+        self._cot_chuoi = cot_chuoi
+        self._thu_tu_cot = None
+        self._vi_tri = {cot: {} for cot in cot_chuoi}
+        self._cac_mang = {}
+        self._chi_so = []
+    
+    def them(self, bang):
+        if self._thu_tu_cot is None:
+            self._thu_tu_cot = list(bang.columns)
+        self._chi_so.append(bang.index.to_numpy())
+        for cot in self._thu_tu_cot:
+            if cot in self._vi_tri:
+                cat = bang[cot].astype('category').cat
+                vi_tri = self._vi_tri[cot]
+                anh_xa = np.array(
+                    [vi_tri.setdefault(v, len(vi_tri)) for v in cat.categories] + [-1], dtype=np.int32
+                )  # mã -1 (trống) giữ nguyên
+                mang = anh_xa[cat.codes.to_numpy()]
+            else:
+                mang = bang[cot].to_numpy()
+            self._cac_mang.setdefault(cot, []).append(mang)
+    
+    def bang(self):
+        """DataFrame các dòng đã gộp (cột chuỗi dạng category)"""
+        cot = {}
+        for ten in self._thu_tu_cot:
+            mang = np.concatenate(self._cac_mang[ten])
+            if ten in self._vi_tri:
+                mang = pd.Categorical.from_codes(mang, categories=pd.Index(list(self._vi_tri[ten]), dtype=object))
+            cot[ten] = mang
+        return pd.DataFrame(cot, index=np.concatenate(self._chi_so))
+
+
+class BoGopKetQua:
+    """
+    Gộp dần kết quả của nhiều khối (hoặc nhiều file): them() từng kết quả ngay khi đọc xong,
+    ket_qua() lấy kết quả gộp (gọi được nhiều lần giữa chừng). Chỉ một kết quả → trả lại nguyên.
+    """
+    
+    def __init__(self):
+        self._dau = None
+        self._bang = _BoGopBang(_COT_CHUOI_BANG)
+        self._so_phan = 0
+        self._invalid_dates = []
+        self._total_rows = 0
+        self._cac_chu_ky = set()
+        self._ghim = None
+        self._ghim_chung = True
+    
+    def them(self, ket_qua):
+        self._so_phan += 1
+        if self._so_phan == 1:
+            self._dau = ket_qua  # Giữ nguyên tới khi có kết quả thứ hai
+            return
+        if self._dau is not None:
+            dau, self._dau = self._dau, None
+            self._gop(dau)
+        self._gop(ket_qua)
+    
+    def _gop(self, ket_qua):
+        self._bang.them(ket_qua['bang'])
+        if not self._cac_chu_ky:  # Kết quả gộp đầu tiên
+            self._ghim = ket_qua.get('ghim')
+        self._ghim_chung &= ket_qua.get('ghim') == self._ghim
+        self._invalid_dates.extend(ket_qua['invalid_dates'])
+        self._total_rows += ket_qua['total_rows']
+        self._cac_chu_ky.add(ket_qua.get('chu_ky_file_goc'))
+    
+    def ket_qua(self):
+        if self._dau is not None:
+            return self._dau
+        bang = self._bang.bang().reset_index(drop=True)
+        # Các phần ghép file_goc với bộ TKB / lớp ghim khác nhau → không có chữ ký chung (ghép lại khi đọc cache)
+        return {
+            'bang': bang,
+            **_thong_ke_file_tkb(bang),
+            'invalid_dates': list(self._invalid_dates),
+            'total_rows': self._total_rows,
+            'chu_ky_file_goc': next(iter(self._cac_chu_ky)) if len(self._cac_chu_ky) == 1 else None,
+            'ghim': self._ghim if self._ghim_chung else None,
+        }
+
+
+def gop_ket_qua(cac_ket_qua):
+    """Gộp kết quả của nhiều khối (hoặc nhiều file) thành một kết quả; nhận cả generator (gộp từng khối)"""
+    bo_gop = BoGopKetQua()
+    for ket_qua in cac_ket_qua:
+        bo_gop.them(ket_qua)
+    return bo_gop.ket_qua()
+
+
+def _thong_ke_file_tkb(bang):
+    """
+    Có / thiếu file TKB gốc theo lớp (từ bảng có ma_lop, ten_lop, ten_gv, ngay, file_goc):
+    lop_tkb = DataFrame nhỏ, mỗi (mã lớp, tên lớp, file_goc) một dòng với số buổi, các giảng viên
+    (sắp xếp) và ngày đầu/cuối; so_co_file / so_thieu_file = số buổi. Không giữ gì theo từng buổi.
+    """
+    khoa = [bang[c].astype(object) for c in ('ma_lop', 'ten_lop', 'file_goc')]
+    lop_tkb = pd.DataFrame({
+        'ngay': pd.to_datetime(bang['ngay']).to_numpy(),
+        'ten_gv': bang['ten_gv'].astype(object).to_numpy(),
+    }).groupby([k.to_numpy() for k in khoa], sort=False, dropna=False).agg(
+        so_buoi=('ngay', 'size'),
+        ten_gv=('ten_gv', lambda s: ", ".join(sorted(set(s.dropna())))),
+        ngay_dau=('ngay', 'min'),
+        ngay_cuoi=('ngay', 'max'),
+    )
+    lop_tkb.index.names = ['ma_lop', 'ten_lop', 'file_goc']
+    lop_tkb = lop_tkb.reset_index()
+    lop_tkb['file_goc'] = lop_tkb['file_goc'].astype(object).where(lop_tkb['file_goc'].notna(), None)
+    so_co_file = int(lop_tkb.loc[lop_tkb['file_goc'].notna(), 'so_buoi'].sum())
+    return {
+        'lop_tkb': lop_tkb,
+        'so_co_file': so_co_file,
+        'so_thieu_file': int(len(bang) - so_co_file),
+    }
+
+
+def lam_sach_bang_thongke(df):
+    """
+    Làm sạch DataFrame của file ThongKeTKB (toàn bộ hoặc một khối dòng):
+    parse ngày, làm sạch cột chuỗi, bỏ dòng thiếu giảng viên (chưa tìm file TKB).
+    Trả về (frame, invalid_dates, total_rows).
+    """
+    # Các cột cần thiết
+    for col in COT_BAT_BUOC:
+        if col not in df.columns:
+            raise ValueError(f"Thiếu cột '{col}' trong file Excel")
+    
+    # Parse ngày cho cả cột; ghi nhận các ô có dữ liệu nhưng không đọc được
+    ngay = chuan_hoa_cot_ngay(df['Thời gian'])
+    co_ngay = ngay.notna()
+    thoi_gian = df['Thời gian']
+    ngay_loi = thoi_gian[~co_ngay & thoi_gian.notna() & (thoi_gian.astype(str).str.strip() != '')]
+    invalid_dates = [
+        {'dong': idx + 2, 'gia_tri': str(v)}  # +2: dòng tiêu đề và Excel đếm từ 1
+        for idx, v in ngay_loi.items()
+    ]
+    
+    df = df[co_ngay]
+    ngay = ngay[co_ngay]
+    total_rows = len(df)
+    
+    # Làm sạch các cột chuỗi
+    frame = pd.DataFrame({
+        'ten_lop': _cot_chuoi(df, 'Tên lớp'),
+        'ma_lop': _cot_chuoi(df, 'Mã lớp'),
+        'ten_chuyen_de': _cot_chuoi(df, 'Tên chuyên đề'),
+        'ten_gv': _cot_chuoi(df, 'Tên giảng viên'),
+        'don_vi': _cot_chuoi(df, 'Đơn vị (GV)', 'Giảng viên mời'),
+        'tro_giang': _cot_chuoi(df, 'Trợ giảng'),
+        'don_vi_tg': _cot_chuoi(df, 'vị (trợ giảng)'),
+        'so_tiet': df['Số tiết'].fillna(8).astype(object) if 'Số tiết' in df.columns else 8,
+        'ngay': ngay.dt.normalize(),
+    })
+    
+    # Bỏ qua nếu thiếu thông tin quan trọng
+    frame = frame[(frame['ten_gv'] != '') & (frame['ten_gv'] != 'nan')]
+    return frame, invalid_dates, total_rows
+
+
+def _gan_file_goc(frame, thu_muc):
+    """
+    Tìm file TKB gốc (theo MÃ LỚP và TÊN LỚP) cho các dòng của frame (cột file_goc).
+    Mỗi lớp khác nhau chỉ tìm một lần rồi trải lại cho mọi buổi của lớp.
+    """
+    with do_buoc('ghep_file_tkb', so_dong=len(frame)) as chi_tiet:
+        ma, cac_lop = pd.factorize(pd.MultiIndex.from_arrays([frame['ma_lop'], frame['ten_lop']]))
+        cac_file = tim_file_cho_cac_lop(list(cac_lop), thu_muc)
+        frame['file_goc'] = pd.Series(
+            np.array(cac_file + [None], dtype=object)[ma], index=frame.index, dtype=object
+        )
+        if chi_tiet is not None:
+            chi_tiet['so_lop'] = len(cac_lop)
+    return frame
+
+
+def _tao_bang(frame):
+    """Bảng dạng cột: chuỗi lưu dạng category (mỗi giá trị chỉ lưu một lần)"""
+    bang = pd.DataFrame({'ngay': frame['ngay'], 'so_tiet': frame['so_tiet']})
+    for cot in _COT_CHUOI_BANG:
+        bang[cot] = frame[cot].astype('category')
+    return bang.reset_index(drop=True)
+
+
+def xu_ly_bang_thongke(df, thu_muc):
+    """
+    Chuyển DataFrame của file ThongKeTKB (toàn bộ hoặc một khối dòng)
+    thành kết quả như xay_dung_events. `thu_muc`: nơi tìm file TKB gốc.
+    """
+    with do_buoc('lam_sach', so_dong=len(df)):
+        frame, invalid_dates, total_rows = lam_sach_bang_thongke(df)
+    # Lấy trước khi ghép: tài liệu / lớp ghim đổi giữa chừng → lần sau ghép lại
+    chu_ky, ghim = _chu_ky_bo_tai_lieu(thu_muc), doc_ghim_lop(thu_muc)
+    frame = _gan_file_goc(frame, thu_muc)
+    
+    with do_buoc('tao_bang', so_dong=len(frame)):
+        bang = _tao_bang(frame)
+    
+    return {
+        'bang': bang,
+        **_thong_ke_file_tkb(bang),
+        'invalid_dates': invalid_dates,
+        'total_rows': total_rows,
+        'chu_ky_file_goc': chu_ky,
+        'ghim': ghim,
+    }
+
+
+def lop_doi_ghim(ghim_cu, ghim_moi):
+    """Các lớp có ghim khác nhau giữa hai lần (ghim thêm, bỏ ghim hoặc đổi file)"""
+    return {
+        k for k in ghim_cu.keys() | ghim_moi.keys()
+        if k not in ghim_cu or k not in ghim_moi or ghim_cu[k] != ghim_moi[k]
+    }
+
+
+def buoi_cua_lop(bang, cac_lop):
+    """Mảng bool: buổi nào thuộc một trong các lớp (khóa (mã lớp, tên lớp))"""
+    lop = pd.MultiIndex.from_arrays([bang['ma_lop'].astype(object), bang['ten_lop'].astype(object)])
+    return lop.isin(list(cac_lop))
+
+
+def ghep_lai_file_goc(ket_qua, thu_muc, cac_lop=None):
+    """
+    Ghép lại file_goc cho kết quả đã parse, không đọc lại file Excel: mỗi lớp tra
+    một lần qua bảng ghép đã lưu. `cac_lop`: chỉ ghép lại buổi của các lớp này
+    (lớp có ghim đổi); None = mọi lớp (bộ file TKB gốc đổi).
+    """
+    chu_ky, ghim = _chu_ky_bo_tai_lieu(thu_muc), doc_ghim_lop(thu_muc)
+    bang = ket_qua['bang'].copy()
+    if cac_lop is None:
+        file_goc = _gan_file_goc(bang, thu_muc)['file_goc']
+    else:
+        doi = buoi_cua_lop(bang, cac_lop)
+        file_goc = bang['file_goc'].astype(object)
+        file_goc[doi] = _gan_file_goc(bang[doi].copy(), thu_muc)['file_goc']
+    bang['file_goc'] = file_goc.astype('category')
+    return {
+        **ket_qua,
+        'bang': bang,
+        **_thong_ke_file_tkb(bang),
+        'chu_ky_file_goc': chu_ky,
+        'ghim': ghim,
+    }
+
+
+def doc_bang_sach(filepath):
+    """
+    Đọc và làm sạch cả file ThongKeTKB (chưa tìm file TKB) — dùng cho cập nhật tăng dần.
+    File lớn đọc streaming theo khối. Trả về (frame, invalid_dates, total_rows).
+    """
+    if os.path.getsize(filepath) >= DOC_THEO_KHOI_TU_MB * 1024 * 1024:
+        bo_gop, invalid_dates, total_rows = _BoGopBang(_COT_CHUOI_BANG), [], 0
+        for df, _, _ in doc_excel_theo_khoi(filepath):
+            frame, invalid, so_dong = lam_sach_bang_thongke(df)
+            bo_gop.them(frame)
+            invalid_dates.extend(invalid)
+            total_rows += so_dong
+        return bo_gop.bang(), invalid_dates, total_rows
+    try:
+        with do_buoc('doc_excel', file=os.path.basename(filepath)):
+            df = pd.read_excel(filepath)
+    except Exception as e:
+        raise ValueError(f"Lỗi đọc file: {e}") from e
+    return lam_sach_bang_thongke(df)
+
+
+def _khoa_noi_dung(bang):
+    """Hash nội dung từng dòng (không gồm file_goc) để so dòng giữa hai phiên bản file"""
+    cot = ['ngay', 'so_tiet'] + [c for c in _COT_CHUOI_BANG if c != 'file_goc']
+    du_lieu = pd.DataFrame({c: bang[c].astype(object) for c in cot if c != 'ngay'})
+    du_lieu['ngay'] = pd.to_datetime(bang['ngay']).to_numpy().astype('datetime64[D]')
+    return pd.util.hash_pandas_object(du_lieu, index=False).to_numpy()
+
+
+def _khoa_co_thu_tu(khoa):
+    """Ghép hash với số lần đã xuất hiện trước đó: các dòng giống hệt nhau vẫn phân biệt được"""
+    lan = pd.Series(khoa).groupby(khoa).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([khoa, lan])
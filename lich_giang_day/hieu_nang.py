@@ -0,0 +1,113 @@
+"""Đo hiệu năng từng bước (thời gian + bộ nhớ), tắt mặc định"""
+
+import os
+import functools
+import json
+import logging
+import collections
+import contextlib
+import tracemalloc
+import time
+import threading
+from datetime import datetime
+
+from .cau_hinh import DO_HIEU_NANG, FILE_LOG_HIEU_NANG, SO_BAN_GHI_HIEU_NANG
+
+_KHONG_DO = contextlib.nullcontext()
+
+
+def _khong_do_buoc(buoc, **chi_tiet):
+    """Tắt đo hiệu năng: trả về một context rỗng dùng chung"""
+    return _KHONG_DO
+
+
+@functools.cache
+def _nhat_ky_hieu_nang():
+    """Các lần đo gần nhất (dùng chung trong tiến trình) và logger ghi file JSON lines"""
+    logger = logging.getLogger("lich_giang_day.hieu_nang")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        try:
+            os.makedirs(os.path.dirname(FILE_LOG_HIEU_NANG) or ".", exist_ok=True)
+            handler = logging.FileHandler(FILE_LOG_HIEU_NANG, encoding='utf-8')
+        except OSError:
+            handler = logging.NullHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    return collections.deque(maxlen=SO_BAN_GHI_HIEU_NANG), logger
+
+
+def nhat_ky_hieu_nang():
+    """Các lần đo gần nhất trong tiến trình (list dict, cũ → mới; rỗng nếu tắt đo)"""
+    return list(_nhat_ky_hieu_nang()[0])
+
+
+_ngan_xep_do = threading.local()
+_khoa_tracemalloc = threading.Lock()
+_so_buoc_dang_do = 0         # Số bước đang đo (mọi luồng)
+_da_bat_tracemalloc = False  # tracemalloc do module này bật (thì module này tắt)
+
+
+def _bat_do_bo_nho():
+    """Bước đầu tiên đang đo bật tracemalloc: ngoài các bước đo, cấp phát không bị theo dõi"""
+    global _so_buoc_dang_do, _da_bat_tracemalloc
+    with _khoa_tracemalloc:
+        if _so_buoc_dang_do == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _da_bat_tracemalloc = True
+        _so_buoc_dang_do += 1
+
+
+def _tat_do_bo_nho():
+    """Bước cuối cùng đang đo kết thúc → tắt tracemalloc (nếu module này đã bật)"""
+    global _so_buoc_dang_do, _da_bat_tracemalloc
+    with _khoa_tracemalloc:
+        _so_buoc_dang_do -= 1
+        if _so_buoc_dang_do == 0 and _da_bat_tracemalloc:
+            tracemalloc.stop()
+            _da_bat_tracemalloc = False
+
+
+@contextlib.contextmanager
+def _do_buoc_that(buoc, **chi_tiet):
+    """
+    Đo một bước: thời gian + bộ nhớ cấp phát thêm lúc đỉnh (tracemalloc; xấp xỉ khi
+    nhiều luồng cùng chạy). Bước lồng nhau vẫn đúng đỉnh của bước ngoài.
+    tracemalloc chỉ bật trong lúc có bước đang đo (xem _bat_do_bo_nho).
+    Ghi vào nhật ký trong bộ nhớ và FILE_LOG_HIEU_NANG; `chi_tiet` thêm được trong khối with.
+    """
+    _bat_do_bo_nho()
+    ngan_xep = _ngan_xep_do.__dict__.setdefault('ngan_xep', [])
+    truoc, dinh_truoc = tracemalloc.get_traced_memory()
+    if ngan_xep:
+        # reset_peak xóa đỉnh bước ngoài đã đạt trước bước này: giữ lại trong khung của nó
+        ngan_xep[-1]['dinh'] = max(ngan_xep[-1]['dinh'], dinh_truoc)
+    tracemalloc.reset_peak()
+    khung = {'dinh': 0}
+    ngan_xep.append(khung)
+    bat_dau = time.perf_counter()
+    try:
+        yield chi_tiet
+    finally:
+        giay = time.perf_counter() - bat_dau
+        ngan_xep.pop()
+        dinh = max(tracemalloc.get_traced_memory()[1], khung['dinh'])
+        _tat_do_bo_nho()
+        if ngan_xep:
+            ngan_xep[-1]['dinh'] = max(ngan_xep[-1]['dinh'], dinh)
+        ban_ghi = {
+            'thoi_diem': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'buoc': buoc,
+            'giay': round(giay, 4),
+            'mb': round(max(dinh - truoc, 0) / 1024 / 1024, 2),
+            **chi_tiet,
+        }
+        cac_ban_ghi, logger = _nhat_ky_hieu_nang()
+        cac_ban_ghi.append(ban_ghi)
+        logger.info(json.dumps(ban_ghi, ensure_ascii=False, default=str))
+
+
+# Dùng: `with do_buoc('ten_buoc', so_dong=n) as chi_tiet:` (tắt → chi_tiet là None)
+do_buoc = _do_buoc_that if DO_HIEU_NANG else _khong_do_buoc
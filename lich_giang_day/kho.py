@@ -0,0 +1,744 @@
+"""Kho sự kiện trong bộ nhớ: bảng buổi dạy dạng cột, chỉ mục lọc, tổng hợp, xung đột lịch, tìm kiếm"""
+
+import sys
+import collections
+from datetime import datetime
+
+import numpy as np
+
+from ._nap_tre import nap_tre
+from .cau_hinh import (
+    _COT_CHUOI_BANG,
+    COT_TIM_KIEM,
+    DO_DAI_NGRAM,
+    DON_VI_COLORS,
+    DON_VI_SHORT,
+    GIOI_HAN_TIET_TUAN,
+    NGUONG_KHOP_NGRAM,
+    SO_KET_QUA_TIM_KIEM,
+)
+from .hieu_nang import do_buoc
+from .chuan_hoa import chuan_hoa_text
+from .doc_file import _khoa_noi_dung, _thong_ke_file_tkb
+
+pd = nap_tre("pandas")
+
+
+def uoc_luong_bo_nho(obj):
+    """Ước lượng bộ nhớ (bytes) của obj và mọi phần tử bên trong, mỗi đối tượng chỉ đếm một lần"""
+    da_dem = set()
+    tong = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in da_dem:
+            continue
+        da_dem.add(id(o))
+        tong += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+    return tong
+
+
+# Cột được tổng hợp sẵn (số buổi, số tiết) theo tháng
+_COT_TONG_HOP = ('ten_gv', 'don_vi', 'ten_lop')
+
+
+def _ma_thang(ngay):
+    """Tháng của từng ngày dạng số nguyên (số tháng kể từ 01/1970)"""
+    return ngay.astype('datetime64[M]').astype(np.int64)
+
+
+def _so_tiet_so(so_tiet):
+    """Số tiết dạng số thực (ô không phải số → 0)"""
+    return pd.to_numeric(pd.Series(so_tiet, dtype=object), errors='coerce').fillna(0).to_numpy(dtype=float)
+
+
+def _canh_bao_trung_lich(ten_lop):
+    """Cảnh báo trùng lịch của một buổi (`ten_lop`: các lớp cùng ngày của giảng viên)"""
+    return f"Trùng lịch: cùng ngày dạy {len(ten_lop)} lớp — " + "; ".join(ten_lop)
+
+
+def _canh_bao_qua_tai(tuan, so_tiet):
+    """Cảnh báo quá tải của một buổi (`tuan`: số tuần kể từ 1970, tính từ thứ Hai)"""
+    thu_hai = np.datetime64(tuan * 7 - 3, 'D').astype(datetime)
+    return f"Quá tải: tuần từ {thu_hai:%d/%m/%Y} có {so_tiet:g} tiết (giới hạn {GIOI_HAN_TIET_TUAN:g})"
+
+
+def _gom_trung_lich(bang):
+    """Các buổi trùng lịch (ten_gv, ngay, ten_lop, so_tiet) → một dòng mỗi (giảng viên, ngày)"""
+    return bang.groupby(['ten_gv', 'ngay'], sort=True).agg(
+        so_buoi=('ten_lop', 'size'),
+        so_tiet=('so_tiet', 'sum'),
+        cac_lop=('ten_lop', lambda s: "; ".join(dict.fromkeys(s))),
+    ).reset_index()
+
+
+def _gom_qua_tai(bang):
+    """Các buổi quá tải (ten_gv, tuan_tu, so_tiet) → một dòng mỗi (giảng viên, tuần)"""
+    return bang.groupby(['ten_gv', 'tuan_tu'], sort=True).agg(
+        so_buoi=('so_tiet', 'size'),
+        so_tiet=('so_tiet', 'sum'),
+    ).reset_index()
+
+
+# Cách so khớp bộ lọc với giá trị của từng cột chỉ mục
+_SO_KHOP_BO_LOC = {
+    'ten_gv': lambda loc, v: loc.lower() in v.lower(),
+    'don_vi': lambda loc, v: loc in v,
+    'ten_lop': lambda loc, v: loc.lower() in v.lower(),
+}
+
+
+class ChiMucTimKiem:
+    """
+    Chỉ mục n-gram (DO_DAI_NGRAM ký tự) cho tìm kiếm không dấu, dựng trên các giá trị
+    PHÂN BIỆT đã chuẩn hóa bằng chuan_hoa_text (số giá trị nhỏ hơn nhiều so với số buổi).
+    Tra cứu: gộp posting list các n-gram của từ khóa, đếm bằng bincount → điểm khớp.
+    `cac_gia_tri`: {cột: {giá trị: số buổi}}.
+    """
+    
+    def __init__(self, cac_gia_tri):
+        self._muc = []      # (cột, giá trị, số buổi)
+        self._chuan = []    # Giá trị đã chuẩn hóa (cùng thứ tự _muc)
+        posting = collections.defaultdict(list)
+        for cot, dem in cac_gia_tri.items():
+            for gia_tri, so_buoi in dem.items():
+                chuan = chuan_hoa_text(gia_tri)
+                if not chuan:
+                    continue
+                for ngram in self._cac_ngram(chuan):
+                    posting[ngram].append(len(self._muc))
+                self._muc.append((cot, gia_tri, so_buoi))
+                self._chuan.append(chuan)
+        self._posting = {ngram: np.array(ds, dtype=np.int32) for ngram, ds in posting.items()}
+    
+    @staticmethod
+    def _cac_ngram(chuan):
+        return {chuan[i:i + DO_DAI_NGRAM] for i in range(len(chuan) - DO_DAI_NGRAM + 1)}
+    
+    def __len__(self):
+        return len(self._muc)
+    
+    def tim(self, tu_khoa, gioi_han=None):
+        """
+        Kết quả xếp hạng: [{cot, gia_tri, diem, so_buoi}]. Ưu tiên chứa nguyên từ khóa,
+        rồi tỷ lệ n-gram khớp, bắt đầu bằng từ khóa, giá trị ngắn hơn, nhiều buổi hơn.
+        """
+        gioi_han = gioi_han or SO_KET_QUA_TIM_KIEM
+        chuan = chuan_hoa_text(tu_khoa)
+        if not chuan:
+            return []
+        
+        cac_ngram = self._cac_ngram(chuan)
+        if cac_ngram:
+            cac_posting = [self._posting[g] for g in cac_ngram if g in self._posting]
+            if not cac_posting:
+                return []
+            dem = np.bincount(np.concatenate(cac_posting), minlength=len(self._muc))
+            diem = dem / len(cac_ngram)
+            ung_vien = np.flatnonzero(diem >= NGUONG_KHOP_NGRAM).tolist()
+        else:
+            # Từ khóa ngắn hơn một n-gram: so chuỗi con trên các giá trị
+            ung_vien = [i for i, c in enumerate(self._chuan) if chuan in c]
+            diem = np.ones(len(self._muc))
+        
+        xep_hang = []
+        for i in ung_vien:
+            c = self._chuan[i]
+            chua = chuan in c
+            xep_hang.append((
+                (not chua, -(1.0 if chua else float(diem[i])), not c.startswith(chuan), len(c), -self._muc[i][2]),
+                i, 1.0 if chua else float(diem[i])
+            ))
+        xep_hang.sort()
+        return [
+            {'cot': self._muc[i][0], 'gia_tri': self._muc[i][1], 'diem': d, 'so_buoi': self._muc[i][2]}
+            for _, i, d in xep_hang[:gioi_han]
+        ]
+
+
+def _gom_theo_cot(ket_qua_tim):
+    """Kết quả tìm kiếm → {cột: [giá trị]}"""
+    theo_cot = collections.defaultdict(list)
+    for kq in ket_qua_tim:
+        theo_cot[kq['cot']].append(kq['gia_tri'])
+    return theo_cot
+
+
+def _tach_ma_buoi(ma):
+    """Mã buổi "<hash 16 hex>-<lần lặp>" → (hash, lần lặp); None nếu sai dạng"""
+    khoa, _, lan = ma.partition('-')
+    if len(khoa) != 16 or not lan.isdigit():
+        return None
+    try:
+        return int(khoa, 16), int(lan)
+    except ValueError:
+        return None
+
+
+class KhoSuKien:
+    """
+    Kho buổi dạy dùng chung cho MỌI phiên người dùng (chỉ đọc).
+    Mỗi phiên bản file chỉ tạo một kho (xem lay_kho_su_kien);
+    không sửa dữ liệu sau khi tạo.
+    
+    Lưu dạng cột: mỗi cột chuỗi = mảng mã (numpy int32, -1 là trống)
+    + danh sách giá trị phân biệt (interned); ngày là mảng datetime64[D].
+    Calendar chỉ nhận id/title/ngày/màu (payload), chi tiết lấy theo id (chi_tiet).
+    Lọc theo giảng viên / đơn vị / lớp = giao các mặt nạ trên mảng mã.
+    Tổng hợp số buổi / số tiết theo (giảng viên | đơn vị | lớp) × tháng
+    tính sẵn một lần (mảng 2 chiều), cập nhật tăng dần cùng dữ liệu.
+    Xung đột lịch (trùng lịch / quá tải tuần) đánh dấu theo từng buổi,
+    cập nhật lại chỉ cho các giảng viên có buổi thay đổi.
+    """
+    
+    def __init__(self, filepath, phien_ban, ket_qua):
+        self.filepath = filepath
+        self.phien_ban = phien_ban
+        self.thong_ke = {k: v for k, v in ket_qua.items() if k != 'bang'}
+        self._bo_nho = None
+        # Kho tạm khi đang nạp theo khối (xem BoNapTheoKhoi)
+        self.hoan_tat = True
+        self.tien_do = None
+        
+        with do_buoc('tao_kho', so_dong=len(ket_qua['bang'])):
+            self._tao_chi_muc(ket_qua['bang'])
+    
+    def _tao_chi_muc(self, bang):
+        self._n = len(bang)
+        self._ngay = bang['ngay'].to_numpy().astype('datetime64[D]')
+        self._so_tiet = bang['so_tiet'].to_numpy(dtype=object)
+        
+        # Cột chuỗi: cột → (mảng mã theo từng buổi, danh sách giá trị phân biệt)
+        self._cot = {}
+        for cot in _COT_CHUOI_BANG:
+            cat = bang[cot].astype('category')
+            self._cot[cot] = (
+                cat.cat.codes.to_numpy().astype(np.int32),
+                [sys.intern(v) if isinstance(v, str) else v for v in cat.cat.categories],
+            )
+        # Hash nội dung từng dòng (so sánh khi cập nhật tăng dần)
+        self._khoa_dong = _khoa_noi_dung(bang)
+        
+        # Chỉ mục ngày: thứ tự buổi theo ngày + mảng ngày đã sắp xếp (tìm nhị phân)
+        self._thu_tu_ngay = np.argsort(self._ngay, kind='stable')
+        self._ngay_sap_xep = self._ngay[self._thu_tu_ngay]
+        self._tao_tong_hop()
+        self._trung_lich, self._qua_tai = self._kiem_tra_xung_dot(np.arange(self._n))
+        self._tao_bang_phu()
+    
+    def _kiem_tra_xung_dot(self, ids):
+        """
+        Kiểm tra xung đột cho các buổi `ids` (phải gồm MỌI buổi của các giảng viên liên quan).
+        Sắp xếp một lần theo (giảng viên, ngày, lớp) — O(n log n) — rồi xét theo nhóm liền kề:
+        - trùng lịch: cùng giảng viên, cùng ngày, từ 2 lớp khác nhau trở lên
+        - quá tải: tổng số tiết của giảng viên trong tuần (thứ Hai → Chủ nhật) > GIOI_HAN_TIET_TUAN
+        Trả về (trùng lịch, quá tải): hai mảng bool theo thứ tự `ids`.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        trung = np.zeros(len(ids), dtype=bool)
+        qua_tai = np.zeros(len(ids), dtype=bool)
+        if not len(ids):
+            return trung, qua_tai
+        
+        gv = self._cot['ten_gv'][0][ids]
+        lop = self._cot['ten_lop'][0][ids]
+        ngay = self._ngay[ids].astype(np.int64)
+        thu_tu = np.lexsort((lop, ngay, gv))
+        gv, lop, ngay = gv[thu_tu], lop[thu_tu], ngay[thu_tu]
+        
+        doi_gv = np.r_[True, gv[1:] != gv[:-1]]
+        # Nhóm (giảng viên, ngày): đếm số lớp khác nhau trong nhóm
+        nhom_ngay = np.cumsum(doi_gv | np.r_[True, ngay[1:] != ngay[:-1]]) - 1
+        lop_moi = np.r_[True, (nhom_ngay[1:] != nhom_ngay[:-1]) | (lop[1:] != lop[:-1])]
+        so_lop = np.bincount(nhom_ngay, weights=lop_moi)
+        trung[thu_tu] = so_lop[nhom_ngay] > 1
+        
+        # Nhóm (giảng viên, tuần): 01/01/1970 là thứ Năm → +3 để tuần bắt đầu từ thứ Hai
+        tuan = (ngay + 3) // 7
+        nhom_tuan = np.cumsum(doi_gv | np.r_[True, tuan[1:] != tuan[:-1]]) - 1
+        tong_tiet = np.bincount(nhom_tuan, weights=_so_tiet_so(self._so_tiet[ids][thu_tu]))
+        qua_tai[thu_tu] = tong_tiet[nhom_tuan] > GIOI_HAN_TIET_TUAN
+        return trung, qua_tai
+    
+    def _cap_nhat_xung_dot(self, moi, giu, xoa_ids, so_giu):
+        """Xung đột của kho mới: giữ kết quả cũ, chỉ kiểm tra lại giảng viên có buổi bị xóa/thêm"""
+        so_them = moi._n - so_giu
+        moi._trung_lich = np.concatenate([self._trung_lich[giu], np.zeros(so_them, dtype=bool)])
+        moi._qua_tai = np.concatenate([self._qua_tai[giu], np.zeros(so_them, dtype=bool)])
+        
+        # Mã giảng viên cũ giữ nguyên trong kho mới (giá trị mới nối vào cuối)
+        gv_doi = np.union1d(self._cot['ten_gv'][0][xoa_ids], moi._cot['ten_gv'][0][so_giu:])
+        ids = np.flatnonzero(np.isin(moi._cot['ten_gv'][0], gv_doi))
+        moi._trung_lich[ids], moi._qua_tai[ids] = moi._kiem_tra_xung_dot(ids)
+    
+    def _tao_tong_hop(self):
+        """Tổng hợp theo tháng: cột → (số buổi, số tiết), mỗi mảng [mã giá trị × tháng]"""
+        thang = _ma_thang(self._ngay)
+        thang0 = int(thang.min()) if self._n else 0
+        so_thang = int(thang.max()) - thang0 + 1 if self._n else 0
+        tiet = _so_tiet_so(self._so_tiet)
+        
+        self._tong_hop = {'thang0': thang0, 'so_thang': so_thang}
+        for cot in _COT_TONG_HOP:
+            ma, gia_tri = self._cot[cot]
+            co = ma >= 0
+            o = ma[co].astype(np.int64) * so_thang + (thang[co] - thang0)
+            so_o = len(gia_tri) * so_thang
+            self._tong_hop[cot] = (
+                np.bincount(o, minlength=so_o).reshape(len(gia_tri), so_thang),
+                np.bincount(o, weights=tiet[co], minlength=so_o).reshape(len(gia_tri), so_thang),
+            )
+    
+    def _cap_nhat_tong_hop(self, moi, xoa_ids, so_giu):
+        """
+        Tổng hợp của kho mới `moi` từ tổng hợp của kho này: trừ các buổi bị xóa,
+        cộng các buổi thêm (cuối kho mới), không duyệt lại toàn bộ dữ liệu.
+        """
+        if not self._n or not moi._n:
+            moi._tao_tong_hop()
+            return
+        
+        cu = self._tong_hop
+        thang_xoa = _ma_thang(self._ngay[xoa_ids])
+        tiet_xoa = _so_tiet_so(self._so_tiet[xoa_ids])
+        thang_them = _ma_thang(moi._ngay[so_giu:])
+        tiet_them = _so_tiet_so(moi._so_tiet[so_giu:])
+        
+        # Trục tháng chỉ mở rộng (tháng trống bị ẩn khi hiển thị)
+        thang0 = cu['thang0']
+        thang_cuoi = thang0 + cu['so_thang'] - 1
+        if len(thang_them):
+            thang0 = min(thang0, int(thang_them.min()))
+            thang_cuoi = max(thang_cuoi, int(thang_them.max()))
+        so_thang = thang_cuoi - thang0 + 1
+        lech = cu['thang0'] - thang0
+        
+        moi._tong_hop = {'thang0': thang0, 'so_thang': so_thang}
+        for cot in _COT_TONG_HOP:
+            so_gia_tri = len(moi._cot[cot][1])
+            ket_qua = []
+            for mang_cu, (ma_xoa, gia_tri_xoa), (ma_them, gia_tri_them) in zip(
+                cu[cot],
+                ((self._cot[cot][0][xoa_ids], np.ones(len(xoa_ids), dtype=np.int64)), (self._cot[cot][0][xoa_ids], tiet_xoa)),
+                ((moi._cot[cot][0][so_giu:], np.ones(len(thang_them), dtype=np.int64)), (moi._cot[cot][0][so_giu:], tiet_them)),
+            ):
+                # Giá trị mới thêm vào cuối danh sách → thêm dòng; tháng mới → thêm cột
+                mang = np.zeros((so_gia_tri, so_thang), dtype=mang_cu.dtype)
+                mang[:mang_cu.shape[0], lech:lech + mang_cu.shape[1]] = mang_cu
+                co = ma_xoa >= 0
+                np.subtract.at(mang, (ma_xoa[co], thang_xoa[co] - thang0), gia_tri_xoa[co])
+                co = ma_them >= 0
+                np.add.at(mang, (ma_them[co], thang_them[co] - thang0), gia_tri_them[co])
+                ket_qua.append(mang)
+            moi._tong_hop[cot] = tuple(ket_qua)
+    
+    def _tao_bang_phu(self):
+        """Các bảng phụ suy ra từ danh sách giá trị (màu, tên viết tắt, cache lọc/title)"""
+        # (cột, giá trị lọc) → các mã khớp, ghi nhớ giữa các lần rerun
+        self._ma_khop_cache = {}
+        # (mã giảng viên, mã đơn vị) → title hiển thị
+        self._title_cache = {}
+        # cột → danh sách giá trị đang được dùng (cho dropdown)
+        self._danh_sach_cache = {}
+        # (cột, chỉ số, năm) → bảng tổng hợp theo tháng
+        self._bang_tong_hop_cache = {}
+        # Báo cáo xung đột (tính khi cần)
+        self._bao_cao_cache = {}
+        # Chỉ mục tìm kiếm (dựng lần đầu có người tìm, một lần cho mỗi phiên bản dữ liệu)
+        self._chi_muc_tim_kiem = None
+        # Số lần nội dung mỗi buổi đã xuất hiện ở các dòng trước (cho mã buổi, tính khi cần)
+        self._lan_khoa = None
+        
+        # Màu và tên viết tắt theo mã đơn vị
+        don_vi = self._cot['don_vi'][1]
+        self._mau_don_vi = [DON_VI_COLORS.get(dv, "#808080") for dv in don_vi]
+        self._ngan_don_vi = [DON_VI_SHORT.get(dv, dv[:10] if dv else "") for dv in don_vi]
+    
+    def ap_dung_thay_doi(self, phien_ban, xoa_ids, bang_them, thong_ke):
+        """
+        Tạo kho mới = kho này bỏ các buổi `xoa_ids` + các buổi trong `bang_them`
+        (cuối danh sách). Chỉ xử lý phần thay đổi: danh sách giá trị chỉ thêm giá trị mới,
+        chỉ mục ngày được trộn (tìm nhị phân) thay vì sắp xếp lại.
+        `thong_ke`: invalid_dates, total_rows của phiên bản mới.
+        """
+        giu = np.ones(self._n, dtype=bool)
+        giu[xoa_ids] = False
+        so_giu = int(giu.sum())
+        
+        moi = object.__new__(KhoSuKien)
+        moi.filepath = self.filepath
+        moi.phien_ban = phien_ban
+        moi._bo_nho = None
+        moi.hoan_tat = True
+        moi.tien_do = None
+        moi._n = so_giu + len(bang_them)
+        
+        ngay_them = bang_them['ngay'].to_numpy().astype('datetime64[D]')
+        moi._ngay = np.concatenate([self._ngay[giu], ngay_them])
+        moi._so_tiet = np.concatenate([self._so_tiet[giu], bang_them['so_tiet'].to_numpy(dtype=object)])
+        moi._khoa_dong = np.concatenate([self._khoa_dong[giu], _khoa_noi_dung(bang_them)])
+        
+        # Cột chuỗi: giữ mã cũ, giá trị mới nối vào cuối danh sách
+        moi._cot = {}
+        for cot, (ma, gia_tri) in self._cot.items():
+            gia_tri = list(gia_tri)
+            vi_tri = {v: i for i, v in enumerate(gia_tri)}
+            ma_them_cat, gia_tri_them = pd.factorize(bang_them[cot].astype(object))
+            anh_xa = []
+            for v in gia_tri_them:
+                if v not in vi_tri:
+                    vi_tri[v] = len(gia_tri)
+                    gia_tri.append(sys.intern(v) if isinstance(v, str) else v)
+                anh_xa.append(vi_tri[v])
+            anh_xa = np.array(anh_xa + [-1], dtype=np.int32)  # mã -1 (trống) giữ nguyên
+            moi._cot[cot] = (np.concatenate([ma[giu], anh_xa[ma_them_cat]]), gia_tri)
+        
+        # Chỉ mục ngày: bỏ buổi đã xóa, đánh lại số, chèn buổi mới vào đúng chỗ
+        con_lai = giu[self._thu_tu_ngay]
+        id_moi = np.cumsum(giu) - 1
+        thu_tu = id_moi[self._thu_tu_ngay[con_lai]]
+        ngay_sap_xep = self._ngay_sap_xep[con_lai]
+        thu_tu_them = np.argsort(ngay_them, kind='stable')
+        vi_tri_chen = np.searchsorted(ngay_sap_xep, ngay_them[thu_tu_them], side='right')
+        moi._thu_tu_ngay = np.insert(thu_tu, vi_tri_chen, so_giu + thu_tu_them)
+        moi._ngay_sap_xep = np.insert(ngay_sap_xep, vi_tri_chen, ngay_them[thu_tu_them])
+        self._cap_nhat_tong_hop(moi, xoa_ids, so_giu)
+        self._cap_nhat_xung_dot(moi, giu, xoa_ids, so_giu)
+        moi._tao_bang_phu()
+        
+        # Thống kê file TKB theo lớp tính lại trên bảng mới (vectorized)
+        moi.thong_ke = {
+            **thong_ke,
+            **_thong_ke_file_tkb(moi.bang()),
+            'so_them': len(bang_them),
+            'so_xoa': len(self) - so_giu,
+        }
+        return moi
+    
+    def bang(self):
+        """Dựng lại bảng dạng cột (DataFrame, chuỗi dạng category) từ các mảng của kho"""
+        bang = pd.DataFrame({'ngay': self._ngay.astype('datetime64[ns]'), 'so_tiet': self._so_tiet})
+        for cot, (ma, gia_tri) in self._cot.items():
+            bang[cot] = pd.Categorical.from_codes(ma, categories=pd.Index(gia_tri, dtype=object))
+        return bang
+    
+    def ket_qua(self):
+        """Kết quả dạng xay_dung_events (để ghi cache đĩa)"""
+        return {'bang': self.bang(), **self.thong_ke}
+    
+    def __len__(self):
+        return self._n
+    
+    def _gia_tri(self, cot, i):
+        """Giá trị cột chuỗi của buổi i (None nếu trống)"""
+        ma, gia_tri = self._cot[cot]
+        return gia_tri[ma[i]] if ma[i] >= 0 else None
+    
+    def danh_sach(self, cot):
+        """Danh sách giá trị phân biệt đang có buổi dạy (đã sắp xếp, bỏ rỗng) của một cột chuỗi"""
+        if cot not in self._danh_sach_cache:
+            ma, gia_tri = self._cot[cot]
+            dang_dung = np.bincount(ma[ma >= 0], minlength=len(gia_tri)) > 0
+            self._danh_sach_cache[cot] = sorted(v for v, co in zip(gia_tri, dang_dung) if co and v)
+        return self._danh_sach_cache[cot]
+    
+    def _ma_khop(self, cot, gia_tri_loc):
+        """Các mã của cột có giá trị khớp bộ lọc (so trên giá trị phân biệt, không trên từng buổi)"""
+        khoa = (cot, gia_tri_loc)
+        ma_khop = self._ma_khop_cache.get(khoa)
+        if ma_khop is None:
+            so_khop = _SO_KHOP_BO_LOC[cot]
+            ma_khop = np.array(
+                [i for i, v in enumerate(self._cot[cot][1]) if so_khop(gia_tri_loc, v)],
+                dtype=np.int32
+            )
+            self._ma_khop_cache[khoa] = ma_khop
+        return ma_khop
+    
+    def loc(self, filter_gv=None, filter_don_vi=None, filter_lop=None):
+        """Trả về mảng chỉ số các buổi thỏa bộ lọc (giao các chỉ mục)"""
+        mask = None
+        for cot, gia_tri_loc in (('ten_gv', filter_gv), ('don_vi', filter_don_vi), ('ten_lop', filter_lop)):
+            if not gia_tri_loc or gia_tri_loc == "Tất cả":
+                continue
+            m = np.isin(self._cot[cot][0], self._ma_khop(cot, gia_tri_loc))
+            mask = m if mask is None else mask & m
+        
+        if mask is None:
+            return np.arange(self._n)
+        return np.flatnonzero(mask)
+    
+    def trong_khoang(self, bat_dau, ket_thuc, ids=None):
+        """
+        Chỉ số các buổi có ngày trong [bat_dau, ket_thuc), theo thứ tự ngày.
+        Tìm nhị phân trên chỉ mục ngày; `ids` (kết quả loc) để giữ lại các buổi đã lọc.
+        """
+        lo, hi = np.searchsorted(
+            self._ngay_sap_xep,
+            [np.datetime64(bat_dau, 'D'), np.datetime64(ket_thuc, 'D')]
+        )
+        ket_qua = self._thu_tu_ngay[lo:hi]
+        if ids is not None and len(ids) < self._n:
+            mask = np.zeros(self._n, dtype=bool)
+            mask[ids] = True
+            ket_qua = ket_qua[mask[ket_qua]]
+        return ket_qua
+    
+    def _title(self, ma_gv, ma_dv):
+        """Title hiển thị trên calendar: "[đơn vị viết tắt] giảng viên" """
+        khoa = (ma_gv, ma_dv)
+        title = self._title_cache.get(khoa)
+        if title is None:
+            ten_gv = self._cot['ten_gv'][1][ma_gv]
+            ngan = self._ngan_don_vi[ma_dv] if ma_dv >= 0 else ""
+            title = f"[{ngan}] {ten_gv}" if ngan else ten_gv
+            self._title_cache[khoa] = title
+        return title
+    
+    def payload(self, ids):
+        """Events gọn gửi cho calendar: chỉ id, title, ngày, màu (buổi có xung đột: title có ⚠️)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        ma_gv = self._cot['ten_gv'][0][ids].tolist()
+        ma_dv = self._cot['don_vi'][0][ids].tolist()
+        ngay = np.datetime_as_string(self._ngay[ids]).tolist()
+        canh_bao = (self._trung_lich[ids] | self._qua_tai[ids]).tolist()
+        return [
+            {
+                "id": str(i),
+                "title": "⚠️ " + self._title(g, d) if cb else self._title(g, d),
+                "start": start,
+                "color": self._mau_don_vi[d] if d >= 0 else "#808080",
+            }
+            for i, g, d, start, cb in zip(ids.tolist(), ma_gv, ma_dv, ngay, canh_bao)
+        ]
+    
+    def canh_bao(self, i):
+        """Các cảnh báo xung đột của buổi i (chuỗi hiển thị; rỗng nếu không có)"""
+        if not 0 <= i < self._n:
+            return []
+        ket_qua = []
+        cung_gv = self._cot['ten_gv'][0] == self._cot['ten_gv'][0][i]
+        if self._trung_lich[i]:
+            ma_lop = np.unique(self._cot['ten_lop'][0][cung_gv & (self._ngay == self._ngay[i])])
+            ten_lop = [self._cot['ten_lop'][1][m] for m in ma_lop if m >= 0]
+            ket_qua.append(_canh_bao_trung_lich(ten_lop))
+        if self._qua_tai[i]:
+            tuan = (self._ngay.astype(np.int64) + 3) // 7
+            cung_tuan = cung_gv & (tuan == tuan[i])
+            ket_qua.append(_canh_bao_qua_tai(int(tuan[i]), _so_tiet_so(self._so_tiet[cung_tuan]).sum()))
+        return ket_qua
+    
+    def bao_cao_trung_lich(self):
+        """Bảng trùng lịch: mỗi dòng một (giảng viên, ngày) dạy từ 2 lớp trở lên"""
+        if 'trung_lich' not in self._bao_cao_cache:
+            ids = np.flatnonzero(self._trung_lich)
+            bang = pd.DataFrame({
+                'ten_gv': [self._cot['ten_gv'][1][m] for m in self._cot['ten_gv'][0][ids]],
+                'ngay': self._ngay[ids].astype('datetime64[ns]'),
+                'ten_lop': [self._gia_tri('ten_lop', i) or '' for i in ids],
+                'so_tiet': _so_tiet_so(self._so_tiet[ids]),
+            })
+            self._bao_cao_cache['trung_lich'] = _gom_trung_lich(bang)
+        return self._bao_cao_cache['trung_lich']
+    
+    def bao_cao_qua_tai(self):
+        """Bảng quá tải: mỗi dòng một (giảng viên, tuần) vượt GIOI_HAN_TIET_TUAN tiết"""
+        if 'qua_tai' not in self._bao_cao_cache:
+            ids = np.flatnonzero(self._qua_tai)
+            tuan = (self._ngay[ids].astype(np.int64) + 3) // 7
+            bang = pd.DataFrame({
+                'ten_gv': [self._cot['ten_gv'][1][m] for m in self._cot['ten_gv'][0][ids]],
+                'tuan_tu': (tuan * 7 - 3).astype('datetime64[D]').astype('datetime64[ns]'),
+                'so_tiet': _so_tiet_so(self._so_tiet[ids]),
+            })
+            self._bao_cao_cache['qua_tai'] = _gom_qua_tai(bang)
+        return self._bao_cao_cache['qua_tai']
+    
+    def chi_tiet(self, i):
+        """Chi tiết một buổi (dạng extendedProps cũ) theo id; None nếu id không hợp lệ"""
+        if not 0 <= i < self._n:
+            return None
+        so_tiet = self._so_tiet[i]
+        return {
+            "ten_gv": self._gia_tri('ten_gv', i),
+            "ten_lop": self._gia_tri('ten_lop', i),
+            "ma_lop": self._gia_tri('ma_lop', i),
+            "ten_chuyen_de": self._gia_tri('ten_chuyen_de', i),
+            "so_tiet": so_tiet.item() if isinstance(so_tiet, np.generic) else so_tiet,
+            "don_vi": self._gia_tri('don_vi', i),
+            "tro_giang": self._gia_tri('tro_giang', i),
+            "don_vi_tg": self._gia_tri('don_vi_tg', i),
+            "file_goc": self._gia_tri('file_goc', i),
+            "ngay_str": self._ngay[i].astype(datetime).strftime("%d/%m/%Y"),
+        }
+    
+    def lay(self, ids):
+        """Events đầy đủ (title, màu, extendedProps) theo mảng chỉ số"""
+        events = []
+        for event in self.payload(ids):
+            color = event.pop("color")
+            event.update({
+                "end": event["start"],
+                "backgroundColor": color,
+                "borderColor": color,
+                "extendedProps": self.chi_tiet(int(event["id"])),
+            })
+            events.append(event)
+        return events
+    
+    def tong_theo(self, cot, ids=None):
+        """
+        Số buổi và số tiết theo giá trị của cột trên tập chỉ số đã lọc:
+        {giá trị: (số buổi, số tiết)}. Không lọc → đọc thẳng từ tổng hợp sẵn.
+        """
+        ma, gia_tri = self._cot[cot]
+        if (ids is None or len(ids) == self._n) and cot in self._tong_hop:
+            buoi, tiet = self._tong_hop[cot]
+            dem, tong_tiet = buoi.sum(axis=1), tiet.sum(axis=1)
+        else:
+            if ids is None:
+                ids = slice(None)  # Cột không có tổng hợp sẵn (vd. cột tìm kiếm): mọi buổi
+            ma = ma[ids]
+            co = ma >= 0
+            dem = np.bincount(ma[co], minlength=len(gia_tri))
+            tong_tiet = np.bincount(
+                ma[co], weights=_so_tiet_so(self._so_tiet[ids][co]), minlength=len(gia_tri)
+            )
+        return {gia_tri[i]: (int(dem[i]), float(tong_tiet[i])) for i in np.flatnonzero(dem)}
+    
+    def chi_muc_tim_kiem(self):
+        """Chỉ mục n-gram trên các cột COT_TIM_KIEM của kho (dựng một lần)"""
+        if self._chi_muc_tim_kiem is None:
+            with do_buoc('chi_muc_tim_kiem'):
+                self._chi_muc_tim_kiem = ChiMucTimKiem({
+                    cot: {v: buoi for v, (buoi, _) in self.tong_theo(cot).items()} for cot in COT_TIM_KIEM
+                })
+        return self._chi_muc_tim_kiem
+    
+    def tim_kiem(self, tu_khoa, gioi_han=None):
+        """Tìm không dấu: [{cot, gia_tri, diem, so_buoi}] xếp hạng (xem ChiMucTimKiem.tim)"""
+        return self.chi_muc_tim_kiem().tim(tu_khoa, gioi_han)
+    
+    def loc_theo_tim_kiem(self, ids, ket_qua_tim):
+        """Giữ lại các buổi trong `ids` có ít nhất một cột khớp một kết quả tìm kiếm"""
+        mask = np.zeros(self._n, dtype=bool)
+        for cot, cac_gia_tri in _gom_theo_cot(ket_qua_tim).items():
+            ma, gia_tri = self._cot[cot]
+            can_tim = set(cac_gia_tri)
+            mask |= np.isin(ma, [i for i, v in enumerate(gia_tri) if v in can_tim])
+        ids = np.asarray(ids, dtype=np.int64)
+        return ids[mask[ids]]
+    
+    def nhom_theo(self, cot):
+        """
+        Các buổi theo từng giá trị của cột: [(giá trị, mảng chỉ số theo thứ tự ngày)].
+        Một lần sắp xếp ổn định trên chỉ mục ngày (O(n log n)), bỏ buổi có giá trị trống.
+        """
+        ma, gia_tri = self._cot[cot]
+        ids = self._thu_tu_ngay[np.argsort(ma[self._thu_tu_ngay], kind='stable')]
+        ma_sap_xep = ma[ids]
+        ranh_gioi = np.flatnonzero(np.diff(ma_sap_xep)) + 1
+        return [
+            (gia_tri[nhom_ma[0]], nhom)
+            for nhom, nhom_ma in zip(np.split(ids, ranh_gioi), np.split(ma_sap_xep, ranh_gioi))
+            if len(nhom) and nhom_ma[0] >= 0 and gia_tri[nhom_ma[0]]
+        ]
+    
+    def cac_lop(self):
+        """Các lớp (mã lớp, tên lớp) phân biệt, theo thứ tự xuất hiện"""
+        ma = np.stack([self._cot['ma_lop'][0], self._cot['ten_lop'][0]], axis=1)
+        _, dau = np.unique(ma, axis=0, return_index=True)
+        return [
+            (self._gia_tri('ma_lop', i), self._gia_tri('ten_lop', i))
+            for i in np.sort(dau).tolist()
+        ]
+    
+    def gia_tri_cot(self, cot, ids):
+        """Giá trị cột chuỗi của các buổi (mảng object, None nếu trống)"""
+        ma, gia_tri = self._cot[cot]
+        # Mã -1 (trống) trỏ vào phần tử None thêm ở cuối
+        return np.append(np.asarray(gia_tri, dtype=object), None)[ma[np.asarray(ids, dtype=np.int64)]]
+    
+    def khoa_dong(self, ids):
+        """Hash nội dung (uint64) của các buổi — không đổi khi nội dung buổi không đổi"""
+        return self._khoa_dong[np.asarray(ids, dtype=np.int64)]
+    
+    def ma_buoi(self, ids):
+        """
+        Mã ổn định của các buổi: hash nội dung + số lần lặp ("<16 hex>-<lần>", như UID ICS).
+        Khác chỉ số dòng, mã không đổi khi kho được cập nhật tăng dần hay file bị sắp xếp lại.
+        """
+        if self._lan_khoa is None:
+            self._lan_khoa = pd.Series(self._khoa_dong).groupby(self._khoa_dong).cumcount().to_numpy()
+        ids = np.asarray(ids, dtype=np.int64)
+        return [f"{k:016x}-{lan}" for k, lan in zip(self._khoa_dong[ids].tolist(), self._lan_khoa[ids].tolist())]
+    
+    def tim_buoi(self, ma):
+        """Chỉ số buổi theo mã (xem ma_buoi); None nếu không có"""
+        tach = _tach_ma_buoi(ma)
+        if tach is None:
+            return None
+        cung_noi_dung = np.flatnonzero(self._khoa_dong == np.uint64(tach[0]))
+        return int(cung_noi_dung[tach[1]]) if tach[1] < len(cung_noi_dung) else None
+    
+    def cac_nam(self):
+        """Các năm có buổi dạy (tăng dần)"""
+        buoi = self._tong_hop['ten_gv'][0].sum(axis=0)
+        thang = np.flatnonzero(buoi) + self._tong_hop['thang0']
+        return sorted(set((thang // 12 + 1970).tolist()))
+    
+    def bang_tong_hop(self, cot, chi_so='so_tiet', nam=None):
+        """
+        Bảng tổng hợp theo tháng (tính từ mảng tổng hợp sẵn, ghi nhớ theo tham số):
+        dòng = giá trị của cột, cột = tháng "MM/YYYY" + "Tổng"; chỉ giữ dòng/tháng có buổi dạy.
+        `chi_so`: 'so_tiet' hoặc 'so_buoi'; `nam`: chỉ lấy một năm.
+        """
+        khoa = (cot, chi_so, nam)
+        if khoa in self._bang_tong_hop_cache:
+            return self._bang_tong_hop_cache[khoa]
+        
+        buoi, tiet = self._tong_hop[cot]
+        thang = np.arange(self._tong_hop['so_thang']) + self._tong_hop['thang0']
+        chon_thang = buoi.sum(axis=0) > 0
+        if nam is not None:
+            chon_thang &= (thang // 12 + 1970) == nam
+        buoi = buoi[:, chon_thang]
+        chon_dong = np.flatnonzero(buoi.sum(axis=1) > 0)
+        du_lieu = (tiet[:, chon_thang] if chi_so == 'so_tiet' else buoi)[chon_dong]
+        
+        gia_tri = self._cot[cot][1]
+        bang = pd.DataFrame(
+            du_lieu.round(2) if chi_so == 'so_tiet' else du_lieu,
+            index=pd.Index([gia_tri[i] or "(trống)" for i in chon_dong]),
+            columns=[f"{m % 12 + 1:02d}/{m // 12 + 1970}" for m in thang[chon_thang]],
+        )
+        bang['Tổng'] = bang.sum(axis=1)
+        bang = bang.sort_values('Tổng', ascending=False)
+        self._bang_tong_hop_cache[khoa] = bang
+        return bang
+    
+    def bo_nho(self):
+        """Số liệu bộ nhớ của kho (tính một lần, lần sau dùng lại)"""
+        if self._bo_nho is None:
+            self._bo_nho = {
+                'so_su_kien': self._n,
+                'cot_bytes': (
+                    self._ngay.nbytes + self._so_tiet.nbytes
+                    + sum(ma.nbytes for ma, _ in self._cot.values())
+                ),
+                'gia_tri_bytes': uoc_luong_bo_nho([gia_tri for _, gia_tri in self._cot.values()]),
+                'chi_muc_bytes': self._thu_tu_ngay.nbytes + self._ngay_sap_xep.nbytes
+                + self._trung_lich.nbytes + self._qua_tai.nbytes + sum(
+                    mang.nbytes for cot in _COT_TONG_HOP for mang in self._tong_hop[cot]
+                ),
+                'thong_ke_bytes': uoc_luong_bo_nho(self.thong_ke),
+            }
+            self._bo_nho['tong_bytes'] = sum(self._bo_nho[k] for k in (
+                'cot_bytes', 'gia_tri_bytes', 'chi_muc_bytes', 'thong_ke_bytes'
+            ))
+        return self._bo_nho
@@ -0,0 +1,596 @@
+"""Kho sự kiện trên SQLite (tùy chọn): cùng giao diện với KhoSuKien, truy vấn qua chỉ mục SQL"""
+
+import os
+import contextlib
+import itertools
+import json
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from ._nap_tre import nap_tre
+from .cau_hinh import (
+    _COT_CHUOI_BANG,
+    COT_TIM_KIEM,
+    DON_VI_COLORS,
+    DON_VI_SHORT,
+    GIOI_HAN_TIET_TUAN,
+    SO_KET_NOI_SQLITE_RANH,
+)
+from .cache import thu_muc_rieng
+from .hieu_nang import do_buoc
+from .doc_file import _khoa_noi_dung
+from .kho import (
+    _canh_bao_qua_tai,
+    _canh_bao_trung_lich,
+    ChiMucTimKiem,
+    _COT_TONG_HOP,
+    _gom_qua_tai,
+    _gom_theo_cot,
+    _gom_trung_lich,
+    _ma_thang,
+    _SO_KHOP_BO_LOC,
+    _so_tiet_so,
+    _tach_ma_buoi,
+    uoc_luong_bo_nho,
+)
+
+pd = nap_tre("pandas")
+
+_LUOC_DO_SQLITE = """
+CREATE TABLE IF NOT EXISTS nguon (
+    id INTEGER PRIMARY KEY,
+    ten TEXT UNIQUE NOT NULL,   -- đường dẫn file ThongKeTKB (gộp nhiều file: nối bằng xuống dòng)
+    phien_ban TEXT,             -- repr(phien_ban) của lần nhập gần nhất
+    so_buoi INTEGER,
+    thong_ke BLOB               -- pickle thống kê file TKB / ngày lỗi của lần nhập
+);
+CREATE TABLE IF NOT EXISTS buoi (
+    id INTEGER PRIMARY KEY,
+    nguon INTEGER NOT NULL,
+    ngay INTEGER NOT NULL,      -- số ngày kể từ 01/01/1970 (như datetime64[D])
+    thang INTEGER NOT NULL,     -- số tháng kể từ 01/1970
+    so_tiet,                    -- giá trị gốc trong file (số hoặc chuỗi)
+    tiet REAL NOT NULL,         -- số tiết dạng số (ô không phải số → 0)
+    ten_gv TEXT, ten_lop TEXT, ma_lop TEXT, ten_chuyen_de TEXT,
+    don_vi TEXT, tro_giang TEXT, don_vi_tg TEXT, file_goc TEXT,
+    trung_lich INTEGER NOT NULL DEFAULT 0,
+    qua_tai INTEGER NOT NULL DEFAULT 0,
+    khoa TEXT                   -- hash nội dung buổi (16 hex, như KhoSuKien.khoa_dong)
+);
+CREATE INDEX IF NOT EXISTS buoi_ngay ON buoi (nguon, ngay);
+CREATE INDEX IF NOT EXISTS buoi_gv ON buoi (nguon, ten_gv, ngay);
+CREATE INDEX IF NOT EXISTS buoi_don_vi ON buoi (nguon, don_vi, ngay);
+CREATE INDEX IF NOT EXISTS buoi_ten_lop ON buoi (nguon, ten_lop, ngay);
+CREATE INDEX IF NOT EXISTS buoi_ma_lop ON buoi (nguon, ma_lop);
+CREATE INDEX IF NOT EXISTS buoi_xung_dot ON buoi (nguon) WHERE trung_lich OR qua_tai;
+-- Tổng hợp số buổi / số tiết theo (cột, giá trị, tháng), tính một lần khi nhập
+CREATE TABLE IF NOT EXISTS tong_hop (
+    nguon INTEGER NOT NULL,
+    cot TEXT NOT NULL,
+    gia_tri TEXT NOT NULL,
+    thang INTEGER NOT NULL,
+    so_buoi INTEGER NOT NULL,
+    so_tiet REAL NOT NULL,
+    PRIMARY KEY (nguon, cot, gia_tri, thang)
+) WITHOUT ROWID;
+-- Có/thiếu file TKB theo lớp (mỗi lớp, mỗi file gốc một dòng), tính một lần khi nhập
+CREATE TABLE IF NOT EXISTS lop_tkb (
+    nguon INTEGER NOT NULL,
+    ma_lop TEXT, ten_lop TEXT,
+    file_goc TEXT,              -- NULL: không tìm thấy file TKB
+    so_buoi INTEGER NOT NULL,
+    ten_gv TEXT,                -- các giảng viên phân biệt, nối bằng dấu phẩy
+    ngay_dau INTEGER, ngay_cuoi INTEGER
+);
+CREATE INDEX IF NOT EXISTS lop_tkb_nguon ON lop_tkb (nguon);
+"""
+
+_COT_BUOI_SQL = ('nguon', 'ngay', 'thang', 'so_tiet', 'tiet') + _COT_CHUOI_BANG + ('khoa',)
+_khoa_ket_noi = threading.Lock()
+_ket_noi_ranh = {}      # (pid, db) → các kết nối đang rảnh
+_db_da_tao_bang = set()  # (pid, db) đã tạo bảng/chỉ mục
+
+
+def _mo_ket_noi(db_path, khoa):
+    """
+    Mở kết nối mới; bảng/chỉ mục (và chế độ WAL: đọc không chặn ghi) chỉ tạo một lần mỗi db.
+    Thư mục db phải thuộc người dùng hiện tại (bảng nguon chứa pickle thống kê).
+    """
+    thu_muc_rieng(os.path.dirname(os.path.abspath(db_path)))
+    # isolation_level=None: tự quản lý giao dịch (BEGIN IMMEDIATE ... COMMIT)
+    # check_same_thread=False: kết nối rảnh được luồng khác mượn lại (mỗi lúc một luồng)
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if khoa not in _db_da_tao_bang:
+        conn.execute("PRAGMA journal_mode=WAL")
+        co_lop_tkb = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'lop_tkb'").fetchone() is not None
+        conn.executescript(_LUOC_DO_SQLITE)
+        _nang_cap_luoc_do(conn, co_lop_tkb)
+        with _khoa_ket_noi:
+            _db_da_tao_bang.add(khoa)
+    return conn
+
+
+def _nang_cap_luoc_do(conn, co_lop_tkb):
+    """
+    db tạo trước khi có cột khoa / bảng lop_tkb: thêm cột và xóa phiên bản đã nhập của mọi
+    nguồn (lần mở kho tới nhập lại, điền khoa và lop_tkb); chỉ mục theo khoa tạo sau khi chắc có cột.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if 'khoa' not in [d[1] for d in conn.execute("PRAGMA table_info(buoi)")]:
+            conn.execute("ALTER TABLE buoi ADD COLUMN khoa TEXT")
+            conn.execute("UPDATE nguon SET phien_ban = NULL")
+        if not co_lop_tkb:
+            conn.execute("UPDATE nguon SET phien_ban = NULL")
+        conn.execute("CREATE INDEX IF NOT EXISTS buoi_khoa ON buoi (nguon, khoa)")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+@contextlib.contextmanager
+def ket_noi_sqlite(db_path):
+    """
+    Mượn một kết nối SQLite của db (dùng với `with`; trả lại khi xong). Kết nối rảnh
+    được dùng lại giữa các luồng (Streamlit, dịch vụ HTTP: mỗi request một luồng) nên
+    không phải mở kết nối và tạo bảng cho từng request; giữ tối đa SO_KET_NOI_SQLITE_RANH
+    kết nối rảnh, thừa thì đóng. Khóa có pid: tiến trình con không dùng kết nối của cha.
+    """
+    khoa = (os.getpid(), db_path)
+    with _khoa_ket_noi:
+        ranh = _ket_noi_ranh.get(khoa)
+        conn = ranh.pop() if ranh else None
+    if conn is None:
+        conn = _mo_ket_noi(db_path, khoa)
+    try:
+        yield conn
+    finally:
+        with _khoa_ket_noi:
+            ranh = _ket_noi_ranh.setdefault(khoa, [])
+            if len(ranh) < SO_KET_NOI_SQLITE_RANH:
+                ranh.append(conn)
+                conn = None
+        if conn is not None:
+            conn.close()
+
+
+def _dong_sqlite(nguon, bang):
+    """Các dòng INSERT (theo _COT_BUOI_SQL) từ bảng buổi dạy của một khối"""
+    ngay = bang['ngay'].to_numpy().astype('datetime64[D]')
+    so_tiet = bang['so_tiet'].to_numpy(dtype=object)
+    cac_cot = [
+        ngay.astype(np.int64).tolist(),
+        _ma_thang(ngay).tolist(),
+        [v.item() if isinstance(v, np.generic) else v for v in so_tiet],
+        _so_tiet_so(so_tiet).tolist(),
+    ]
+    for cot in _COT_CHUOI_BANG:
+        gia_tri = bang[cot].astype(object)
+        cac_cot.append(gia_tri.where(gia_tri.notna(), None).tolist())
+    cac_cot.append([f"{k:016x}" for k in _khoa_noi_dung(bang).tolist()])
+    return zip(itertools.repeat(nguon), *cac_cot)
+
+
+def nhap_sqlite(conn, ten, phien_ban, cac_phan):
+    """
+    Nhập các buổi của một nguồn vào SQLite trong MỘT giao dịch: xóa dữ liệu cũ của nguồn,
+    chèn từng khối bằng executemany (`cac_phan`: các kết quả dạng xay_dung_events, có thể
+    là generator đọc theo khối), rồi đánh dấu xung đột và tổng hợp theo tháng bằng SQL.
+    Phiên đọc khác vẫn thấy dữ liệu cũ cho tới khi commit.
+    Trả về (id nguồn, số buổi, thống kê — không gồm danh sách có/thiếu file TKB).
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        dong = conn.execute("SELECT id, phien_ban, so_buoi, thong_ke FROM nguon WHERE ten = ?", (ten,)).fetchone()
+        if dong is not None and dong[1] == repr(phien_ban):
+            # Tiến trình khác vừa nhập xong cùng phiên bản
+            conn.execute("COMMIT")
+            return dong[0], dong[2], pickle.loads(dong[3])
+        if dong is None:
+            nguon = conn.execute("INSERT INTO nguon (ten) VALUES (?)", (ten,)).lastrowid
+        else:
+            nguon = dong[0]
+            conn.execute("DELETE FROM buoi WHERE nguon = ?", (nguon,))
+            conn.execute("DELETE FROM tong_hop WHERE nguon = ?", (nguon,))
+            conn.execute("DELETE FROM lop_tkb WHERE nguon = ?", (nguon,))
+        
+        thong_ke = None
+        so_buoi = 0
+        with do_buoc('nhap_sqlite') as chi_tiet:
+            for phan in cac_phan:
+                conn.executemany(
+                    f"INSERT INTO buoi ({', '.join(_COT_BUOI_SQL)}) "
+                    f"VALUES ({', '.join('?' * len(_COT_BUOI_SQL))})",
+                    _dong_sqlite(nguon, phan['bang'])
+                )
+                so_buoi += len(phan['bang'])
+                # Có/thiếu file TKB không lưu trong thống kê: gom theo lớp vào bảng lop_tkb bên dưới
+                if thong_ke is None:
+                    thong_ke = {k: v for k, v in phan.items() if k not in ('bang', 'lop_tkb', 'so_co_file', 'so_thieu_file')}
+                else:
+                    thong_ke['invalid_dates'] = thong_ke['invalid_dates'] + phan['invalid_dates']
+                    thong_ke['total_rows'] += phan['total_rows']
+            if chi_tiet is not None:
+                chi_tiet['so_dong'] = so_buoi
+        
+        # Xung đột (cùng quy tắc với KhoSuKien._kiem_tra_xung_dot); tuần = (ngày + 3) / 7: ngày sau 1970
+        conn.execute(
+            "UPDATE buoi SET trung_lich = 1 WHERE nguon = :nguon AND (ten_gv, ngay) IN ("
+            " SELECT ten_gv, ngay FROM buoi WHERE nguon = :nguon GROUP BY ten_gv, ngay"
+            " HAVING COUNT(DISTINCT IFNULL(ten_lop, x'00')) > 1)",
+            {'nguon': nguon}
+        )
+        conn.execute(
+            "UPDATE buoi SET qua_tai = 1 WHERE nguon = :nguon AND (ten_gv, (ngay + 3) / 7) IN ("
+            " SELECT ten_gv, (ngay + 3) / 7 FROM buoi WHERE nguon = :nguon GROUP BY 1, 2"
+            " HAVING SUM(tiet) > :gioi_han)",
+            {'nguon': nguon, 'gioi_han': GIOI_HAN_TIET_TUAN}
+        )
+        for cot in _COT_TONG_HOP:
+            conn.execute(
+                f"INSERT INTO tong_hop SELECT nguon, '{cot}', {cot}, thang, COUNT(*), SUM(tiet)"
+                f" FROM buoi WHERE nguon = ? AND {cot} IS NOT NULL GROUP BY {cot}, thang",
+                (nguon,)
+            )
+        conn.execute(
+            "INSERT INTO lop_tkb SELECT nguon, ma_lop, ten_lop, file_goc, COUNT(*), GROUP_CONCAT(DISTINCT ten_gv),"
+            " MIN(ngay), MAX(ngay) FROM buoi WHERE nguon = ? GROUP BY ma_lop, ten_lop, file_goc ORDER BY MIN(id)",
+            (nguon,)
+        )
+        
+        conn.execute(
+            "UPDATE nguon SET phien_ban = ?, so_buoi = ?, thong_ke = ? WHERE id = ?",
+            (repr(phien_ban), so_buoi, pickle.dumps(thong_ke, protocol=pickle.HIGHEST_PROTOCOL), nguon)
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return nguon, so_buoi, thong_ke
+
+
+class BoLocSQL:
+    """
+    Kết quả KhoSQLite.loc: điều kiện WHERE (chưa lấy id nào).
+    Đếm, tổng hợp và lấy buổi trong khoảng ngày đều chạy bằng SQL trên điều kiện này.
+    """
+    
+    def __init__(self, kho, dieu_kien, tham_so):
+        self.kho = kho
+        self.dieu_kien = dieu_kien
+        self.tham_so = tham_so
+        self._so_buoi = None
+    
+    def __len__(self):
+        if self._so_buoi is None:
+            self._so_buoi = (
+                len(self.kho) if not self.dieu_kien else
+                self.kho._mot_gia_tri("SELECT COUNT(*) FROM buoi WHERE nguon = ?" + self.dieu_kien, self.tham_so)
+            )
+        return self._so_buoi
+
+
+class KhoSQLite:
+    """
+    Kho buổi dạy lưu trong SQLite (bật bằng LICH_GIANG_DAY_SQLITE), cùng giao diện với KhoSuKien
+    cho phần giao diện: lọc, khoảng ngày, payload, chi tiết, tổng hợp, xung đột.
+    Không giữ buổi nào trong RAM: mỗi truy vấn đi qua chỉ mục (nguồn, ngày / giảng viên /
+    đơn vị / lớp / mã lớp). Nhập lại chỉ khi phiên bản file khác lần nhập trước
+    (khởi động lại app không phải đọc lại file).
+    `cac_phan`: hàm trả về các kết quả đọc file (chỉ gọi khi cần nhập).
+    """
+    
+    def __init__(self, db_path, filepath, phien_ban, cac_phan):
+        self.db_path = db_path
+        self.filepath = filepath
+        self.phien_ban = phien_ban
+        self.hoan_tat = True
+        self.tien_do = None
+        self._ten = "\n".join(filepath) if isinstance(filepath, tuple) else filepath
+        self._cache = {}
+        
+        with ket_noi_sqlite(db_path) as conn:
+            dong = conn.execute(
+                "SELECT id, phien_ban, so_buoi, thong_ke FROM nguon WHERE ten = ?", (self._ten,)
+            ).fetchone()
+            if dong is not None and dong[1] == repr(phien_ban):
+                self._nguon, self._n, self._thong_ke = dong[0], dong[2], pickle.loads(dong[3])
+            else:
+                self._nguon, self._n, self._thong_ke = nhap_sqlite(conn, self._ten, phien_ban, cac_phan())
+    
+    @property
+    def thong_ke(self):
+        """
+        Thống kê như KhoSuKien.thong_ke; lop_tkb (có/thiếu file TKB theo lớp) đọc từ bảng
+        lop_tkb gom sẵn khi nhập, không đọc bảng buoi.
+        """
+        if 'thong_ke' not in self._cache:
+            lop_tkb = pd.DataFrame(self._truy_van(
+                "SELECT ma_lop, ten_lop, file_goc, so_buoi, ten_gv, ngay_dau, ngay_cuoi"
+                " FROM lop_tkb WHERE nguon = ? ORDER BY rowid"
+            ), columns=['ma_lop', 'ten_lop', 'file_goc', 'so_buoi', 'ten_gv', 'ngay_dau', 'ngay_cuoi'])
+            lop_tkb['ten_gv'] = [", ".join(sorted((v or "").split(","))) for v in lop_tkb['ten_gv']]
+            lop_tkb['file_goc'] = lop_tkb['file_goc'].astype(object).where(lop_tkb['file_goc'].notna(), None)
+            for cot in ('ngay_dau', 'ngay_cuoi'):
+                lop_tkb[cot] = lop_tkb[cot].to_numpy(dtype=np.int64).astype('datetime64[D]').astype('datetime64[ns]')
+            so_co_file = int(lop_tkb.loc[lop_tkb['file_goc'].notna(), 'so_buoi'].sum())
+            self._cache['thong_ke'] = {
+                **self._thong_ke,
+                'lop_tkb': lop_tkb,
+                'so_co_file': so_co_file,
+                'so_thieu_file': self._n - so_co_file,
+            }
+        return self._cache['thong_ke']
+    
+    def _truy_van(self, sql, tham_so=()):
+        with ket_noi_sqlite(self.db_path) as conn:
+            return conn.execute(sql, (self._nguon, *tham_so)).fetchall()
+    
+    def _mot_gia_tri(self, sql, tham_so=()):
+        return self._truy_van(sql, tham_so)[0][0]
+    
+    def _dieu_kien(self, ids):
+        """Điều kiện SQL (chuỗi, tham số) của tập buổi: None = tất cả, BoLocSQL hoặc mảng id"""
+        if ids is None:
+            return "", []
+        if isinstance(ids, BoLocSQL):
+            return ids.dieu_kien, ids.tham_so
+        return " AND id IN (SELECT value FROM json_each(?))", [json.dumps(np.asarray(ids).tolist())]
+    
+    def __len__(self):
+        return self._n
+    
+    def danh_sach(self, cot):
+        """Danh sách giá trị phân biệt (đã sắp xếp, bỏ rỗng) — quét chỉ mục (nguồn, cột)"""
+        khoa = ('danh_sach', cot)
+        if khoa not in self._cache:
+            self._cache[khoa] = [v for v, in self._truy_van(
+                f"SELECT DISTINCT {cot} FROM buoi WHERE nguon = ? AND {cot} <> '' ORDER BY {cot}"
+            )]
+        return self._cache[khoa]
+    
+    def loc(self, filter_gv=None, filter_don_vi=None, filter_lop=None):
+        """Bộ lọc (BoLocSQL): mỗi tiêu chí → `cột IN (các giá trị khớp)`, dùng chỉ mục của cột"""
+        dieu_kien, tham_so = [], []
+        for cot, gia_tri_loc in (('ten_gv', filter_gv), ('don_vi', filter_don_vi), ('ten_lop', filter_lop)):
+            if not gia_tri_loc or gia_tri_loc == "Tất cả":
+                continue
+            so_khop = _SO_KHOP_BO_LOC[cot]
+            khop = [v for v in self.danh_sach(cot) if so_khop(gia_tri_loc, v)]
+            dieu_kien.append(f" AND {cot} IN (SELECT value FROM json_each(?))")
+            tham_so.append(json.dumps(khop, ensure_ascii=False))
+        return BoLocSQL(self, "".join(dieu_kien), tham_so)
+    
+    def trong_khoang(self, bat_dau, ket_thuc, ids=None):
+        """Id các buổi có ngày trong [bat_dau, ket_thuc), theo thứ tự ngày (chỉ mục ngày)"""
+        dieu_kien, tham_so = self._dieu_kien(ids)
+        dong = self._truy_van(
+            "SELECT id FROM buoi WHERE nguon = ? AND ngay >= ? AND ngay < ?" + dieu_kien + " ORDER BY ngay, id",
+            [int(np.datetime64(bat_dau, 'D').astype(np.int64)),
+             int(np.datetime64(ket_thuc, 'D').astype(np.int64)), *tham_so]
+        )
+        return np.array([i for i, in dong], dtype=np.int64)
+    
+    def _title(self, ten_gv, don_vi):
+        """Title hiển thị trên calendar: "[đơn vị viết tắt] giảng viên" """
+        ngan = DON_VI_SHORT.get(don_vi, don_vi[:10] if don_vi else "")
+        return f"[{ngan}] {ten_gv}" if ngan else ten_gv
+    
+    def _cac_dong(self, cot, ids):
+        """Các dòng (id, *cot) của tập buổi, theo thứ tự `ids` nếu là mảng id"""
+        dieu_kien, tham_so = self._dieu_kien(ids)
+        dong = self._truy_van(f"SELECT id, {', '.join(cot)} FROM buoi WHERE nguon = ?" + dieu_kien + " ORDER BY id", tham_so)
+        if ids is None or isinstance(ids, BoLocSQL):
+            return dong
+        theo_id = {d[0]: d for d in dong}
+        return [theo_id[i] for i in np.asarray(ids).tolist() if i in theo_id]
+    
+    def payload(self, ids):
+        """Events gọn gửi cho calendar: chỉ id, title, ngày, màu (buổi có xung đột: title có ⚠️)"""
+        dong = self._cac_dong(('ten_gv', 'don_vi', 'ngay', 'trung_lich OR qua_tai'), ids)
+        ngay = np.datetime_as_string(np.array([d[3] for d in dong], dtype='datetime64[D]')).tolist()
+        return [
+            {
+                "id": str(i),
+                "title": "⚠️ " + self._title(g, dv) if cb else self._title(g, dv),
+                "start": start,
+                "color": DON_VI_COLORS.get(dv, "#808080"),
+            }
+            for (i, g, dv, _, cb), start in zip(dong, ngay)
+        ]
+    
+    def chi_tiet(self, i):
+        """Chi tiết một buổi (dạng extendedProps cũ) theo id; None nếu id không hợp lệ"""
+        dong = self._truy_van(
+            f"SELECT ngay, so_tiet, {', '.join(_COT_CHUOI_BANG)} FROM buoi WHERE nguon = ? AND id = ?", (i,)
+        )
+        if not dong:
+            return None
+        ngay, so_tiet, *gia_tri = dong[0]
+        return {
+            **dict(zip(_COT_CHUOI_BANG, gia_tri)),
+            "so_tiet": so_tiet,
+            "ngay_str": np.datetime64(ngay, 'D').astype(datetime).strftime("%d/%m/%Y"),
+        }
+    
+    def lay(self, ids):
+        """Events đầy đủ (title, màu, extendedProps) của tập buổi"""
+        events = []
+        for event in self.payload(ids):
+            color = event.pop("color")
+            event.update({
+                "end": event["start"],
+                "backgroundColor": color,
+                "borderColor": color,
+                "extendedProps": self.chi_tiet(int(event["id"])),
+            })
+            events.append(event)
+        return events
+    
+    def ma_buoi(self, ids):
+        """Mã ổn định của các buổi (như KhoSuKien.ma_buoi): khoa + số buổi cùng khoa có id nhỏ hơn"""
+        dong = self._cac_dong((
+            'khoa',
+            '(SELECT COUNT(*) FROM buoi AS truoc WHERE truoc.nguon = buoi.nguon'
+            ' AND truoc.khoa = buoi.khoa AND truoc.id < buoi.id)',
+        ), ids)
+        return [f"{khoa}-{lan}" for _, khoa, lan in dong]
+    
+    def tim_buoi(self, ma):
+        """Id buổi theo mã (xem ma_buoi); None nếu không có"""
+        tach = _tach_ma_buoi(ma)
+        if tach is None:
+            return None
+        dong = self._truy_van(
+            "SELECT id FROM buoi WHERE nguon = ? AND khoa = ? ORDER BY id LIMIT 1 OFFSET ?",
+            (f"{tach[0]:016x}", tach[1])
+        )
+        return dong[0][0] if dong else None
+    
+    def canh_bao(self, i):
+        """Các cảnh báo xung đột của buổi i (chuỗi hiển thị; rỗng nếu không có)"""
+        dong = self._truy_van("SELECT ten_gv, ngay, trung_lich, qua_tai FROM buoi WHERE nguon = ? AND id = ?", (i,))
+        if not dong:
+            return []
+        ten_gv, ngay, trung_lich, qua_tai = dong[0]
+        ket_qua = []
+        if trung_lich:
+            ten_lop = [v for v, in self._truy_van(
+                "SELECT DISTINCT ten_lop FROM buoi WHERE nguon = ? AND ten_gv = ? AND ngay = ?"
+                " AND ten_lop IS NOT NULL ORDER BY ten_lop",
+                (ten_gv, ngay)
+            )]
+            ket_qua.append(_canh_bao_trung_lich(ten_lop))
+        if qua_tai:
+            tuan = (ngay + 3) // 7
+            so_tiet = self._mot_gia_tri(
+                "SELECT SUM(tiet) FROM buoi WHERE nguon = ? AND ten_gv = ? AND ngay BETWEEN ? AND ?",
+                (ten_gv, tuan * 7 - 3, tuan * 7 + 3)
+            )
+            ket_qua.append(_canh_bao_qua_tai(tuan, so_tiet))
+        return ket_qua
+    
+    def bao_cao_trung_lich(self):
+        """Bảng trùng lịch: mỗi dòng một (giảng viên, ngày) dạy từ 2 lớp trở lên"""
+        if 'trung_lich' not in self._cache:
+            bang = pd.DataFrame(self._truy_van(
+                "SELECT ten_gv, ngay, IFNULL(ten_lop, ''), tiet FROM buoi"
+                " WHERE nguon = ? AND (trung_lich OR qua_tai) AND trung_lich ORDER BY id"
+            ), columns=['ten_gv', 'ngay', 'ten_lop', 'so_tiet'])
+            bang['ngay'] = bang['ngay'].to_numpy(dtype=np.int64).astype('datetime64[D]').astype('datetime64[ns]')
+            self._cache['trung_lich'] = _gom_trung_lich(bang)
+        return self._cache['trung_lich']
+    
+    def bao_cao_qua_tai(self):
+        """Bảng quá tải: mỗi dòng một (giảng viên, tuần) vượt GIOI_HAN_TIET_TUAN tiết"""
+        if 'qua_tai' not in self._cache:
+            bang = pd.DataFrame(self._truy_van(
+                "SELECT ten_gv, (ngay + 3) / 7 * 7 - 3, tiet FROM buoi"
+                " WHERE nguon = ? AND (trung_lich OR qua_tai) AND qua_tai ORDER BY id"
+            ), columns=['ten_gv', 'tuan_tu', 'so_tiet'])
+            bang['tuan_tu'] = bang['tuan_tu'].to_numpy(dtype=np.int64).astype('datetime64[D]').astype('datetime64[ns]')
+            self._cache['qua_tai'] = _gom_qua_tai(bang)
+        return self._cache['qua_tai']
+    
+    def tong_theo(self, cot, ids=None):
+        """
+        Số buổi và số tiết theo giá trị của cột trên tập buổi đã lọc:
+        {giá trị: (số buổi, số tiết)}. Không lọc → đọc bảng tong_hop tính sẵn khi nhập.
+        """
+        dieu_kien, tham_so = self._dieu_kien(ids)
+        if not dieu_kien and cot in _COT_TONG_HOP:
+            dong = self._truy_van(
+                "SELECT gia_tri, SUM(so_buoi), SUM(so_tiet) FROM tong_hop"
+                " WHERE nguon = ? AND cot = ? GROUP BY gia_tri ORDER BY gia_tri", (cot,)
+            )
+        else:
+            dong = self._truy_van(
+                f"SELECT {cot}, COUNT(*), SUM(tiet) FROM buoi WHERE nguon = ?{dieu_kien}"
+                f" AND {cot} IS NOT NULL GROUP BY {cot} ORDER BY {cot}", tham_so
+            )
+        return {v: (int(so_buoi), float(so_tiet)) for v, so_buoi, so_tiet in dong}
+    
+    def chi_muc_tim_kiem(self):
+        """Chỉ mục n-gram trên giá trị phân biệt (GROUP BY một lần cho mỗi phiên bản dữ liệu)"""
+        if 'chi_muc_tim_kiem' not in self._cache:
+            with do_buoc('chi_muc_tim_kiem'):
+                self._cache['chi_muc_tim_kiem'] = ChiMucTimKiem({
+                    cot: {v: buoi for v, (buoi, _) in self.tong_theo(cot).items()} for cot in COT_TIM_KIEM
+                })
+        return self._cache['chi_muc_tim_kiem']
+    
+    def tim_kiem(self, tu_khoa, gioi_han=None):
+        """Tìm không dấu: [{cot, gia_tri, diem, so_buoi}] xếp hạng (xem ChiMucTimKiem.tim)"""
+        return self.chi_muc_tim_kiem().tim(tu_khoa, gioi_han)
+    
+    def loc_theo_tim_kiem(self, ids, ket_qua_tim):
+        """Bộ lọc `ids` thêm điều kiện: ít nhất một cột khớp một kết quả tìm kiếm"""
+        dieu_kien, tham_so = self._dieu_kien(ids)
+        cac_dieu_kien = []
+        for cot, cac_gia_tri in _gom_theo_cot(ket_qua_tim).items():
+            cac_dieu_kien.append(f"{cot} IN (SELECT value FROM json_each(?))")
+            tham_so = [*tham_so, json.dumps(cac_gia_tri, ensure_ascii=False)]
+        return BoLocSQL(self, dieu_kien + f" AND ({' OR '.join(cac_dieu_kien) or '0'})", tham_so)
+    
+    def cac_lop(self):
+        """Các lớp (mã lớp, tên lớp) phân biệt, theo thứ tự xuất hiện"""
+        if 'cac_lop' not in self._cache:
+            self._cache['cac_lop'] = [tuple(d) for d in self._truy_van(
+                "SELECT ma_lop, ten_lop FROM buoi WHERE nguon = ? GROUP BY ma_lop, ten_lop ORDER BY MIN(id)"
+            )]
+        return self._cache['cac_lop']
+    
+    def cac_nam(self):
+        """Các năm có buổi dạy (tăng dần)"""
+        thang = np.array([t for t, in self._truy_van(
+            "SELECT DISTINCT thang FROM tong_hop WHERE nguon = ? AND cot = 'ten_gv'"
+        )], dtype=np.int64)
+        return sorted(set((thang // 12 + 1970).tolist()))
+    
+    def bang_tong_hop(self, cot, chi_so='so_tiet', nam=None):
+        """
+        Bảng tổng hợp theo tháng (từ bảng tong_hop, ghi nhớ theo tham số):
+        dòng = giá trị của cột, cột = tháng "MM/YYYY" + "Tổng"; chỉ giữ dòng/tháng có buổi dạy.
+        `chi_so`: 'so_tiet' hoặc 'so_buoi'; `nam`: chỉ lấy một năm.
+        """
+        khoa = ('bang_tong_hop', cot, chi_so, nam)
+        if khoa in self._cache:
+            return self._cache[khoa]
+        
+        thang_dau, thang_cuoi = ((nam - 1970) * 12, (nam - 1970) * 12 + 11) if nam is not None else (-2**62, 2**62)
+        du_lieu = pd.DataFrame(self._truy_van(
+            f"SELECT gia_tri, thang, {chi_so} FROM tong_hop"
+            " WHERE nguon = ? AND cot = ? AND thang BETWEEN ? AND ? AND so_buoi > 0",
+            (cot, thang_dau, thang_cuoi)
+        ), columns=['gia_tri', 'thang', chi_so])
+        bang = du_lieu.pivot_table(
+            index='gia_tri', columns='thang', values=chi_so, aggfunc='sum', fill_value=0
+        ).sort_index().sort_index(axis=1)
+        if chi_so == 'so_tiet':
+            bang = bang.round(2)
+        bang.index = pd.Index([v or "(trống)" for v in bang.index])
+        bang.columns = [f"{m % 12 + 1:02d}/{m // 12 + 1970}" for m in bang.columns]
+        bang['Tổng'] = bang.sum(axis=1)
+        bang = bang.sort_values('Tổng', ascending=False)
+        self._cache[khoa] = bang
+        return bang
+    
+    def bo_nho(self):
+        """Số liệu bộ nhớ: kho SQLite chỉ giữ thống kê và kết quả ghi nhớ trong RAM, dữ liệu nằm trong file"""
+        db_bytes = 0
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                db_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        return {
+            'so_su_kien': self._n,
+            'tong_bytes': uoc_luong_bo_nho((self._thong_ke, self._cache)),
+            'db_bytes': db_bytes,
+        }
@@ -0,0 +1,270 @@
+"""Nạp kho dùng chung cho mỗi phiên bản file (cache trong tiến trình, nạp theo khối, cập nhật tăng dần)"""
+
+import os
+import threading
+
+import numpy as np
+
+from .cau_hinh import DOC_THEO_KHOI_TU_MB, SQLITE_DB
+from .cache import bo_nho_tien_trinh, cache_tien_trinh, ghi_cache
+from .tai_lieu_tkb import chu_ky_tai_lieu, doc_ghim_lop
+from .doc_file import (
+    buoi_cua_lop,
+    doc_bang_sach,
+    doc_cache_file,
+    doc_events_co_cache,
+    doc_nhieu_file_thongke,
+    _gan_file_goc,
+    BoGopKetQua,
+    khoa_cache_file,
+    _khoa_co_thu_tu,
+    _khoa_noi_dung,
+    lop_doi_ghim,
+    _tao_bang,
+    xay_dung_events_theo_khoi,
+)
+from .kho import KhoSuKien
+from .kho_sqlite import KhoSQLite
+
+
+def cap_nhat_kho(kho_cu, filepath, phien_ban):
+    """
+    Cập nhật tăng dần khi file ThongKeTKB thay đổi: đọc lại file, so từng dòng với
+    kho cũ theo hash nội dung, chỉ tìm file TKB cho dòng mới và chỉ thêm/xóa
+    các buổi thay đổi trên kho và chỉ mục (dùng khi bộ file TKB gốc không đổi).
+    Buổi của các lớp có ghim đổi được bỏ rồi thêm lại như dòng mới.
+    """
+    thu_muc = os.path.dirname(filepath)
+    ghim = doc_ghim_lop(thu_muc)
+    frame, invalid_dates, total_rows = doc_bang_sach(filepath)
+    
+    khoa_cu = _khoa_co_thu_tu(kho_cu._khoa_dong)
+    khoa_moi = _khoa_co_thu_tu(_khoa_noi_dung(frame))
+    them = ~khoa_moi.isin(khoa_cu)
+    xoa = ~khoa_cu.isin(khoa_moi)
+    doi = lop_doi_ghim(kho_cu.thong_ke['ghim'], ghim)
+    if doi:
+        them |= buoi_cua_lop(frame, doi)
+        xoa |= buoi_cua_lop(kho_cu.bang(), doi)
+    
+    them = _gan_file_goc(frame[them].copy(), thu_muc)
+    return kho_cu.ap_dung_thay_doi(
+        phien_ban, np.flatnonzero(xoa), _tao_bang(them),
+        {'invalid_dates': invalid_dates, 'total_rows': total_rows,
+         'chu_ky_file_goc': phien_ban[-1][0], 'ghim': ghim}
+    )
+
+
+def cap_nhat_ghim(kho_cu, phien_ban):
+    """
+    Chỉ lớp ghim đổi (file ThongKeTKB và bộ file TKB gốc không đổi): bỏ rồi thêm lại
+    các buổi của những lớp có ghim đổi với file_goc mới, không đọc lại file Excel.
+    Không lớp nào đổi ghim → dùng lại kho cũ (không dựng bản sao).
+    """
+    thu_muc = os.path.dirname(kho_cu.filepath)
+    ghim = doc_ghim_lop(thu_muc)
+    lop_doi = lop_doi_ghim(kho_cu.thong_ke['ghim'], ghim)
+    if not lop_doi:
+        return kho_cu
+    bang = kho_cu.bang()
+    doi = buoi_cua_lop(bang, lop_doi)
+    them = _gan_file_goc(bang[doi].copy(), thu_muc)
+    return kho_cu.ap_dung_thay_doi(
+        phien_ban, np.flatnonzero(doi), _tao_bang(them),
+        {'invalid_dates': kho_cu.thong_ke['invalid_dates'], 'total_rows': kho_cu.thong_ke['total_rows'],
+         'chu_ky_file_goc': phien_ban[-1][0], 'ghim': ghim}
+    )
+
+
+# Kho mới nhất theo đường dẫn file (nền để cập nhật tăng dần khi file đổi)
+_kho_moi_nhat = bo_nho_tien_trinh()
+
+
+def _co_the_cap_nhat(kho_truoc, phien_ban):
+    """
+    Kho trước dùng để cập nhật tăng dần được không: đã nạp xong và cùng bộ file TKB gốc
+    (lớp ghim có thể khác: chỉ ghép lại buổi của lớp có ghim đổi). Lưu file kiểu ghi file
+    tạm rồi đổi tên (Excel, LibreOffice) chỉ đổi mtime thư mục nên vẫn cập nhật tăng dần.
+    """
+    return (
+        kho_truoc is not None and kho_truoc.hoan_tat and kho_truoc.thong_ke.get('ghim') is not None
+        and kho_truoc.phien_ban[-1][0] == phien_ban[-1][0]
+    )
+
+
+@cache_tien_trinh(max_entries=4)
+def _tao_kho_su_kien(filepath, phien_ban):
+    """
+    Tạo kho cho một phiên bản file (cache theo tiến trình, dùng chung mọi phiên).
+    Kho mới nhất đã là phiên bản này (vd. vừa nạp theo khối xong) → dùng lại nguyên kho.
+    Có kho của phiên bản trước → chỉ áp dụng các dòng thêm/xóa (cap_nhat_kho),
+    hoặc chỉ các lớp có ghim đổi nếu file không đổi (cap_nhat_ghim).
+    """
+    kho_truoc = _kho_moi_nhat.get(filepath)
+    if kho_truoc is not None and kho_truoc.hoan_tat and kho_truoc.phien_ban == phien_ban:
+        return kho_truoc
+    if _co_the_cap_nhat(kho_truoc, phien_ban) and kho_truoc.phien_ban[:-1] == phien_ban[:-1]:
+        kho = cap_nhat_ghim(kho_truoc, phien_ban)
+    elif _co_the_cap_nhat(kho_truoc, phien_ban):
+        try:
+            khoa = khoa_cache_file(filepath)
+        except OSError as e:
+            raise ValueError(f"Lỗi đọc file: {e}") from e
+        ket_qua = doc_cache_file(khoa, os.path.dirname(filepath))
+        if ket_qua is not None:
+            kho = KhoSuKien(filepath, phien_ban, ket_qua)
+        else:
+            kho = cap_nhat_kho(kho_truoc, filepath, phien_ban)
+            ghi_cache(khoa, kho.ket_qua())
+    else:
+        kho = KhoSuKien(filepath, phien_ban, doc_events_co_cache(filepath))
+    
+    _kho_moi_nhat[filepath] = kho
+    return kho
+
+
+class BoNapTheoKhoi:
+    """
+    Nạp file ThongKeTKB lớn theo khối trong luồng nền (streaming, bộ nhớ giới hạn).
+    Trong lúc nạp, kho() trả về kho tạm gồm các khối đã xong (hoan_tat=False)
+    để trang hiển thị ngay; xong thì ghi cache đĩa và thay bằng kho đầy đủ.
+    """
+    
+    def __init__(self, filepath, phien_ban):
+        self.filepath = filepath
+        self.phien_ban = phien_ban
+        self._kho = None
+        self._loi = None
+        self._co_du_lieu = threading.Event()
+        
+        try:
+            khoa = khoa_cache_file(filepath)
+        except OSError as e:
+            self._loi = f"Lỗi đọc file: {e}"
+            self._co_du_lieu.set()
+            return
+        
+        ket_qua = doc_cache_file(khoa, os.path.dirname(filepath))
+        if ket_qua is not None:
+            self._kho = KhoSuKien(filepath, phien_ban, ket_qua)
+            _kho_moi_nhat[filepath] = self._kho
+            self._co_du_lieu.set()
+            return
+        
+        threading.Thread(target=self._chay, args=(khoa,), daemon=True).start()
+    
+    def _chay(self, khoa):
+        bo_gop = BoGopKetQua()  # Mỗi khối gộp vào ngay (chỉ giữ mã số), không giữ danh sách khối
+        da_cong_bo = 0
+        try:
+            for phan, so_dong, tong_so_dong in xay_dung_events_theo_khoi(self.filepath):
+                bo_gop.them(phan)
+                # Dựng lại kho tạm khi số dòng gấp đôi lần trước (tổng chi phí O(n log n))
+                if so_dong >= 2 * da_cong_bo:
+                    kho = KhoSuKien(self.filepath, self.phien_ban, bo_gop.ket_qua())
+                    kho.hoan_tat = False
+                    kho.tien_do = (so_dong, tong_so_dong)
+                    self._kho = kho
+                    da_cong_bo = so_dong
+                    self._co_du_lieu.set()
+            
+            ket_qua = bo_gop.ket_qua()
+            del bo_gop
+            ghi_cache(khoa, ket_qua)
+            self._kho = KhoSuKien(self.filepath, self.phien_ban, ket_qua)
+            _kho_moi_nhat[self.filepath] = self._kho
+        except Exception as e:
+            self._loi = str(e)
+        finally:
+            self._co_du_lieu.set()
+    
+    def kho(self):
+        """Kho hiện có (chờ tới khi có khối đầu tiên); lỗi đọc file → ValueError"""
+        self._co_du_lieu.wait()
+        if self._loi:
+            raise ValueError(self._loi)
+        return self._kho
+
+
+@cache_tien_trinh(max_entries=4)
+def _tao_bo_nap_theo_khoi(filepath, phien_ban):
+    """Một bộ nạp theo khối cho mỗi phiên bản file (dùng chung mọi phiên)"""
+    return BoNapTheoKhoi(filepath, phien_ban)
+
+
+@cache_tien_trinh(max_entries=4)
+def _tao_kho_gop(cac_file, phien_ban):
+    """Tạo kho gộp nhiều file cho một tổ hợp phiên bản file (dùng chung mọi phiên)"""
+    return KhoSuKien(os.path.dirname(cac_file[0]), phien_ban, doc_nhieu_file_thongke(cac_file))
+
+
+def lay_kho_gop(cac_file):
+    """Lấy kho dùng chung gộp nhiều file ThongKeTKB (tạo lại khi có file thêm/đổi)"""
+    cac_file = tuple(os.path.abspath(f) for f in cac_file)
+    try:
+        phien_ban = tuple((os.path.getsize(f), os.stat(f).st_mtime_ns) for f in cac_file)
+    except OSError as e:
+        raise ValueError(f"Lỗi đọc file: {e}") from e
+    phien_ban += (chu_ky_tai_lieu(os.path.dirname(cac_file[0])),)
+    if SQLITE_DB:
+        return _tao_kho_sqlite(cac_file, phien_ban)
+    return _tao_kho_gop(cac_file, phien_ban)
+
+
+def lay_kho_su_kien(filepath):
+    """
+    Lấy kho sự kiện dùng chung của file ThongKeTKB.
+    Phiên bản = kích thước + mtime của file + chữ ký tài liệu TKB (bộ file PDF/DOCX + lớp ghim):
+    file đổi → tạo kho mới, các phiên khác vẫn đọc chung một kho.
+    File lớn (≥ DOC_THEO_KHOI_TU_MB) được nạp theo khối: có thể trả về kho tạm (hoan_tat=False).
+    Bật LICH_GIANG_DAY_SQLITE → kho SQLite (KhoSQLite) thay cho kho trong bộ nhớ.
+    """
+    filepath = os.path.abspath(filepath)
+    try:
+        stat = os.stat(filepath)
+    except OSError as e:
+        raise ValueError(f"Lỗi đọc file: {e}") from e
+    phien_ban = (stat.st_size, stat.st_mtime_ns, chu_ky_tai_lieu(os.path.dirname(filepath)))
+    if SQLITE_DB:
+        return _tao_kho_sqlite(filepath, phien_ban)
+    if (stat.st_size >= DOC_THEO_KHOI_TU_MB * 1024 * 1024
+            and not _co_the_cap_nhat(_kho_moi_nhat.get(filepath), phien_ban)):
+        return _tao_bo_nap_theo_khoi(filepath, phien_ban).kho()
+    return _tao_kho_su_kien(filepath, phien_ban)
+
+
+def _doc_theo_phan(filepath):
+    """Kết quả đọc file để nhập SQLite: cả file từ cache đĩa nếu có, không thì từng khối (streaming)"""
+    try:
+        ket_qua = doc_cache_file(khoa_cache_file(filepath), os.path.dirname(filepath))
+    except OSError as e:
+        raise ValueError(f"Lỗi đọc file: {e}") from e
+    if ket_qua is not None:
+        yield ket_qua
+        return
+    for phan, _, _ in xay_dung_events_theo_khoi(filepath):
+        yield phan
+
+
+@cache_tien_trinh(max_entries=4)
+def _tao_kho_sqlite(filepath, phien_ban):
+    """Kho SQLite cho một phiên bản file / tổ hợp file (dùng chung mọi phiên)"""
+    if isinstance(filepath, tuple):
+        return KhoSQLite(SQLITE_DB, filepath, phien_ban, lambda: [doc_nhieu_file_thongke(filepath)])
+    return KhoSQLite(SQLITE_DB, filepath, phien_ban, lambda: _doc_theo_phan(filepath))
+
+
+def doc_file_thongke(filepath):
+    """
+    Đọc file ThongKeTKB (qua cache trên đĩa) → (danh sách events cho calendar, thống kê file TKB).
+    Thống kê là dữ liệu (lop_tkb, so_co_file, so_thieu_file, invalid_dates, total_rows) để nơi gọi
+    tự hiển thị; file lỗi → ValueError.
+    """
+    ket_qua = doc_events_co_cache(filepath)
+    kho = KhoSuKien(os.path.abspath(filepath), None, ket_qua)
+    return kho.lay(np.arange(len(kho))), kho.thong_ke
+
+
+def loc_events(kho, filter_gv=None, filter_don_vi=None, filter_lop=None):
+    """Lọc events của kho theo các tiêu chí (qua chỉ mục, không quét tuần tự; kho SQLite: truy vấn SQL)"""
+    return kho.lay(kho.loc(filter_gv, filter_don_vi, filter_lop))
@@ -0,0 +1,34 @@
+"""Pool tiến trình/luồng cho các việc parse song song"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .cau_hinh import KIEU_TIEN_TRINH
+
+
+def _tao_pool(so_viec, so_tien_trinh=None, chi_fork=False, khong_fork=False):
+    """
+    Pool tiến trình để parse song song. Hàm gửi sang tiến trình con nằm trong gói
+    lich_giang_day nên 'spawn' cũng dùng được: tiến trình con chỉ import lõi, không
+    import Streamlit. Mặc định dùng 'fork' nếu có (khởi động nhanh hơn).
+    chi_fork=True: việc dùng biến toàn cục của tiến trình cha → không có 'fork' thì dùng luồng.
+    khong_fork=True: gọi từ luồng nền trong tiến trình nhiều luồng → không fork (tiến trình
+    con có thể kẹt ở khóa logging/import mà luồng khác đang giữ), dùng 'forkserver' hoặc 'spawn'.
+    """
+    so_tien_trinh = max(1, min(so_viec, so_tien_trinh or os.cpu_count() or 1))
+    cac_kieu = multiprocessing.get_all_start_methods()
+    if chi_fork:
+        kieu = 'fork' if 'fork' in cac_kieu else None
+    elif khong_fork:
+        if KIEU_TIEN_TRINH in cac_kieu and KIEU_TIEN_TRINH != 'fork':
+            kieu = KIEU_TIEN_TRINH
+        else:
+            kieu = 'forkserver' if 'forkserver' in cac_kieu else 'spawn'
+    elif KIEU_TIEN_TRINH in cac_kieu:
+        kieu = KIEU_TIEN_TRINH
+    else:
+        kieu = 'fork' if 'fork' in cac_kieu else 'spawn'
+    if kieu is None:
+        return ThreadPoolExecutor(so_tien_trinh)
+    return ProcessPoolExecutor(so_tien_trinh, mp_context=multiprocessing.get_context(kieu))
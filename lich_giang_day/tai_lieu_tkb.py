@@ -0,0 +1,543 @@
+"""Tìm file TKB gốc (PDF/DOCX) cho từng lớp: theo tên file, nội dung file và lớp ghim"""
+
+import os
+import glob
+import re
+import json
+import html
+import zipfile
+import unicodedata
+import hashlib
+import importlib.util
+import threading
+
+from ._nap_tre import nap_tre
+from .cau_hinh import (
+    FILE_GHIM_LOP,
+    _PHIEN_BAN_CACHE,
+    SO_KY_TU_NOI_DUNG,
+    SO_KY_TU_TIEU_DE,
+    SO_TRANG_PDF_DOC,
+)
+from .hieu_nang import do_buoc
+from .chuan_hoa import chuan_hoa_cot_text, chuan_hoa_text, trich_xuat_keywords_tu_ten_lop
+from .cache import bo_nho_tien_trinh, cache_tien_trinh, doc_cache, don_dep_cache, ghi_cache, _hash_noi_dung
+from .song_song import _tao_pool
+
+pd = nap_tre("pandas")
+
+CO_PYPDF = importlib.util.find_spec("pypdf") is not None  # Tùy chọn: đọc nội dung file TKB dạng PDF
+
+
+def _chu_ky_thu_muc(thu_muc):
+    """
+    Chữ ký rẻ của thư mục (mtime_ns): thay đổi khi thêm/xóa/đổi tên file.
+    Dùng làm khóa cache cho chỉ mục TKB.
+    """
+    try:
+        return os.stat(thu_muc).st_mtime_ns
+    except OSError:
+        return None
+
+
+# Chỉ mục TKB gần nhất theo thư mục (dùng lại tên đã chuẩn hóa khi thư mục đổi)
+_chi_muc_tkb_truoc = bo_nho_tien_trinh()
+
+
+@cache_tien_trinh(max_entries=8)
+def _xay_dung_chi_muc_tkb(thu_muc, chu_ky):
+    """
+    Quét thư mục MỘT LẦN và xây dựng chỉ mục file TKB gốc (PDF/DOCX).
+    `chu_ky` chỉ dùng làm khóa cache: đổi chữ ký thư mục → xây lại chỉ mục,
+    nhưng chỉ chuẩn hóa tên các file mới (file cũ lấy lại từ chỉ mục trước).
+
+    Chỉ mục gồm:
+    - files / lower / clean / normalized: tên file đã chuẩn hóa sẵn (giữ thứ tự glob)
+    - ma_lop: map mã lớp → file (điền dần khi tra cứu)
+    - keywords: chỉ mục ngược keyword → tập vị trí file (điền dần khi tra cứu)
+    """
+    all_files = []
+    for ext in ['*.pdf', '*.PDF', '*.docx', '*.DOCX']:
+        all_files.extend(glob.glob(os.path.join(thu_muc, ext)))
+    
+    # Loại bỏ file ThongKeTKB (không phải TKB gốc) và file khóa "~$..." Word tạo khi đang mở file
+    all_files = [
+        f for f in all_files
+        if 'ThongKeTKB' not in os.path.basename(f) and not os.path.basename(f).startswith('~$')
+    ]
+    
+    # Tên đã chuẩn hóa của các file có trong chỉ mục trước
+    truoc = _chi_muc_tkb_truoc.get(thu_muc)
+    da_co = {}
+    if truoc:
+        da_co = dict(zip(truoc['files'], zip(truoc['lower'], truoc['clean'], truoc['normalized'])))
+    
+    # Chuẩn hóa một lượt tên các file mới
+    moi = [f for f in all_files if f not in da_co]
+    ten_moi = pd.Series([os.path.basename(f) for f in moi], dtype=object)
+    chuan_hoa_moi = dict(zip(moi, chuan_hoa_cot_text(ten_moi)))
+    
+    lower, clean, normalized = [], [], []
+    for f in all_files:
+        if f in da_co:
+            l, c, n = da_co[f]
+        else:
+            l = os.path.basename(f).lower()
+            c = re.sub(r'[^\w]', '', l)
+            n = chuan_hoa_moi[f]
+        lower.append(l)
+        clean.append(c)
+        normalized.append(n)
+    
+    chi_muc = {
+        'files': all_files,
+        'lower': lower,
+        'clean': clean,
+        'normalized': normalized,
+        'ma_lop': {},
+        'keywords': {},
+    }
+    _chi_muc_tkb_truoc[thu_muc] = chi_muc
+    return chi_muc
+
+
+def lay_chi_muc_tkb(thu_muc="."):
+    """Lấy chỉ mục file TKB của thư mục (chỉ xây lại khi thư mục thay đổi)"""
+    thu_muc = os.path.abspath(thu_muc or ".")
+    return _xay_dung_chi_muc_tkb(thu_muc, _chu_ky_thu_muc(thu_muc))
+
+
+def _tra_ma_lop(chi_muc, ma_lop_str):
+    """Tra file khớp mã lớp trong chỉ mục (kết quả được ghi nhớ theo mã lớp)"""
+    cache = chi_muc['ma_lop']
+    if ma_lop_str in cache:
+        return cache[ma_lop_str]
+    
+    ma_lop_lower = ma_lop_str.lower()
+    ma_lop_clean = re.sub(r'[^\w]', '', ma_lop_str).lower()
+    
+    ket_qua = None
+    for file, filename_lower, filename_clean in zip(chi_muc['files'], chi_muc['lower'], chi_muc['clean']):
+        # Kiểm tra mã lớp có trong tên file
+        if ma_lop_lower in filename_lower or ma_lop_clean in filename_clean:
+            ket_qua = file
+            break
+    
+    cache[ma_lop_str] = ket_qua
+    return ket_qua
+
+
+def _tra_keyword(chi_muc, keyword):
+    """Tra tập vị trí file có tên (đã chuẩn hóa) chứa keyword"""
+    cache = chi_muc['keywords']
+    if keyword not in cache:
+        cache[keyword] = frozenset(
+            i for i, name in enumerate(chi_muc['normalized']) if keyword in name
+        )
+    return cache[keyword]
+
+
+_MAU_MA_LOP_NOI_DUNG = re.compile(r'(?<!\w)m[ãa]\s*(?:l[ớo]p)?\s*:?\s*(\d(?:[\w/-]*\w)?)', re.IGNORECASE)
+
+
+def trich_van_ban_tkb(filepath):
+    """
+    Trích văn bản của file TKB gốc: DOCX đọc thẳng word/document.xml,
+    PDF đọc vài trang đầu (cần pypdf). Không đọc được → chuỗi rỗng.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    try:
+        if ext == '.docx':
+            with zipfile.ZipFile(filepath) as z:
+                xml = z.read('word/document.xml').decode('utf-8', errors='ignore')
+            # Mỗi đoạn văn (w:p) một dòng
+            xml = xml.replace('</w:p>', '\n')
+            text = html.unescape(re.sub(r'<[^>]+>', '', xml))
+        elif ext == '.pdf' and CO_PYPDF:
+            from pypdf import PdfReader  # Chỉ nạp khi thật sự đọc PDF
+            reader = PdfReader(filepath)
+            text = '\n'.join(
+                (trang.extract_text() or '') for trang in reader.pages[:SO_TRANG_PDF_DOC]
+            )
+        else:
+            return ''
+    except Exception:
+        return ''
+    return unicodedata.normalize('NFC', text[:SO_KY_TU_NOI_DUNG])
+
+
+def phan_tich_van_ban_tkb(text):
+    """
+    Thông tin dùng để khớp lớp trong văn bản file TKB:
+    (các mã lớp đã làm sạch, phần đầu văn bản đã chuẩn hóa - chứa tên lớp)
+    """
+    cac_ma = []
+    for ma in _MAU_MA_LOP_NOI_DUNG.findall(text):
+        ma = re.sub(r'[^\w]', '', ma).lower()
+        if ma not in cac_ma:
+            cac_ma.append(ma)
+    return cac_ma, chuan_hoa_text(text[:SO_KY_TU_TIEU_DE])
+
+
+def _trich_van_ban_cac_file(cac_file):
+    """
+    Trích văn bản nhiều file (song song khi có nhiều file). Chạy trong luồng nền của
+    ChiMucNoiDungTKB nên pool không dùng fork.
+    """
+    if len(cac_file) <= 1:
+        return [trich_van_ban_tkb(f) for f in cac_file]
+    try:
+        with _tao_pool(len(cac_file), khong_fork=True) as pool:
+            return list(pool.map(trich_van_ban_tkb, cac_file))
+    except Exception:
+        # Pool hỏng (vd. không fork được) → trích tuần tự
+        return [trich_van_ban_tkb(f) for f in cac_file]
+
+
+# Hash nội dung file TKB đã tính: đường dẫn → (kích thước, mtime, hash)
+_hash_file_tkb_truoc = bo_nho_tien_trinh()
+# Nội dung file TKB đã phân tích: đường dẫn → (hash, các mã lớp, tiêu đề)
+_noi_dung_tkb_truoc = bo_nho_tien_trinh()
+
+
+class ChiMucNoiDungTKB:
+    """
+    Chỉ mục NỘI DUNG file TKB gốc: mã lớp và tên lớp ghi trong file.
+    Xây trong luồng nền (chạy song song với việc đọc file ThongKeTKB);
+    văn bản trích ra được cache trên đĩa theo hash nội dung file nên
+    lần sau chỉ phải trích các file mới hoặc đã sửa.
+    """
+
+    def __init__(self, cac_file):
+        self.cac_file = list(cac_file)
+        self.ma_lop = {}      # mã lớp đã làm sạch → các file ghi mã đó
+        self.tieu_de = {}     # file → phần đầu văn bản đã chuẩn hóa
+        self._ten_lop = {}    # tên lớp đã chuẩn hóa → file (ghi nhớ khi tra)
+        self._pid = os.getpid()
+        self._khoa = threading.Lock()
+        self._xong = threading.Event()
+        threading.Thread(target=self._xay_dung, daemon=True).start()
+
+    def _xay_dung(self):
+        with self._khoa:
+            if self._xong.is_set():
+                return
+            try:
+                self._doc_noi_dung()
+            finally:
+                self._xong.set()
+
+    def _doc_noi_dung(self):
+        with do_buoc('chi_muc_noi_dung', so_file=len(self.cac_file)):
+            self._doc_noi_dung_cac_file()
+
+    def _doc_noi_dung_cac_file(self):
+        hash_truoc = _hash_file_tkb_truoc
+        da_phan_tich = _noi_dung_tkb_truoc
+        phan_tich, van_ban, can_trich = {}, {}, []
+        for f in self.cac_file:
+            try:
+                stat = os.stat(f)
+                cu = hash_truoc.get(f)
+                if cu and cu[:2] == (stat.st_size, stat.st_mtime_ns):
+                    h = cu[2]
+                else:
+                    h = _hash_noi_dung(f)
+                    hash_truoc[f] = (stat.st_size, stat.st_mtime_ns, h)
+            except OSError:
+                continue
+            # File không đổi từ lần xây trước: dùng lại kết quả phân tích, không đọc cache đĩa
+            cu = da_phan_tich.get(f)
+            if cu and cu[0] == h:
+                phan_tich[f] = cu[1:]
+                continue
+            khoa = hashlib.blake2b(
+                repr(('van_ban_tkb', _PHIEN_BAN_CACHE, h, CO_PYPDF)).encode('utf-8'),
+                digest_size=16,
+            ).hexdigest()
+            text = doc_cache(khoa)
+            if text is None:
+                can_trich.append((f, khoa, h))
+            else:
+                van_ban[f] = (h, text)
+
+        if can_trich:
+            cac_van_ban = _trich_van_ban_cac_file([f for f, _, _ in can_trich])
+            for (f, khoa, h), text in zip(can_trich, cac_van_ban):
+                ghi_cache(khoa, text, don_dep=False)
+                van_ban[f] = (h, text)
+            don_dep_cache()
+
+        for f, (h, text) in van_ban.items():
+            phan_tich[f] = phan_tich_van_ban_tkb(text)
+            da_phan_tich[f] = (h, *phan_tich[f])
+
+        # Giữ thứ tự file như chỉ mục tên file
+        for f in self.cac_file:
+            if f not in phan_tich:
+                continue
+            cac_ma, tieu_de = phan_tich[f]
+            for ma in cac_ma:
+                self.ma_lop.setdefault(ma, []).append(f)
+            self.tieu_de[f] = tieu_de
+
+    def ket_qua(self):
+        """Chờ chỉ mục xây xong (tiến trình con sinh bằng fork tự xây lại nếu cần)"""
+        if not self._xong.is_set() and os.getpid() != self._pid:
+            # Luồng nền của tiến trình cha không tồn tại trong tiến trình con
+            self._pid = os.getpid()
+            self._khoa = threading.Lock()
+            self._xay_dung()
+        self._xong.wait()
+        return self
+
+    def tra_ma_lop(self, ma_lop_str):
+        """File có ghi đúng mã lớp trong nội dung"""
+        cac_file = self.ma_lop.get(re.sub(r'[^\w]', '', ma_lop_str).lower())
+        return cac_file[0] if cac_file else None
+
+    def tra_ten_lop(self, ten_lop):
+        """File có phần đầu nội dung chứa đầy đủ tên lớp (đã chuẩn hóa)"""
+        ten = chuan_hoa_text(ten_lop)
+        if ten.startswith('lop'):
+            ten = ten[3:]
+        if ten not in self._ten_lop:
+            self._ten_lop[ten] = None
+            # Tên quá ngắn dễ khớp nhầm
+            if len(ten) >= 10:
+                for f, tieu_de in self.tieu_de.items():
+                    if ten in tieu_de:
+                        self._ten_lop[ten] = f
+                        break
+        return self._ten_lop[ten]
+
+
+@cache_tien_trinh(max_entries=8)
+def _tao_chi_muc_noi_dung(thu_muc, chu_ky):
+    """`chu_ky` (bộ file TKB gốc) chỉ dùng làm khóa cache"""
+    return ChiMucNoiDungTKB(lay_chi_muc_tkb(thu_muc)['files'])
+
+
+def lay_chi_muc_noi_dung(thu_muc="."):
+    """
+    Chỉ mục nội dung file TKB của thư mục (bắt đầu xây nền, không chờ).
+    Khóa theo bộ file TKB gốc, không theo mtime thư mục: lưu file ThongKeTKB hay đổi
+    ghim không xây lại chỉ mục; thêm/sửa file TKB chỉ đọc lại các file đó.
+    """
+    thu_muc = os.path.abspath(thu_muc or ".")
+    return _tao_chi_muc_noi_dung(thu_muc, _chu_ky_bo_tai_lieu(thu_muc))
+
+
+def tim_file_tkb_goc(ma_lop, ten_lop, thu_muc=".", noi_dung=None):
+    """
+    Tìm file TKB gốc (PDF/DOCX) dựa trên mã lớp VÀ tên lớp.
+    Trả về đường dẫn file nếu tìm thấy.
+    CẢI TIẾN: Tìm kiếm thông minh theo cả mã lớp và tên lớp,
+    tra cứu trên chỉ mục thư mục thay vì glob lại cho mỗi dòng,
+    và đọc cả NỘI DUNG file (mã lớp / tên lớp ghi trong file)
+    `noi_dung`: chỉ mục nội dung đã xây xong (tìm nhiều lớp: lấy một lần cho cả lượt).
+    """
+    chi_muc = lay_chi_muc_tkb(thu_muc)
+    all_files = chi_muc['files']
+    
+    if not all_files:
+        return None
+    
+    if noi_dung is None:
+        noi_dung = lay_chi_muc_noi_dung(thu_muc).ket_qua()
+    co_ten_lop = bool(ten_lop) and not pd.isna(ten_lop)
+    
+    # BƯỚC 1: Tìm theo MÃ LỚP (nếu có): ghi trong nội dung file, rồi trong tên file
+    if ma_lop and not pd.isna(ma_lop):
+        ma_lop_str = str(ma_lop).strip()
+        if ma_lop_str and ma_lop_str.lower() != 'nan':
+            file = noi_dung.tra_ma_lop(ma_lop_str) or _tra_ma_lop(chi_muc, ma_lop_str)
+            if file:
+                return file
+    
+    # BƯỚC 2: Tìm theo TÊN LỚP (keywords)
+    if co_ten_lop:
+        keywords = trich_xuat_keywords_tu_ten_lop(ten_lop)
+        
+        if keywords:
+            # Đếm số keywords khớp cho mỗi file (qua chỉ mục ngược)
+            scores = {}
+            for keyword in keywords:
+                for i in _tra_keyword(chi_muc, keyword):
+                    scores[i] = scores.get(i, 0) + 1
+            
+            if scores:
+                # Điểm cao nhất, hòa điểm thì lấy file đứng trước (như thứ tự glob)
+                best_idx = min(scores, key=lambda i: (-scores[i], i))
+                
+                # Chỉ trả về nếu có ít nhất 2 keywords khớp
+                if scores[best_idx] >= 2:
+                    return all_files[best_idx]
+    
+    # BƯỚC 3: Tìm theo TÊN LỚP ghi trong nội dung file
+    if co_ten_lop:
+        return noi_dung.tra_ten_lop(str(ten_lop))
+    
+    return None
+
+
+def _khoa_lop(ma_lop, ten_lop):
+    """Khóa của một lớp: (mã lớp, tên lớp) dạng chuỗi đã strip"""
+    return (
+        '' if ma_lop is None or pd.isna(ma_lop) else str(ma_lop).strip(),
+        '' if ten_lop is None or pd.isna(ten_lop) else str(ten_lop).strip(),
+    )
+
+
+def _doc_file_ghim():
+    """Toàn bộ file ghim: {thư mục: [{ma_lop, ten_lop, file}]} (lỗi/không có → rỗng)"""
+    try:
+        with open(FILE_GHIM_LOP, encoding='utf-8') as f:
+            du_lieu = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return du_lieu if isinstance(du_lieu, dict) else {}
+
+
+def doc_ghim_lop(thu_muc="."):
+    """
+    Các lớp được ghim thủ công của thư mục: khóa lớp → đường dẫn file TKB
+    (None = ghim "không có file"). Ghim luôn thắng kết quả tìm tự động.
+    """
+    thu_muc = os.path.abspath(thu_muc or ".")
+    ghim = {}
+    for muc in _doc_file_ghim().get(thu_muc, []):
+        ten_file = muc.get('file')
+        ghim[_khoa_lop(muc.get('ma_lop'), muc.get('ten_lop'))] = (
+            os.path.join(thu_muc, ten_file) if ten_file else None
+        )
+    return ghim
+
+
+def ghim_lop(thu_muc, ma_lop, ten_lop, filepath):
+    """
+    Ghim file TKB cho một lớp (filepath=None: ghim "không có file").
+    Ghi vào FILE_GHIM_LOP (JSON, sửa tay được); chữ ký tài liệu đổi → nạp lại dữ liệu.
+    """
+    _cap_nhat_ghim(thu_muc, ma_lop, ten_lop, (os.path.basename(filepath) if filepath else None,))
+
+
+def bo_ghim_lop(thu_muc, ma_lop, ten_lop):
+    """Bỏ ghim một lớp (quay lại tìm tự động)"""
+    _cap_nhat_ghim(thu_muc, ma_lop, ten_lop, ())
+
+
+def _cap_nhat_ghim(thu_muc, ma_lop, ten_lop, file_moi):
+    thu_muc = os.path.abspath(thu_muc or ".")
+    khoa = _khoa_lop(ma_lop, ten_lop)
+    du_lieu = _doc_file_ghim()
+    cac_muc = [
+        m for m in du_lieu.get(thu_muc, [])
+        if _khoa_lop(m.get('ma_lop'), m.get('ten_lop')) != khoa
+    ]
+    for ten_file in file_moi:
+        cac_muc.append({'ma_lop': khoa[0], 'ten_lop': khoa[1], 'file': ten_file})
+    if cac_muc:
+        du_lieu[thu_muc] = cac_muc
+    else:
+        du_lieu.pop(thu_muc, None)
+
+    os.makedirs(os.path.dirname(FILE_GHIM_LOP) or ".", exist_ok=True)
+    tmp_path = f"{FILE_GHIM_LOP}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(du_lieu, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, FILE_GHIM_LOP)
+
+
+def chu_ky_tai_lieu(thu_muc="."):
+    """
+    Chữ ký phần TKB gốc mà file_goc phụ thuộc: bộ file PDF/DOCX + các lớp ghim.
+    Các file khác trong thư mục (ThongKeTKB, file tạm khi lưu) không tính, nên lưu
+    hay thêm file ThongKeTKB không làm đổi chữ ký. Dùng trong phiên bản kho và để
+    biết kết quả đã parse có cần ghép lại file_goc không.
+    """
+    thu_muc = os.path.abspath(thu_muc or ".")
+    ghim = sorted((k, v or '') for k, v in doc_ghim_lop(thu_muc).items())
+    return _chu_ky_bo_tai_lieu(thu_muc), hashlib.blake2b(repr(ghim).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _chu_ky_bo_tai_lieu(thu_muc):
+    """Chữ ký bộ file TKB gốc: (tên, kích thước, mtime) từng file + có đọc được PDF không"""
+    cac_file = []
+    for f in lay_chi_muc_tkb(thu_muc)['files']:
+        try:
+            stat = os.stat(f)
+        except OSError:
+            continue
+        cac_file.append((os.path.basename(f), stat.st_size, stat.st_mtime_ns))
+    return hashlib.blake2b(repr((sorted(cac_file), CO_PYPDF)).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _khoa_cache_khop_lop(thu_muc):
+    return "khop_lop_" + hashlib.blake2b(
+        repr((_PHIEN_BAN_CACHE, thu_muc)).encode('utf-8'), digest_size=16
+    ).hexdigest()
+
+
+_khoa_bang_khop_lop = threading.Lock()  # Bảo vệ bảng ghép (nhiều luồng cùng tra / ghi cache)
+# Bảng ghép lớp → file TKB đã tìm theo thư mục (bản trong bộ nhớ của cache đĩa; giữ _khoa_bang_khop_lop khi dùng)
+_bang_khop_lop_bo_nho = bo_nho_tien_trinh()
+
+
+def _lay_bang_khop_lop(thu_muc):
+    """
+    Bảng ghép lớp → file TKB tự động của thư mục: {'chu_ky': ..., 'lop': {khóa lớp: file}}.
+    Lưu cạnh cache sự kiện; bộ file TKB gốc đổi → bỏ hết kết quả cũ.
+    """
+    chu_ky = _chu_ky_bo_tai_lieu(thu_muc)
+    bang = _bang_khop_lop_bo_nho.get(thu_muc)
+    if bang is None:
+        bang = doc_cache(_khoa_cache_khop_lop(thu_muc))
+    if not bang or bang.get('chu_ky') != chu_ky:
+        bang = {'chu_ky': chu_ky, 'lop': {}}
+    _bang_khop_lop_bo_nho[thu_muc] = bang
+    return bang
+
+
+def tim_file_cho_cac_lop(cac_lop, thu_muc="."):
+    """
+    Tìm file TKB gốc cho danh sách lớp (mã lớp, tên lớp), mỗi lớp MỘT lần:
+    ghim thủ công → bảng ghép đã lưu → tim_file_tkb_goc (rồi lưu lại).
+    """
+    thu_muc = os.path.abspath(thu_muc or ".")
+    ghim = doc_ghim_lop(thu_muc)
+    cac_khoa = [_khoa_lop(ma_lop, ten_lop) for ma_lop, ten_lop in cac_lop]
+    with _khoa_bang_khop_lop:
+        bang = _lay_bang_khop_lop(thu_muc)
+        da_tim = bang['lop']
+        chua_tim = [k for k in dict.fromkeys(cac_khoa) if k not in ghim and k not in da_tim]
+
+    # Tìm ngoài khóa (có thể phải chờ chỉ mục nội dung), các luồng khác vẫn tra bảng được.
+    # Chỉ mục nội dung lấy một lần cho cả lượt, theo chữ ký bộ tài liệu bảng ghép đã tính
+    noi_dung = None
+    if chua_tim and lay_chi_muc_tkb(thu_muc)['files']:
+        noi_dung = _tao_chi_muc_noi_dung(thu_muc, bang['chu_ky']).ket_qua()
+    moi = {k: tim_file_tkb_goc(k[0], k[1], thu_muc, noi_dung) for k in chua_tim}
+
+    with _khoa_bang_khop_lop:
+        da_tim.update(moi)
+        ket_qua = [ghim[k] if k in ghim else da_tim[k] for k in cac_khoa]
+        # Ghi bản chụp: luồng khác có thể thêm lớp vào da_tim trong lúc pickle
+        ban_chup = {'chu_ky': bang['chu_ky'], 'lop': dict(da_tim)} if moi else None
+    if ban_chup is not None:
+        ghi_cache(_khoa_cache_khop_lop(thu_muc), ban_chup)
+    return ket_qua
+
+
+def bang_khop_lop(kho, thu_muc="."):
+    """Xem ghép lớp → file TKB của các lớp trong kho: mã lớp, tên lớp, file, nguồn (ghim/tự động)"""
+    thu_muc = os.path.abspath(thu_muc or ".")
+    ghim = doc_ghim_lop(thu_muc)
+    cac_lop = kho.cac_lop()
+    cac_file = tim_file_cho_cac_lop(cac_lop, thu_muc)
+    return pd.DataFrame({
+        'ma_lop': [k[0] for k in cac_lop],
+        'ten_lop': [k[1] for k in cac_lop],
+        'file': [os.path.basename(f) if f else '' for f in cac_file],
+        'nguon': ['ghim' if _khoa_lop(*k) in ghim else 'tự động' for k in cac_lop],
+    })
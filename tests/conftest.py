@@ -0,0 +1,70 @@
+"""Cấu hình chung cho test: cache và file ghim trong thư mục tạm riêng, bảng ThongKeTKB nhỏ trong bộ nhớ"""
+
+import os
+import sys
+import tempfile
+
+# Đặt trước khi import lich_giang_day (cấu hình đọc biến môi trường lúc import)
+_THU_MUC_CACHE = tempfile.mkdtemp(prefix="lich_giang_day_test_")
+os.environ["LICH_GIANG_DAY_CACHE_DIR"] = _THU_MUC_CACHE
+os.environ["LICH_GIANG_DAY_FILE_GHIM"] = os.path.join(_THU_MUC_CACHE, "ghim_lop.json")
+os.environ.pop("LICH_GIANG_DAY_SQLITE", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from lich_giang_day.cache import xoa_cache_tien_trinh
+from lich_giang_day.doc_file import xu_ly_bang_thongke
+from lich_giang_day.kho import KhoSuKien
+from lich_giang_day.tai_lieu_tkb import chu_ky_tai_lieu
+
+DON_VI = "Khoa Chính sách công"
+
+
+def _dong_thongke(ngay, ten_gv, ten_lop, chuyen_de, so_tiet=8, ma_lop=""):
+    return {
+        'Tên lớp': ten_lop,
+        'Mã lớp': ma_lop,
+        'Thời gian': f"Thứ hai {ngay}",
+        'Số tiết': so_tiet,
+        'Tên chuyên đề': chuyen_de,
+        'Tên giảng viên': ten_gv,
+        'Đơn vị (GV)': DON_VI,
+    }
+
+
+def bang_thongke(cac_dong):
+    """
+    DataFrame như đọc từ file ThongKeTKB; mỗi dòng:
+    (ngày "dd/mm/YYYY", giảng viên, lớp, chuyên đề[, số tiết[, mã lớp]])
+    """
+    return pd.DataFrame(
+        [_dong_thongke(*dong) for dong in cac_dong], columns=list(_dong_thongke("", "", "", ""))
+    )
+
+
+@pytest.fixture(autouse=True)
+def _cache_sach():
+    """Mỗi test bắt đầu không có cache trong tiến trình (kho, chỉ mục TKB...)"""
+    xoa_cache_tien_trinh()
+    yield
+    xoa_cache_tien_trinh()
+
+
+@pytest.fixture
+def thu_muc(tmp_path):
+    """Thư mục dữ liệu rỗng (không có file TKB gốc)"""
+    return str(tmp_path)
+
+
+@pytest.fixture
+def tao_kho(thu_muc):
+    """Hàm dựng KhoSuKien từ các dòng ThongKeTKB (xem bang_thongke)"""
+    def tao(cac_dong, phien_ban=(0, 0)):
+        filepath = os.path.join(thu_muc, "ThongKeTKB_test.xlsx")
+        return KhoSuKien(
+            filepath, (*phien_ban, chu_ky_tai_lieu(thu_muc)),
+            xu_ly_bang_thongke(bang_thongke(cac_dong), thu_muc),
+        )
+    return tao
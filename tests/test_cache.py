@@ -0,0 +1,88 @@
+"""Cache trong tiến trình; file upload lưu theo hash nội dung; cache bytes file TKB tải về (LRU, giới hạn dung lượng)"""
+
+import os
+
+import pytest
+
+from lich_giang_day import cache, nap, tai_lieu_tkb
+from lich_giang_day.cache import (
+    bo_nho_tien_trinh,
+    cache_tien_trinh,
+    CacheNoiDungFile,
+    luu_file_tai_len,
+    xoa_cache_tien_trinh,
+)
+
+
+@pytest.fixture
+def tai_len(monkeypatch, tmp_path):
+    thu_muc = str(tmp_path / "tai_len")
+    monkeypatch.setattr(cache, 'TAI_LEN_DIR', thu_muc)
+    return thu_muc
+
+
+def test_luu_file_tai_len_theo_hash(tai_len):
+    path = luu_file_tai_len("ThongKeTKB.xlsx", b"noi dung 1")
+    mtime = os.stat(path).st_mtime_ns
+
+    # Cùng nội dung (kể cả khác tên) → cùng đường dẫn, không ghi lại
+    assert luu_file_tai_len("ThongKeTKB.xlsx", b"noi dung 1") == path
+    assert luu_file_tai_len("ban_sao.xlsx", b"noi dung 1") == path
+    assert os.stat(path).st_mtime_ns == mtime
+
+    # Cùng tên, khác nội dung → thư mục khác, không đè file cũ
+    khac = luu_file_tai_len("ThongKeTKB.xlsx", b"noi dung 2")
+    assert khac != path and os.path.basename(khac) == "ThongKeTKB.xlsx"
+    with open(path, 'rb') as f:
+        assert f.read() == b"noi dung 1"
+    assert not [ten for ten in os.listdir(tai_len) if ten.startswith(".tam_")]
+
+
+def test_cache_noi_dung_file_lru(tmp_path):
+    cac_file = []
+    for i in range(5):
+        path = tmp_path / f"tkb_{i}.pdf"
+        path.write_bytes(bytes([i]) * 50)
+        cac_file.append(str(path))
+    bo_nho = CacheNoiDungFile(200 / 1024 / 1024)  # Giữ được 4 file 50 byte
+
+    for path in cac_file[:4]:
+        bo_nho.doc(path)
+    assert bo_nho.doc(cac_file[0]) == bytes([0]) * 50  # file 0 dùng gần nhất → file 1 bị bỏ khi thêm file 4
+    bo_nho.doc(cac_file[4])
+    assert [k[0] for k in bo_nho._du_lieu] == [cac_file[2], cac_file[3], cac_file[0], cac_file[4]]
+    assert bo_nho._tong <= bo_nho.gioi_han
+
+    # File sửa trên đĩa → đọc lại (khóa gồm kích thước + mtime)
+    with open(cac_file[0], 'ab') as f:
+        f.write(b"x")
+    assert bo_nho.doc(cac_file[0]) == bytes([0]) * 50 + b"x"
+
+
+def test_cache_noi_dung_file_khong_giu_file_lon(tmp_path):
+    path = tmp_path / "lon.pdf"
+    path.write_bytes(b"a" * 100)
+    bo_nho = CacheNoiDungFile(300 / 1024 / 1024)  # 100 byte > 1/4 giới hạn: đọc thẳng từ đĩa
+
+    assert bo_nho.doc(str(path)) == b"a" * 100
+    assert not bo_nho._du_lieu and bo_nho._tong == 0
+
+
+def test_xoa_cache_tien_trinh_xoa_ca_bo_nho_module():
+    bo_nho = bo_nho_tien_trinh()
+    so_lan = []
+
+    @cache_tien_trinh()
+    def tinh(x):
+        so_lan.append(x)
+        return x * 2
+
+    bo_nho['a'] = 1
+    nap._kho_moi_nhat['file.xlsx'] = object()
+    tai_lieu_tkb._bang_khop_lop_bo_nho['thu_muc'] = {}
+    assert tinh(3) == tinh(3) == 6 and so_lan == [3]
+
+    xoa_cache_tien_trinh()
+
+    assert not bo_nho and not nap._kho_moi_nhat and not tai_lieu_tkb._bang_khop_lop_bo_nho
+    assert tinh(3) == 6 and so_lan == [3, 3]
@@ -0,0 +1,73 @@
+"""Chuẩn hóa ngày tháng (cả cột một lượt) và chuỗi tiếng Việt"""
+
+import re
+import unicodedata
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from lich_giang_day.chuan_hoa import (
+    chuan_hoa_cot_ngay,
+    chuan_hoa_cot_text,
+    chuan_hoa_ngay,
+    chuan_hoa_text,
+)
+
+
+def test_chuan_hoa_cot_ngay_giong_tung_o():
+    cac_o = [
+        "Thứ hai 03/11/2025", "3/1/2025 (sáng)", "Chiều 15-12-2025", datetime(2025, 11, 4, 13, 30),
+        "31/02/2025", "Chưa xếp lịch", None, "", 20251103,
+    ]
+
+    ngay = chuan_hoa_cot_ngay(pd.Series(cac_o, dtype=object))
+
+    mong_doi = [chuan_hoa_ngay(o) for o in cac_o]
+    assert [None if pd.isna(d) else d.to_pydatetime() for d in ngay] == mong_doi
+    assert mong_doi[:4] == [
+        datetime(2025, 11, 3), datetime(2025, 1, 3), datetime(2025, 12, 15), datetime(2025, 11, 4, 13, 30),
+    ]
+    assert mong_doi[4:] == [None] * 5
+
+
+_THAY_THE_CU = dict(zip(
+    "áàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ",
+    "a" * 17 + "e" * 11 + "i" * 5 + "o" * 17 + "u" * 11 + "y" * 5 + "d",
+))
+
+
+def _chuan_hoa_text_cu(text):
+    """Bản cũ (67 lần replace + 2 regex) để so kết quả"""
+    if not text or pd.isna(text):
+        return ""
+    text = str(text).lower().strip()
+    for cu, moi in _THAY_THE_CU.items():
+        text = text.replace(cu, moi)
+    text = re.sub(r'[^\w\s]', '', text)
+    return re.sub(r'\s+', '', text)
+
+
+CAC_CHUOI = [
+    "LỚP BỒI DƯỠNG THẨM ĐỊNH VIÊN VỀ GIÁ", "Lớp Xây dựng NTM – K16 (Cần Thơ)", "175-2025",
+    "ThS. Nguyễn Thị Phương Lam", "Chuyên đề: Luật Hợp tác xã; quản trị_chuỗi giá trị",
+    "MÃ 113_TKB NTM VĨNH LONG (BẾN TRE CŨ) 4.6.12.2025.pdf", "  nhiều   khoảng\ttrắng\n ",
+    "Ứng Ỷ Ỵ Đ ư ơ", "", None, np.nan, 0, 164, 12.5,
+]
+
+
+def test_chuan_hoa_text_giong_ban_cu():
+    for text in CAC_CHUOI:
+        assert chuan_hoa_text(text) == _chuan_hoa_text_cu(text), text
+    # Dạng tổ hợp NFD cho cùng kết quả như dạng dựng sẵn
+    for text in CAC_CHUOI[:8]:
+        assert chuan_hoa_text(unicodedata.normalize('NFD', text)) == chuan_hoa_text(text), text
+
+
+def test_chuan_hoa_cot_text_giong_tung_gia_tri():
+    cot = pd.Series(CAC_CHUOI * 3, dtype=object, index=range(10, 10 + len(CAC_CHUOI) * 3))
+
+    ket_qua = chuan_hoa_cot_text(cot)
+
+    assert ket_qua.index.equals(cot.index)
+    assert ket_qua.tolist() == [_chuan_hoa_text_cu(v) for v in cot]
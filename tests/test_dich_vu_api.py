@@ -0,0 +1,87 @@
+"""Dịch vụ JSON: ETag / 304 khi dữ liệu không đổi, gzip theo q-value của Accept-Encoding"""
+
+import gzip
+import http.client
+import json
+import threading
+
+import pytest
+
+import dich_vu_api
+from dich_vu_api import nhan_gzip, tao_may_chu
+
+CAC_DONG = [
+    (f"{3 + i % 20:02d}/11/2025", f"ThS. Giảng viên {i % 4}", f"Lớp bồi dưỡng số {i % 3}", f"Chuyên đề {i}")
+    for i in range(40)
+]
+
+
+@pytest.fixture
+def may_chu(monkeypatch, tao_kho):
+    """Máy chủ trên cổng ngẫu nhiên, đọc kho dựng từ CAC_DONG; trả về hàm gửi GET"""
+    kho = tao_kho(CAC_DONG)
+    monkeypatch.setattr(dich_vu_api, 'lay_kho', lambda cac_file: kho)
+    may_chu = tao_may_chu(["ThongKeTKB_test.xlsx"], cong=0)
+    luong = threading.Thread(target=may_chu.serve_forever, daemon=True)
+    luong.start()
+
+    def get(duong_dan, **tieu_de):
+        ket_noi = http.client.HTTPConnection(*may_chu.server_address, timeout=10)
+        try:
+            ket_noi.request('GET', duong_dan, headers={k.replace('_', '-'): v for k, v in tieu_de.items()})
+            phan_hoi = ket_noi.getresponse()
+            return phan_hoi.status, dict(phan_hoi.getheaders()), phan_hoi.read()
+        finally:
+            ket_noi.close()
+
+    yield get
+    may_chu.shutdown()
+    may_chu.server_close()
+    luong.join()
+
+
+def test_etag_va_304(may_chu):
+    ma, tieu_de, du_lieu = may_chu("/api/su-kien?tu=2025-11-03&den=2025-11-05")
+    assert ma == 200
+    assert json.loads(du_lieu)['tong'] == 6
+    etag = tieu_de['ETag']
+
+    ma, tieu_de_304, du_lieu = may_chu("/api/su-kien?tu=2025-11-03&den=2025-11-05", If_None_Match=etag)
+    assert ma == 304
+    assert du_lieu == b""
+    assert tieu_de_304['ETag'] == etag
+
+    # ETag khác (hoặc URL khác) → trả lại nội dung đầy đủ
+    assert may_chu("/api/su-kien?tu=2025-11-03&den=2025-11-05", If_None_Match='W/"khac"')[0] == 200
+    ma, tieu_de_khac, _ = may_chu("/api/su-kien?tu=2025-11-04", If_None_Match=etag)
+    assert ma == 200 and tieu_de_khac['ETag'] != etag
+
+
+def test_gzip_theo_accept_encoding(may_chu):
+    _, _, goc = may_chu("/api/su-kien")
+    assert len(goc) >= dich_vu_api.NEN_TU_BYTES
+
+    _, tieu_de, du_lieu = may_chu("/api/su-kien", Accept_Encoding="gzip")
+    assert tieu_de['Content-Encoding'] == "gzip"
+    assert tieu_de['Vary'] == "Accept-Encoding"
+    assert gzip.decompress(du_lieu) == goc
+
+    _, tieu_de, du_lieu = may_chu("/api/su-kien", Accept_Encoding="gzip;q=0, identity")
+    assert 'Content-Encoding' not in tieu_de
+    assert du_lieu == goc
+
+
+@pytest.mark.parametrize("accept_encoding, nhan", [
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("GZIP ; Q=1.0", True),
+    ("gzip;q=0", False),
+    ("gzip;q=0.0, *;q=1", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("identity", False),
+    ("gzip;q=abc", False),
+    ("", False),
+])
+def test_nhan_gzip(accept_encoding, nhan):
+    assert nhan_gzip(accept_encoding) is nhan
@@ -0,0 +1,190 @@
+"""Gộp nhiều file ThongKeTKB: bỏ buổi trùng giữa các file, giữ buổi lặp trong cùng một file; đọc theo khối"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from lich_giang_day import doc_file
+from lich_giang_day.doc_file import (
+    doc_bang_sach,
+    doc_events_co_cache,
+    gop_ket_qua,
+    khoa_cache_file,
+    lam_sach_bang_thongke,
+    loai_trung_lap,
+    xay_dung_events,
+    xay_dung_events_theo_khoi,
+    xu_ly_bang_thongke,
+)
+
+from conftest import bang_thongke
+from test_tai_lieu_tkb import tao_docx
+
+SANG_CHIEU = ("03/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 1")  # Hai buổi cùng khóa: sáng và chiều
+KHAC = ("04/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 2")
+MOI = ("05/11/2025", "TS. Bình", "Lớp Hợp tác xã", "Chuyên đề 3")
+
+
+def _gop(thu_muc, *cac_file):
+    cac_ket_qua = [xu_ly_bang_thongke(bang_thongke(dong), thu_muc) for dong in cac_file]
+    nguon = np.repeat(np.arange(len(cac_ket_qua)), [len(kq['bang']) for kq in cac_ket_qua])
+    return gop_ket_qua(cac_ket_qua), nguon
+
+
+def _cac_buoi(ket_qua):
+    bang = ket_qua['bang']
+    return sorted(zip(bang['ngay'].dt.strftime("%d/%m/%Y"), bang['ten_gv'], bang['ten_lop'], bang['ten_chuyen_de']))
+
+
+def test_bo_buoi_da_co_o_file_truoc(thu_muc):
+    gop, nguon = _gop(thu_muc, [SANG_CHIEU, SANG_CHIEU, KHAC], [SANG_CHIEU, KHAC, MOI])
+
+    ket_qua = loai_trung_lap(gop, nguon)
+
+    assert ket_qua['so_trung'] == 2
+    assert ket_qua['total_rows'] == 4
+    assert _cac_buoi(ket_qua) == sorted([SANG_CHIEU, SANG_CHIEU, KHAC, MOI])
+    assert ket_qua['so_thieu_file'] == 4
+    assert ket_qua['lop_tkb']['so_buoi'].sum() == 4
+
+
+def test_giu_buoi_lap_trong_cung_file(thu_muc):
+    # File sau có 2 buổi cùng khóa mà file trước không có: giữ cả hai
+    gop, nguon = _gop(thu_muc, [KHAC], [MOI, MOI, KHAC])
+
+    ket_qua = loai_trung_lap(gop, nguon)
+
+    assert ket_qua['so_trung'] == 1
+    assert _cac_buoi(ket_qua) == sorted([KHAC, MOI, MOI])
+
+
+def test_khong_trung_thi_giu_nguyen(thu_muc):
+    gop, nguon = _gop(thu_muc, [SANG_CHIEU], [KHAC])
+
+    ket_qua = loai_trung_lap(gop, nguon)
+
+    assert ket_qua['so_trung'] == 0
+    assert ket_qua['bang'] is gop['bang']
+
+
+def test_khong_co_nguon_bo_moi_dong_lap(thu_muc):
+    gop, _ = _gop(thu_muc, [SANG_CHIEU, SANG_CHIEU, KHAC])
+
+    ket_qua = loai_trung_lap(gop)
+
+    assert ket_qua['so_trung'] == 1
+    assert _cac_buoi(ket_qua) == sorted([SANG_CHIEU, KHAC])
+
+
+def _ghi_xlsx(thu_muc, cac_dong):
+    path = os.path.join(thu_muc, "ThongKeTKB_test.xlsx")
+    bang = bang_thongke(cac_dong)
+    bang.loc[len(bang)] = bang.iloc[0]
+    bang.loc[len(bang) - 1, 'Thời gian'] = "Chưa xếp lịch"  # Dòng ngày lỗi
+    bang.to_excel(path, index=False)
+    return path
+
+
+def _gia_tri(bang):
+    return bang.astype(object).where(bang.notna(), None).values.tolist()
+
+
+def test_doc_theo_khoi_giong_doc_ca_file(thu_muc):
+    path = _ghi_xlsx(thu_muc, [
+        (f"{3 + i % 9:02d}/11/2025", f"ThS. Giảng viên {i % 4}", f"Lớp {i % 3}", f"Chuyên đề {i}", 4 + i % 2, f"{i % 3}")
+        for i in range(11)
+    ])
+
+    ca_file = xay_dung_events(path)
+    theo_khoi = gop_ket_qua(kq for kq, _, _ in xay_dung_events_theo_khoi(path, kich_thuoc_khoi=3))
+
+    assert _gia_tri(theo_khoi['bang']) == _gia_tri(ca_file['bang'])
+    assert theo_khoi['invalid_dates'] == ca_file['invalid_dates'] and len(ca_file['invalid_dates']) == 1
+    assert theo_khoi['total_rows'] == ca_file['total_rows'] == 11
+    assert theo_khoi['so_thieu_file'] == ca_file['so_thieu_file'] == 11
+    assert _gia_tri(theo_khoi['lop_tkb']) == _gia_tri(ca_file['lop_tkb'])
+    assert theo_khoi['ghim'] == ca_file['ghim'] and theo_khoi['chu_ky_file_goc'] == ca_file['chu_ky_file_goc']
+
+
+def test_doc_bang_sach_theo_khoi(monkeypatch, thu_muc):
+    path = _ghi_xlsx(thu_muc, [
+        (f"{3 + i:02d}/11/2025", "ThS. An", f"Lớp {i % 2}", f"Chuyên đề {i}") for i in range(7)
+    ])
+    frame, invalid_dates, total_rows = lam_sach_bang_thongke(pd.read_excel(path))
+    monkeypatch.setattr(doc_file, 'DOC_THEO_KHOI_TU_MB', 0)
+    monkeypatch.setattr(doc_file, 'KICH_THUOC_KHOI', 2)
+
+    frame_khoi, invalid_khoi, total_khoi = doc_bang_sach(path)
+
+    assert list(frame_khoi.columns) == list(frame.columns)
+    assert _gia_tri(frame_khoi) == _gia_tri(frame)
+    assert (invalid_khoi, total_khoi) == (invalid_dates, total_rows)
+
+
+def test_lam_sach_bao_ngay_loi_va_bo_dong_thieu_giang_vien():
+    df = bang_thongke([
+        ("03/11/2025", "  ThS. An ", " Lớp Xây dựng NTM ", "Chuyên đề 1"),
+        ("04/11/2025", "", "Lớp Xây dựng NTM", "Thiếu giảng viên"),
+        ("05/11/2025", "TS. Bình", "Lớp Hợp tác xã", "Chuyên đề 3", None),
+        ("06/11/2025", "ThS. An", "Lớp Hợp tác xã", "Ngày lỗi"),
+        ("07/11/2025", "ThS. An", "Lớp Hợp tác xã", "Ô ngày trống"),
+    ])
+    df.loc[3, 'Thời gian'] = "Thứ hai 31/02/2025"
+    df.loc[4, 'Thời gian'] = None
+    df.loc[1, 'Tên giảng viên'] = None
+
+    frame, invalid_dates, total_rows = lam_sach_bang_thongke(df)
+
+    assert invalid_dates == [{'dong': 5, 'gia_tri': "Thứ hai 31/02/2025"}]  # Ô trống không tính là lỗi
+    assert total_rows == 3
+    assert frame['ten_gv'].tolist() == ["ThS. An", "TS. Bình"]
+    assert frame['ten_lop'].tolist() == ["Lớp Xây dựng NTM", "Lớp Hợp tác xã"]
+    assert frame['ngay'].dt.strftime("%d/%m/%Y").tolist() == ["03/11/2025", "05/11/2025"]
+    assert frame['so_tiet'].tolist() == [8, 8]  # Thiếu số tiết → 8
+
+
+def test_khoa_cache_doi_theo_file(thu_muc):
+    path = os.path.join(thu_muc, "ThongKeTKB_test.xlsx")
+    with open(path, 'wb') as f:
+        f.write(b"noi dung 1")
+    khoa = khoa_cache_file(path)
+    assert khoa_cache_file(path) == khoa
+    # File khác trong thư mục không làm đổi khóa
+    with open(os.path.join(thu_muc, "ThongKeTKB_khac.xlsx"), 'wb') as f:
+        f.write(b"khac")
+    assert khoa_cache_file(path) == khoa
+
+    # Cùng kích thước và mtime nhưng khác nội dung → khóa khác (hash nội dung)
+    stat = os.stat(path)
+    with open(path, 'wb') as f:
+        f.write(b"noi dung 2")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    khoa_2 = khoa_cache_file(path)
+    assert khoa_2 != khoa
+
+    # Chỉ đổi mtime → khóa khác
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert khoa_cache_file(path) not in (khoa, khoa_2)
+
+
+def test_doc_events_co_cache_khong_doc_lai_excel(monkeypatch, thu_muc):
+    path = _ghi_xlsx(thu_muc, [("03/11/2025", "ThS. An", "Lớp Khuyến nông", "Chuyên đề 1", 8, "164")])
+    so_lan_doc = []
+    doc_goc = doc_file.xay_dung_events
+    monkeypatch.setattr(doc_file, 'xay_dung_events', lambda f: so_lan_doc.append(f) or doc_goc(f))
+
+    assert doc_events_co_cache(path)['so_thieu_file'] == 1
+    assert doc_events_co_cache(path)['so_thieu_file'] == 1
+    assert len(so_lan_doc) == 1
+
+    # Thêm file TKB gốc: dùng lại cache (không đọc lại Excel), chỉ ghép lại file_goc
+    tkb = tao_docx(os.path.join(thu_muc, "164_KHUYEN_NONG.docx"), "THỜI KHÓA BIỂU")
+    ket_qua = doc_events_co_cache(path)
+    assert len(so_lan_doc) == 1
+    assert ket_qua['so_co_file'] == 1 and ket_qua['lop_tkb']['file_goc'].tolist() == [tkb]
+
+    # Sửa file ThongKeTKB → đọc lại
+    _ghi_xlsx(thu_muc, [("04/11/2025", "ThS. An", "Lớp Khuyến nông", "Chuyên đề 2", 8, "164")])
+    assert doc_events_co_cache(path)['bang']['ten_chuyen_de'].tolist() == ["Chuyên đề 2"]
+    assert len(so_lan_doc) == 2
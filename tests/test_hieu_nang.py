@@ -0,0 +1,28 @@
+"""Đo hiệu năng: bước lồng nhau không làm mất đỉnh bộ nhớ của bước ngoài"""
+
+import tracemalloc
+
+from lich_giang_day import hieu_nang
+from lich_giang_day.hieu_nang import nhat_ky_hieu_nang
+
+MB = 1024 * 1024
+
+
+def _ban_ghi(buoc):
+    return [b for b in nhat_ky_hieu_nang() if b['buoc'] == buoc][-1]
+
+
+def test_buoc_long_nhau_giu_dinh_cua_buoc_ngoai():
+    with hieu_nang._do_buoc_that('ngoai_test'):
+        tam = bytearray(16 * MB)  # Đỉnh của bước ngoài, giải phóng trước bước trong
+        del tam
+        with hieu_nang._do_buoc_that('trong_test'):
+            nho = bytearray(MB)
+            del nho
+        with hieu_nang._do_buoc_that('trong_test_2'):
+            pass
+
+    assert _ban_ghi('ngoai_test')['mb'] >= 15
+    assert 0.9 <= _ban_ghi('trong_test')['mb'] < 15
+    assert _ban_ghi('trong_test_2')['mb'] < 1
+    assert not tracemalloc.is_tracing()  # Hết bước đang đo → tắt tracemalloc
@@ -0,0 +1,151 @@
+"""KhoSuKien: xung đột lịch (trùng lịch trong ngày, quá tải tiết trong tuần) và truy vấn theo khoảng ngày"""
+
+from datetime import date
+
+from lich_giang_day.cau_hinh import GIOI_HAN_TIET_TUAN
+
+
+def _co_canh_bao(kho, loai):
+    """Các chỉ số buổi có cảnh báo bắt đầu bằng `loai` ("Trùng lịch" / "Quá tải")"""
+    return [i for i in range(len(kho)) if any(c.startswith(loai) for c in kho.canh_bao(i))]
+
+
+def test_trung_lich_chi_khi_khac_lop(tao_kho):
+    kho = tao_kho([
+        ("03/11/2025", "TS. Bình", "Lớp Hợp tác xã", "Chuyên đề 1", 4),      # 0: trùng với 2
+        ("03/11/2025", "ThS. An", "Lớp Hợp tác xã", "Chuyên đề 1", 4),       # 1: giảng viên khác
+        ("03/11/2025", "TS. Bình", "Lớp Khuyến nông", "Chuyên đề 2", 4),     # 2
+        ("04/11/2025", "TS. Bình", "Lớp Khuyến nông", "Chuyên đề 3", 4),     # 3: sáng và chiều cùng lớp
+        ("04/11/2025", "TS. Bình", "Lớp Khuyến nông", "Chuyên đề 4", 4),     # 4
+        ("05/11/2025", "ThS. An", "Lớp Hợp tác xã", "Chuyên đề 5", 4),       # 5
+        ("05/11/2025", "ThS. An", "Lớp Thẩm định viên", "Chuyên đề 6", 4),   # 6: trùng với 5 và 7
+        ("05/11/2025", "ThS. An", "Lớp Khuyến nông", "Chuyên đề 7", 4),      # 7
+    ])
+
+    assert _co_canh_bao(kho, "Trùng lịch") == [0, 2, 5, 6, 7]
+    assert "3 lớp" in kho.canh_bao(6)[0]
+    bao_cao = kho.bao_cao_trung_lich()
+    assert bao_cao[['ten_gv', 'so_buoi']].values.tolist() == [["TS. Bình", 2], ["ThS. An", 3]]
+    assert [p['title'].startswith("⚠️") for p in kho.payload(range(len(kho)))] == [
+        True, False, True, False, False, True, True, True,
+    ]
+
+
+def test_qua_tai_theo_tuan_thu_hai_den_chu_nhat(tao_kho):
+    so_buoi = int(GIOI_HAN_TIET_TUAN // 8)
+    tuan_dau = [(f"{3 + i:02d}/11/2025", "ThS. An", "Lớp Xây dựng NTM", f"Chuyên đề {i}") for i in range(so_buoi)]
+    kho = tao_kho(tuan_dau + [
+        ("09/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chủ nhật", 1),    # vượt giới hạn của tuần 03–09/11
+        ("10/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Thứ hai tuần sau"),
+        ("04/11/2025", "TS. Bình", "Lớp Hợp tác xã", "Giảng viên khác"),
+    ])
+
+    assert _co_canh_bao(kho, "Quá tải") == list(range(so_buoi + 1))
+    bao_cao = kho.bao_cao_qua_tai()
+    assert len(bao_cao) == 1
+    assert bao_cao['tuan_tu'][0].strftime("%d/%m/%Y") == "03/11/2025"
+    assert bao_cao['so_tiet'][0] == so_buoi * 8 + 1
+
+
+def test_dung_gioi_han_khong_qua_tai(tao_kho):
+    so_buoi = int(GIOI_HAN_TIET_TUAN // 8)
+    kho = tao_kho([
+        (f"{3 + i:02d}/11/2025", "ThS. An", "Lớp Xây dựng NTM", f"Chuyên đề {i}", GIOI_HAN_TIET_TUAN / so_buoi)
+        for i in range(so_buoi)
+    ])
+
+    assert _co_canh_bao(kho, "Quá tải") == []
+    assert kho.bao_cao_qua_tai().empty
+
+
+def test_trong_khoang_tim_nhi_phan_theo_ngay(tao_kho):
+    cac_ngay = [7, 3, 10, 3, 5, 12, 3, 9]
+    kho = tao_kho([
+        (f"{d:02d}/11/2025", f"ThS. Giảng viên {i % 2}", "Lớp Xây dựng NTM", f"Chuyên đề {i}")
+        for i, d in enumerate(cac_ngay)
+    ])
+
+    def mong_doi(tu, den, ids=range(len(cac_ngay))):
+        return sorted((i for i in ids if tu <= cac_ngay[i] < den), key=lambda i: (cac_ngay[i], i))
+
+    assert kho.trong_khoang(date(2025, 11, 3), date(2025, 11, 10)).tolist() == mong_doi(3, 10)
+    assert kho.trong_khoang(date(2025, 11, 4), date(2025, 11, 5)).tolist() == []
+    assert kho.trong_khoang(date(2025, 10, 1), date(2026, 1, 1)).tolist() == mong_doi(0, 99)
+    ids = kho.loc(filter_gv="ThS. Giảng viên 1")
+    assert kho.trong_khoang(date(2025, 11, 3), date(2025, 11, 11), ids).tolist() == mong_doi(3, 11, [1, 3, 5, 7])
+
+    # Sau cập nhật tăng dần: chỉ mục ngày trộn lại (bỏ buổi xóa, chèn buổi thêm đúng chỗ)
+    them = tao_kho([
+        ("04/11/2025", "ThS. An", "Lớp Khuyến nông", "Mới"),
+        ("03/11/2025", "ThS. An", "Lớp Khuyến nông", "Mới"),
+    ])
+    moi = kho.ap_dung_thay_doi(kho.phien_ban, [1, 4], them.bang(), {'invalid_dates': [], 'total_rows': 8})
+    cac_ngay = [d for i, d in enumerate(cac_ngay) if i not in (1, 4)] + [4, 3]
+    assert moi.trong_khoang(date(2025, 11, 1), date(2025, 11, 30)).tolist() == mong_doi(0, 99)
+    assert moi.trong_khoang(date(2025, 11, 3), date(2025, 11, 5)).tolist() == mong_doi(3, 5)
+
+
+def test_tong_hop_sau_cap_nhat_giong_dung_lai(tao_kho):
+    cac_dong = [
+        ("03/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 1"),
+        ("04/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 2", 4),
+        ("03/11/2025", "TS. Bình", "Lớp Hợp tác xã", "Chuyên đề 3", 4),
+        ("02/12/2025", "TS. Bình", "Lớp Hợp tác xã", "Chuyên đề 4", "6,5"),
+        ("15/12/2025", "ThS. Cường", "Lớp Khuyến nông", "Chuyên đề 5"),
+    ]
+    kho = tao_kho(cac_dong)
+    kho.bang_tong_hop('ten_gv')  # Ghi nhớ trên kho cũ không được lọt sang kho mới
+
+    # Bỏ hết buổi tháng 12 và thêm tháng trước (10/2025) lẫn năm mới (01/2026), giảng viên và lớp mới
+    them = [
+        ("20/10/2025", "ThS. An", "Lớp Thẩm định viên", "Chuyên đề 6"),
+        ("05/01/2026", "PGS. TS. Dũng", "Lớp Xây dựng NTM", "Chuyên đề 7", 6),
+    ]
+    moi = kho.ap_dung_thay_doi(kho.phien_ban, [3, 4], tao_kho(them).bang(), {'invalid_dates': [], 'total_rows': 5})
+    dung_lai = tao_kho(cac_dong[:3] + them)
+
+    assert moi.cac_nam() == dung_lai.cac_nam() == [2025, 2026]
+    for cot in ('ten_gv', 'don_vi', 'ten_lop'):
+        assert moi.tong_theo(cot) == dung_lai.tong_theo(cot)
+        for chi_so in ('so_tiet', 'so_buoi'):
+            for nam in (None, 2025, 2026):
+                assert moi.bang_tong_hop(cot, chi_so, nam).sort_index().to_dict() == (
+                    dung_lai.bang_tong_hop(cot, chi_so, nam).sort_index().to_dict()
+                )
+    assert list(moi.bang_tong_hop('ten_gv')) == ["10/2025", "11/2025", "01/2026", "Tổng"]
+    assert moi.tong_theo('ten_gv')["TS. Bình"] == (1, 4.0)
+
+
+def test_tim_kiem_khong_dau_xep_hang(tao_kho):
+    kho = tao_kho([
+        ("03/11/2025", "ThS. An", "Lớp Chính sách công", "Chuyên đề 1"),
+        ("04/11/2025", "ThS. An", "Lớp Chính sách công", "Chính sách công"),
+        ("05/11/2025", "TS. Bình", "Lớp Xây dựng NTM", "Chính sách công và pháp luật"),
+        ("06/11/2025", "TS. Bình", "Lớp Xây dựng NTM", "Kinh tế nông nghiệp"),
+    ])
+
+    # Chứa nguyên từ khóa; bắt đầu bằng từ khóa trước, rồi giá trị ngắn hơn
+    ket_qua = kho.tim_kiem("chinh sach cong")
+    assert [(kq['cot'], kq['gia_tri'], kq['so_buoi']) for kq in ket_qua] == [
+        ('ten_chuyen_de', "Chính sách công", 1),
+        ('ten_chuyen_de', "Chính sách công và pháp luật", 1),
+        ('ten_lop', "Lớp Chính sách công", 2),
+        ('don_vi', "Khoa Chính sách công", 4),
+    ]
+    assert kho.tim_kiem("CHÍNH SÁCH CÔNG") == ket_qua
+    assert len(kho.tim_kiem("chinh sach cong", gioi_han=2)) == 2
+
+    # Gõ sai nhẹ: khớp theo tỷ lệ n-gram, chứa nguyên từ khóa vẫn xếp trước
+    gan_dung = kho.tim_kiem("chinh sach cing")
+    assert {kq['gia_tri'] for kq in gan_dung} == {kq['gia_tri'] for kq in ket_qua}
+    assert all(0.7 <= kq['diem'] < 1 for kq in gan_dung)
+    assert [kq['gia_tri'] for kq in kho.tim_kiem("kinh te nong nghep")] == ["Kinh tế nông nghiệp"]
+    assert [kq['gia_tri'] for kq in kho.tim_kiem("nt")] == ["Lớp Xây dựng NTM"]  # Ngắn hơn một n-gram
+    assert kho.tim_kiem("xyz") == kho.tim_kiem("  ") == []
+
+    # Lọc buổi theo kết quả tìm: khớp ở bất kỳ cột nào, trong tập đã lọc
+    chuyen_de = [kq for kq in ket_qua if kq['cot'] == 'ten_chuyen_de']
+    assert kho.loc_theo_tim_kiem(kho.loc(), chuyen_de).tolist() == [1, 2]
+    assert kho.loc_theo_tim_kiem(kho.loc(filter_gv="TS. Bình"), chuyen_de).tolist() == [2]
+    assert kho.loc_theo_tim_kiem(kho.loc(), kho.tim_kiem("lop chinh sach", gioi_han=1)).tolist() == [0, 1]
+    assert kho.loc_theo_tim_kiem(kho.loc(), []).tolist() == []
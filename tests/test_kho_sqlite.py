@@ -0,0 +1,99 @@
+"""KhoSQLite trả cùng kết quả với KhoSuKien trên cùng dữ liệu (so theo mã buổi, id hai kho khác nhau)"""
+
+import os
+from datetime import date
+
+from lich_giang_day.doc_file import xu_ly_bang_thongke
+from lich_giang_day.kho import KhoSuKien
+from lich_giang_day.kho_sqlite import KhoSQLite
+from lich_giang_day.tai_lieu_tkb import chu_ky_tai_lieu
+
+from conftest import bang_thongke
+from test_tai_lieu_tkb import tao_docx
+
+CAC_DONG = [
+    ("03/11/2025", "TS. Bình", "Lớp Hợp tác xã", "Chuyên đề 1", 4, "170"),
+    ("03/11/2025", "TS. Bình", "Lớp Khuyến nông", "Chuyên đề 2", 4, "164"),     # Trùng lịch với dòng trên
+    ("04/11/2025", "ThS. An", "Lớp Khuyến nông", "Chuyên đề 3", 8, "164"),
+    ("04/11/2025", "ThS. An", "Lớp Khuyến nông", "Chuyên đề 3", 8, "164"),      # Buổi lặp giống hệt
+    ("05/11/2025", "ThS. An", "Lớp Khuyến nông", "Chính sách công", 8, "164"),
+    ("06/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 5", 8, ""),
+    ("07/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 6", 10, ""),      # Quá tải tuần 03–09/11
+    ("02/12/2025", "ThS. Cường", "Lớp Chính sách công", "Chuyên đề 7", 6, "175"),
+    ("05/01/2026", "ThS. Cường", "Lớp Chính sách công", "Chuyên đề 8", "6,5", "175"),  # Số tiết không phải số
+]
+
+
+def _hai_kho(thu_muc, db_path):
+    tao_docx(os.path.join(thu_muc, "164_KHUYEN_NONG.docx"), "THỜI KHÓA BIỂU")
+    filepath = os.path.join(thu_muc, "ThongKeTKB_test.xlsx")
+    phien_ban = (1, 1, chu_ky_tai_lieu(thu_muc))
+    ket_qua = xu_ly_bang_thongke(bang_thongke(CAC_DONG), thu_muc)
+    # Nguồn khác nhập trước trong cùng db: id buổi lệch, truy vấn không được lẫn nguồn
+    KhoSQLite(db_path, "ThongKeTKB_khac.xlsx", phien_ban, lambda: [
+        xu_ly_bang_thongke(bang_thongke([("03/11/2025", "TS. Bình", "Lớp khác", "Chuyên đề khác")]), thu_muc)
+    ])
+    return KhoSuKien(filepath, phien_ban, ket_qua), KhoSQLite(db_path, filepath, phien_ban, lambda: [ket_qua])
+
+
+def _bang(bang):
+    return bang.sort_index().to_dict()
+
+
+def test_kho_sqlite_giong_kho_bo_nho(thu_muc, tmp_path):
+    kho, sql = _hai_kho(thu_muc, str(tmp_path / "db" / "lich.sqlite"))
+
+    assert len(sql) == len(kho) == len(CAC_DONG)
+    assert sql.cac_nam() == kho.cac_nam() == [2025, 2026]
+    assert sql.cac_lop() == kho.cac_lop()
+    for cot in ('ten_gv', 'don_vi', 'ten_lop'):
+        assert sql.danh_sach(cot) == kho.danh_sach(cot)
+        assert sql.tong_theo(cot) == kho.tong_theo(cot)
+        for chi_so in ('so_tiet', 'so_buoi'):
+            assert _bang(sql.bang_tong_hop(cot, chi_so)) == _bang(kho.bang_tong_hop(cot, chi_so))
+            assert _bang(sql.bang_tong_hop(cot, chi_so, 2026)) == _bang(kho.bang_tong_hop(cot, chi_so, 2026))
+
+    # Lọc, khoảng ngày, payload: cùng buổi, cùng thứ tự
+    for loc in ({}, {'filter_gv': "ThS. An"}, {'filter_lop': "Lớp Khuyến nông", 'filter_gv': "ThS. An"}):
+        ids_sql, ids = sql.loc(**loc), kho.loc(**loc)
+        assert sql.ma_buoi(ids_sql) == kho.ma_buoi(ids)
+        assert sql.tong_theo('ten_lop', ids_sql) == kho.tong_theo('ten_lop', ids)
+        khoang_sql = sql.trong_khoang(date(2025, 11, 4), date(2025, 12, 31), ids_sql)
+        khoang = kho.trong_khoang(date(2025, 11, 4), date(2025, 12, 31), ids)
+        assert sql.ma_buoi(khoang_sql) == kho.ma_buoi(khoang)
+        assert [{k: v for k, v in p.items() if k != 'id'} for p in sql.payload(khoang_sql)] == (
+            [{k: v for k, v in p.items() if k != 'id'} for p in kho.payload(khoang)]
+        )
+
+    # Từng buổi: tìm theo mã, chi tiết, cảnh báo xung đột
+    for i, ma in enumerate(kho.ma_buoi(range(len(kho)))):
+        id_sql = sql.tim_buoi(ma)
+        assert sql.ma_buoi([id_sql]) == [ma]
+        assert sql.chi_tiet(id_sql) == kho.chi_tiet(i)
+        assert sql.canh_bao(id_sql) == kho.canh_bao(i)
+    assert sql.bao_cao_trung_lich().to_dict('records') == kho.bao_cao_trung_lich().to_dict('records')
+    assert sql.bao_cao_qua_tai().to_dict('records') == kho.bao_cao_qua_tai().to_dict('records')
+    assert len(kho.bao_cao_trung_lich()) == len(kho.bao_cao_qua_tai()) == 1
+
+    # Thống kê file TKB theo lớp
+    for khoa in ('so_co_file', 'so_thieu_file', 'total_rows', 'invalid_dates'):
+        assert sql.thong_ke[khoa] == kho.thong_ke[khoa]
+    assert sql.thong_ke['so_co_file'] == 4
+    assert sql.thong_ke['lop_tkb'].to_dict('records') == kho.thong_ke['lop_tkb'].to_dict('records')
+
+    # Tìm kiếm không dấu
+    ket_qua_tim = sql.tim_kiem("chinh sach cong")
+    assert ket_qua_tim == kho.tim_kiem("chinh sach cong") and ket_qua_tim
+    assert sql.ma_buoi(sql.loc_theo_tim_kiem(sql.loc(), ket_qua_tim)) == (
+        kho.ma_buoi(kho.loc_theo_tim_kiem(kho.loc(), ket_qua_tim))
+    )
+
+
+def test_kho_sqlite_khong_nhap_lai_cung_phien_ban(thu_muc, tmp_path):
+    db_path = str(tmp_path / "db" / "lich.sqlite")
+    kho, sql = _hai_kho(thu_muc, db_path)
+
+    mo_lai = KhoSQLite(db_path, sql.filepath, sql.phien_ban, lambda: 1 / 0)  # Không được đọc lại file
+
+    assert len(mo_lai) == len(kho)
+    assert mo_lai.tong_theo('ten_gv') == kho.tong_theo('ten_gv')
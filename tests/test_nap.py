@@ -0,0 +1,81 @@
+"""Cập nhật tăng dần (cap_nhat_kho) phải cho cùng kết quả với dựng lại toàn bộ kho"""
+
+import pytest
+
+from lich_giang_day import nap
+from lich_giang_day.doc_file import lam_sach_bang_thongke
+
+from conftest import bang_thongke
+
+BAN_DAU = [
+    ("03/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 1"),
+    ("04/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 2"),
+    ("05/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 3"),
+    ("06/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 4"),
+    ("07/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 5"),
+    ("03/11/2025", "TS. Bình", "Lớp Hợp tác xã", "Chuyên đề 6", 4),
+    ("03/11/2025", "TS. Bình", "Lớp Khuyến nông", "Chuyên đề 7", 4),
+    ("10/11/2025", "ThS. Cường", "Lớp Hợp tác xã", "Chuyên đề 8"),
+    ("10/11/2025", "ThS. Cường", "Lớp Hợp tác xã", "Chuyên đề 8"),
+]
+
+
+def _tom_tat(kho):
+    """Mọi kết quả kho trả ra ngoài, không phụ thuộc thứ tự buổi trong kho"""
+    bang = kho.bang()
+    cac_buoi = sorted(
+        (str(bang['ngay'][i].date()), bang['ten_gv'][i], bang['ten_lop'][i], bang['ten_chuyen_de'][i],
+         float(bang['so_tiet'][i]), tuple(kho.canh_bao(i)))
+        for i in range(len(kho))
+    )
+    ngay = bang['ngay'].to_numpy().astype('datetime64[D]')
+    bat_dau, ket_thuc = (ngay.min(), ngay.max() + 1) if len(ngay) else ('2025-01-01', '2025-01-02')
+    return {
+        'so_buoi': len(kho),
+        'cac_buoi': cac_buoi,
+        'thu_tu_ngay': ngay[kho.trong_khoang(bat_dau, ket_thuc)].tolist(),
+        'tong_theo': {cot: kho.tong_theo(cot) for cot in ('ten_gv', 'don_vi', 'ten_lop')},
+        'danh_sach': {cot: kho.danh_sach(cot) for cot in ('ten_gv', 'don_vi', 'ten_lop')},
+        'bang_tong_hop': kho.bang_tong_hop('ten_gv').to_dict(),
+        'trung_lich': kho.bao_cao_trung_lich().to_dict('records'),
+        'qua_tai': kho.bao_cao_qua_tai().to_dict('records'),
+        'so_thieu_file': kho.thong_ke['so_thieu_file'],
+        'lop_tkb': sorted(map(tuple, kho.thong_ke['lop_tkb'].astype(str).values.tolist())),
+        'total_rows': kho.thong_ke['total_rows'],
+    }
+
+
+@pytest.mark.parametrize("moi", [
+    # Thêm: buổi thứ 6 trong tuần của An (quá tải), giảng viên và tháng mới
+    BAN_DAU + [
+        ("08/11/2025", "ThS. An", "Lớp Xây dựng NTM", "Chuyên đề 9"),
+        ("02/12/2025", "PGS. TS. Dũng", "Lớp Thẩm định viên", "Chuyên đề 10", 6),
+    ],
+    # Xóa: bỏ buổi gây trùng lịch của Bình và một trong hai dòng giống hệt nhau của Cường
+    BAN_DAU[:6] + BAN_DAU[7:8],
+    # Vừa thêm vừa xóa, đổi thứ tự dòng
+    [BAN_DAU[8], BAN_DAU[0], ("03/11/2025", "ThS. An", "Lớp Hợp tác xã", "Chuyên đề 11")] + BAN_DAU[2:6],
+    # Xóa hết
+    [],
+], ids=["them", "xoa", "them_va_xoa", "rong"])
+def test_cap_nhat_kho_giong_dung_lai(monkeypatch, thu_muc, tao_kho, moi):
+    kho_cu = tao_kho(BAN_DAU, (1, 1))
+    monkeypatch.setattr(nap, 'doc_bang_sach', lambda filepath: lam_sach_bang_thongke(bang_thongke(moi)))
+
+    kho_moi = nap.cap_nhat_kho(kho_cu, kho_cu.filepath, (2, 2, kho_cu.phien_ban[-1]))
+    dung_lai = tao_kho(moi, (2, 2))
+
+    assert _tom_tat(kho_moi) == _tom_tat(dung_lai)
+    assert kho_moi.thong_ke['so_them'] - kho_moi.thong_ke['so_xoa'] == len(moi) - len(BAN_DAU)
+
+
+def test_cap_nhat_kho_chi_doi_phan_khac(monkeypatch, tao_kho):
+    kho_cu = tao_kho(BAN_DAU, (1, 1))
+    moi = BAN_DAU[1:] + [("11/11/2025", "ThS. Cường", "Lớp Hợp tác xã", "Chuyên đề 12")]
+    monkeypatch.setattr(nap, 'doc_bang_sach', lambda filepath: lam_sach_bang_thongke(bang_thongke(moi)))
+
+    kho_moi = nap.cap_nhat_kho(kho_cu, kho_cu.filepath, (2, 2, kho_cu.phien_ban[-1]))
+
+    assert (kho_moi.thong_ke['so_them'], kho_moi.thong_ke['so_xoa']) == (1, 1)
+    assert kho_cu.tong_theo('ten_gv')["ThS. An"] == (5, 40.0)  # Kho cũ không bị sửa
+    assert kho_moi.tong_theo('ten_gv')["ThS. An"] == (4, 32.0)
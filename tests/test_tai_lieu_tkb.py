@@ -0,0 +1,76 @@
+"""Tìm file TKB gốc cho lớp: theo tên file, theo mã lớp / tên lớp ghi trong nội dung file, ghim thủ công"""
+
+import os
+import zipfile
+
+from lich_giang_day import tai_lieu_tkb
+from lich_giang_day.tai_lieu_tkb import (
+    bang_khop_lop,
+    bo_ghim_lop,
+    chu_ky_tai_lieu,
+    doc_ghim_lop,
+    ghim_lop,
+    tim_file_cho_cac_lop,
+)
+
+
+def tao_docx(path, *cac_doan):
+    """File DOCX tối thiểu: mỗi đoạn văn một <w:p>"""
+    than = "".join(f"<w:p><w:r><w:t>{doan}</w:t></w:r></w:p>" for doan in cac_doan)
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('word/document.xml', f'<w:document><w:body>{than}</w:body></w:document>')
+    return path
+
+
+def test_khop_theo_noi_dung_va_ten_file(thu_muc):
+    theo_ma = tao_docx(os.path.join(thu_muc, "TKB_dot_1.docx"), "THỜI KHÓA BIỂU", "Mã lớp: 175-2025")
+    theo_ten = tao_docx(
+        os.path.join(thu_muc, "TKB_dot_2.docx"),
+        "THỜI KHÓA BIỂU", "LỚP BỒI DƯỠNG THẨM ĐỊNH VIÊN VỀ GIÁ",
+    )
+    theo_ten_file = tao_docx(os.path.join(thu_muc, "164_KHUYEN_NONG.docx"), "Không có mã")
+
+    assert tim_file_cho_cac_lop([
+        ("175-2025", "Lớp gì đó"),
+        ("", "Lớp bồi dưỡng thẩm định viên về giá"),
+        ("164", "Lớp khuyến nông"),
+        ("999", "Lớp không có file"),
+    ], thu_muc) == [theo_ma, theo_ten, theo_ten_file, None]
+
+
+def test_chu_ky_bo_tai_lieu_tinh_mot_lan_moi_luot(monkeypatch, thu_muc):
+    for i in range(5):
+        tao_docx(os.path.join(thu_muc, f"TKB_{i}.docx"), f"Mã lớp: {i}00")
+    so_lan = []
+    goc = tai_lieu_tkb._chu_ky_bo_tai_lieu
+    monkeypatch.setattr(tai_lieu_tkb, '_chu_ky_bo_tai_lieu', lambda t: so_lan.append(t) or goc(t))
+
+    cac_lop = [(f"{i}00", f"Lớp {i}") for i in range(5)] + [("x", f"Lớp khác {i}") for i in range(20)]
+    ket_qua = tim_file_cho_cac_lop(cac_lop, thu_muc)
+
+    assert ket_qua[:5] == [os.path.join(thu_muc, f"TKB_{i}.docx") for i in range(5)]
+    assert len(so_lan) == 1
+
+
+def test_ghim_lop_thang_tim_tu_dong(thu_muc, tao_kho):
+    tu_dong = tao_docx(os.path.join(thu_muc, "TKB_dot_1.docx"), "THỜI KHÓA BIỂU", "Mã lớp: 175-2025")
+    khac = tao_docx(os.path.join(thu_muc, "TKB_khac.docx"), "THỜI KHÓA BIỂU")
+    lop = ("175-2025", "Lớp thẩm định viên")
+    chu_ky = chu_ky_tai_lieu(thu_muc)
+    assert tim_file_cho_cac_lop([lop], thu_muc) == [tu_dong]
+
+    ghim_lop(thu_muc, *lop, khac)
+    assert doc_ghim_lop(thu_muc) == {lop: khac}
+    assert chu_ky_tai_lieu(thu_muc) != chu_ky  # Kho dựng lại theo ghim mới
+    assert tim_file_cho_cac_lop([lop, ("", "Lớp khác")], thu_muc) == [khac, None]
+    kho = tao_kho([("03/11/2025", "ThS. An", lop[1], "Chuyên đề 1", 8, lop[0])])
+    assert bang_khop_lop(kho, thu_muc)[['file', 'nguon']].values.tolist() == [["TKB_khac.docx", "ghim"]]
+
+    ghim_lop(thu_muc, *lop, None)  # Ghim "không có file"
+    assert tim_file_cho_cac_lop([lop], thu_muc) == [None]
+
+    bo_ghim_lop(thu_muc, *lop)
+    assert doc_ghim_lop(thu_muc) == {}
+    assert chu_ky_tai_lieu(thu_muc) == chu_ky
+    assert tim_file_cho_cac_lop([lop], thu_muc) == [tu_dong]
+    assert bang_khop_lop(kho, thu_muc)['nguon'].tolist() == ["tự động"]
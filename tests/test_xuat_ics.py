@@ -0,0 +1,92 @@
+"""File ICS: đúng cú pháp RFC 5545 (CRLF, gập dòng 75 byte, escape) và UID ổn định theo nội dung buổi"""
+
+import os
+import re
+
+import numpy as np
+
+from xuat_ics import ghi_feed, ten_file_an_toan
+
+CAC_DONG = [
+    ("03/11/2025", "ThS. Nguyễn Thị Phương Lam", "Lớp Bồi dưỡng; kỹ năng, nghiệp vụ hợp tác xã nông nghiệp",
+     "Chuyên đề: Luật Hợp tác xã, quản trị và phát triển bền vững chuỗi giá trị nông sản", 4, "175"),
+    ("03/11/2025", "ThS. Nguyễn Thị Phương Lam", "Lớp Bồi dưỡng; kỹ năng, nghiệp vụ hợp tác xã nông nghiệp",
+     "Chuyên đề: Luật Hợp tác xã, quản trị và phát triển bền vững chuỗi giá trị nông sản", 4, "175"),
+    ("04/11/2025", "ThS. Nguyễn Thị Phương Lam", "Lớp Khuyến nông", "Chuyên đề 2", 8, "164"),
+]
+
+
+def _ghi(kho, path):
+    ghi_feed(kho, path, "Lịch giảng: ThS. Nguyễn Thị Phương Lam", np.arange(len(kho)), 'giang_vien')
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _mo_gap(du_lieu):
+    """Các dòng logic (đã nối dòng gập) của file ICS"""
+    return du_lieu.decode('utf-8').replace("\r\n ", "").split("\r\n")[:-1]
+
+
+def _cac_su_kien(dong):
+    """Mỗi VEVENT → dict thuộc tính (tên trước ':' / ';' → giá trị)"""
+    cac_su_kien, hien_tai = [], None
+    for d in dong:
+        if d == "BEGIN:VEVENT":
+            hien_tai = {}
+        elif d == "END:VEVENT":
+            cac_su_kien.append(hien_tai)
+            hien_tai = None
+        elif hien_tai is not None:
+            ten, gia_tri = re.match(r'([A-Z-]+)[;:](.*)', d).groups()
+            hien_tai[ten] = gia_tri
+    return cac_su_kien
+
+
+def test_ghi_feed_dung_rfc_5545(tmp_path, tao_kho):
+    du_lieu = _ghi(tao_kho(CAC_DONG), str(tmp_path / "giang_vien" / "lam.ics"))
+
+    assert du_lieu.endswith(b"\r\n")
+    assert b"\n" not in du_lieu.replace(b"\r\n", b"")
+    for dong in du_lieu.split(b"\r\n"):
+        assert len(dong) <= 75
+        dong.decode('utf-8')  # Gập dòng không cắt giữa ký tự nhiều byte
+    assert any(dong.startswith(b" ") for dong in du_lieu.split(b"\r\n"))
+
+    dong = _mo_gap(du_lieu)
+    assert dong[0] == "BEGIN:VCALENDAR" and dong[-1] == "END:VCALENDAR"
+    assert "VERSION:2.0" in dong and any(d.startswith("PRODID:") for d in dong)
+    assert dong.count("BEGIN:VEVENT") == dong.count("END:VEVENT") == 3
+
+    cac_su_kien = _cac_su_kien(dong)
+    for su_kien in cac_su_kien:
+        assert {'UID', 'DTSTAMP', 'DTSTART', 'DTEND', 'SUMMARY'} <= su_kien.keys()
+        assert re.fullmatch(r'\d{8}T\d{6}Z', su_kien['DTSTAMP'])
+    assert cac_su_kien[0]['DTSTART'] == "VALUE=DATE:20251103"
+    assert cac_su_kien[0]['DTEND'] == "VALUE=DATE:20251104"
+    assert cac_su_kien[0]['SUMMARY'] == (
+        "Chuyên đề: Luật Hợp tác xã\\, quản trị và phát triển bền vững chuỗi giá trị nông sản"
+    )
+    assert "Lớp: Lớp Bồi dưỡng\\; kỹ năng\\, nghiệp vụ" in cac_su_kien[0]['DESCRIPTION']
+    assert "\\n" in cac_su_kien[0]['DESCRIPTION']
+
+
+def test_uid_on_dinh_va_khong_trung(tmp_path, tao_kho):
+    uid = [s['UID'] for s in _cac_su_kien(_mo_gap(_ghi(tao_kho(CAC_DONG), str(tmp_path / "a.ics"))))]
+    # Đổi thứ tự dòng và thêm buổi khác: UID của các buổi cũ không đổi
+    uid_sau = [s['UID'] for s in _cac_su_kien(_mo_gap(_ghi(
+        tao_kho([CAC_DONG[2], ("05/11/2025", "ThS. Nguyễn Thị Phương Lam", "Lớp Khuyến nông", "Chuyên đề 3")]
+                + CAC_DONG[:2]),
+        str(tmp_path / "b.ics"),
+    )))]
+
+    assert len(set(uid)) == 3
+    assert uid[0].endswith("-0@lich-giang-day") and uid[1].endswith("-1@lich-giang-day")
+    assert uid[0].split('-')[0] == uid[1].split('-')[0]  # Hai buổi giống hệt: cùng hash, khác số lần
+    assert set(uid) <= set(uid_sau) and len(set(uid_sau)) == 4
+    assert not os.path.exists(str(tmp_path / "a.ics") + f".{os.getpid()}.tmp")
+
+
+def test_ten_file_an_toan():
+    assert ten_file_an_toan("ThS. Lê Thu Thảo") == "ths-le-thu-thao"
+    assert ten_file_an_toan("TS. Đặng Văn Ho\u0300a") == "ts-dang-van-hoa"  # "ò" dạng tổ hợp NFD
+    assert ten_file_an_toan("???") == "khong-ten"
@@ -0,0 +1,254 @@
+"""
+Xuất lịch giảng dạy ra file ICS (iCalendar) — chạy không cần giao diện Streamlit.
+
+Mỗi giảng viên một file (ics/giang_vien/*.ics), mỗi đơn vị một file (ics/don_vi/*.ics)
+để nhập vào Google Calendar / Outlook. Dữ liệu đọc qua lõi lich_giang_day như trang
+Streamlit (cache đĩa, gộp nhiều file ThongKeTKB). Chỉ ghi lại các file có buổi thay đổi
+so với lần chạy trước (so hash nội dung lưu trong .ics_manifest.json); các file
+cần ghi được ghi song song, từng sự kiện một (không dựng cả file trong bộ nhớ).
+
+Chạy:
+    python xuat_ics.py                         # các file ThongKeTKB trong thư mục hiện tại
+    python xuat_ics.py ThongKeTKB_a.xlsx --dau-ra /var/www/ics
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from lich_giang_day.chuan_hoa import bo_dau
+from lich_giang_day.doc_file import doc_events_co_cache, doc_nhieu_file_thongke, tim_cac_file_thongke
+from lich_giang_day.kho import KhoSuKien
+from lich_giang_day.song_song import _tao_pool
+
+PHIEN_BAN_ICS = 1            # Tăng khi đổi định dạng file ICS (ghi lại mọi file)
+FILE_MANIFEST = ".ics_manifest.json"
+MIEN_UID = "lich-giang-day"
+
+# Loại feed: (thư mục con, cột nhóm, tiền tố tên lịch)
+CAC_LOAI_FEED = (
+    ('giang_vien', 'ten_gv', "Lịch giảng"),
+    ('don_vi', 'don_vi', "Lịch giảng đơn vị"),
+)
+
+_kho_xuat = None  # Kho đang xuất (tiến trình con sinh bằng fork dùng lại, không phải gửi qua pipe)
+
+
+# ============================================================================
+# PHẦN 1: ĐỊNH DẠNG ICS
+# ============================================================================
+
+def _thoat_ics(text):
+    """Escape giá trị TEXT theo RFC 5545"""
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _gap_dong(dong):
+    """Dòng ICS dạng bytes, gập nếu dài quá 75 byte (RFC 5545), không cắt giữa ký tự UTF-8"""
+    du_lieu = dong.encode('utf-8')
+    if len(du_lieu) <= 75:
+        return du_lieu + b"\r\n"
+    cac_doan, dau, gioi_han = [], 0, 75
+    while len(du_lieu) - dau > gioi_han:
+        cuoi = dau + gioi_han
+        while du_lieu[cuoi] & 0xC0 == 0x80:  # Byte nối của ký tự nhiều byte: lùi về đầu ký tự
+            cuoi -= 1
+        cac_doan.append(du_lieu[dau:cuoi])
+        dau, gioi_han = cuoi, 74  # Dòng nối bắt đầu bằng 1 dấu cách
+    cac_doan.append(du_lieu[dau:])
+    return b"\r\n ".join(cac_doan) + b"\r\n"
+
+
+def ten_file_an_toan(ten):
+    """Tên file ASCII từ tên tiếng Việt: "ThS. Lê Thu Thảo" → "ths-le-thu-thao" """
+    ten = bo_dau(str(ten))
+    return re.sub(r'[^a-z0-9]+', '-', ten).strip('-') or "khong-ten"
+
+
+def _su_kien_ics(kho, i, uid, dtstamp, loai):
+    """Các dòng VEVENT của buổi i"""
+    ct = kho.chi_tiet(int(i))
+    ngay = datetime.strptime(ct['ngay_str'], "%d/%m/%Y").date()
+    if loai == 'giang_vien':
+        tieu_de = ct['ten_chuyen_de'] or ct['ten_lop']
+    else:
+        tieu_de = f"{ct['ten_gv']}: {ct['ten_chuyen_de'] or ct['ten_lop']}"
+    mo_ta = [f"Lớp: {ct['ten_lop']}"]
+    if ct['ma_lop']:
+        mo_ta.append(f"Mã lớp: {ct['ma_lop']}")
+    mo_ta += [f"Giảng viên: {ct['ten_gv']}", f"Đơn vị: {ct['don_vi']}", f"Số tiết: {ct['so_tiet']}"]
+    if ct['tro_giang']:
+        mo_ta.append(f"Trợ giảng: {ct['tro_giang']}")
+    if ct['file_goc']:
+        mo_ta.append(f"TKB gốc: {os.path.basename(ct['file_goc'])}")
+
+    yield "BEGIN:VEVENT"
+    yield f"UID:{uid}"
+    yield f"DTSTAMP:{dtstamp}"
+    yield f"DTSTART;VALUE=DATE:{ngay:%Y%m%d}"
+    yield f"DTEND;VALUE=DATE:{ngay + timedelta(days=1):%Y%m%d}"
+    yield f"SUMMARY:{_thoat_ics(tieu_de)}"
+    yield f"DESCRIPTION:{_thoat_ics(chr(10).join(mo_ta))}"
+    if ct['don_vi']:
+        yield f"CATEGORIES:{_thoat_ics(ct['don_vi'])}"
+    yield "END:VEVENT"
+
+
+def hash_feed(kho, ids):
+    """
+    Hash nội dung một feed từ hash từng buổi của kho (không cần dựng file ICS):
+    không phụ thuộc thứ tự dòng trong file Excel.
+    """
+    khoa = kho.khoa_dong(ids)
+    thu_tu = np.argsort(khoa, kind='stable')
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((PHIEN_BAN_ICS, len(ids))).encode('utf-8'))
+    h.update(khoa[thu_tu].tobytes())
+    # Tên file TKB gốc có trong mô tả nhưng không nằm trong hash từng buổi
+    h.update('\0'.join(map(str, kho.gia_tri_cot('file_goc', np.asarray(ids)[thu_tu]))).encode('utf-8'))
+    return h.hexdigest()
+
+
+def ghi_feed(kho, path, ten_lich, ids, loai):
+    """Ghi một file ICS: ghi từng sự kiện ra file tạm rồi đổi tên"""
+    dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    lan_xuat_hien = {}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for dong in (
+            "BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:-//{MIEN_UID}//z3//VI",
+            "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_thoat_ics(ten_lich)}", "X-WR-TIMEZONE:Asia/Ho_Chi_Minh",
+        ):
+            f.write(_gap_dong(dong))
+        for i, khoa in zip(ids, kho.khoa_dong(ids).tolist()):
+            # UID ổn định theo nội dung buổi (+ số lần lặp nếu có buổi giống hệt)
+            lan = lan_xuat_hien.get(khoa, 0)
+            lan_xuat_hien[khoa] = lan + 1
+            uid = f"{khoa:016x}-{lan}@{MIEN_UID}"
+            for dong in _su_kien_ics(kho, i, uid, dtstamp, loai):
+                f.write(_gap_dong(dong))
+        f.write(_gap_dong("END:VCALENDAR"))
+    os.replace(tmp_path, path)
+
+
+def _ghi_cac_feed(cac_viec):
+    """Việc của một tiến trình con: ghi các feed (đường dẫn, tên lịch, chỉ số, loại)"""
+    for path, ten_lich, ids, loai in cac_viec:
+        ghi_feed(_kho_xuat, path, ten_lich, ids, loai)
+    return len(cac_viec)
+
+
+# ============================================================================
+# PHẦN 2: XUẤT
+# ============================================================================
+
+def nap_kho(cac_file):
+    """Nạp kho sự kiện từ một hoặc nhiều file ThongKeTKB (qua cache đĩa)"""
+    cac_file = [os.path.abspath(f) for f in cac_file]
+    if len(cac_file) == 1:
+        ket_qua = doc_events_co_cache(cac_file[0])
+    else:
+        ket_qua = doc_nhieu_file_thongke(cac_file)
+    return KhoSuKien(cac_file[0], None, ket_qua)
+
+
+def xuat_ics(kho, dau_ra, so_tien_trinh=None, ghi_tat_ca=False):
+    """
+    Xuất feed ICS theo giảng viên và đơn vị vào thư mục `dau_ra`.
+    Chỉ ghi feed mới/đổi (hoặc tất cả nếu `ghi_tat_ca`), xóa feed không còn buổi nào.
+    Trả về dict: ghi, giu_nguyen, xoa.
+    """
+    global _kho_xuat
+    path_manifest = os.path.join(dau_ra, FILE_MANIFEST)
+    try:
+        with open(path_manifest, encoding='utf-8') as f:
+            manifest_cu = json.load(f)
+    except (OSError, ValueError):
+        manifest_cu = {}
+
+    manifest, can_ghi = {}, []
+    for thu_muc_con, cot, tien_to in CAC_LOAI_FEED:
+        da_dung = set()
+        for gia_tri, ids in kho.nhom_theo(cot):
+            ten = ten_file_an_toan(gia_tri)
+            if ten in da_dung:
+                # Hai tên khác nhau trùng sau khi bỏ dấu → thêm hash ngắn
+                ten = f"{ten}-{hashlib.blake2b(gia_tri.encode('utf-8'), digest_size=3).hexdigest()}"
+            da_dung.add(ten)
+            rel = f"{thu_muc_con}/{ten}.ics"
+            manifest[rel] = hash_feed(kho, ids)
+            path = os.path.join(dau_ra, rel)
+            if ghi_tat_ca or manifest_cu.get(rel) != manifest[rel] or not os.path.exists(path):
+                can_ghi.append((path, f"{tien_to}: {gia_tri}", ids, thu_muc_con))
+
+    # Ghi song song: chia đều các feed cho các tiến trình
+    _kho_xuat = kho
+    if len(can_ghi) > 1:
+        so_phan = min(len(can_ghi), so_tien_trinh or os.cpu_count() or 1)
+        cac_phan = [can_ghi[i::so_phan] for i in range(so_phan)]
+        with _tao_pool(so_phan, so_tien_trinh, chi_fork=True) as pool:
+            list(pool.map(_ghi_cac_feed, cac_phan))
+    else:
+        _ghi_cac_feed(can_ghi)
+
+    # Feed không còn buổi nào → xóa
+    so_xoa = 0
+    for rel in set(manifest_cu) - set(manifest):
+        try:
+            os.remove(os.path.join(dau_ra, rel))
+            so_xoa += 1
+        except OSError:
+            pass
+
+    os.makedirs(dau_ra, exist_ok=True)
+    tmp_path = f"{path_manifest}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=0)
+    os.replace(tmp_path, path_manifest)
+
+    return {'ghi': len(can_ghi), 'giu_nguyen': len(manifest) - len(can_ghi), 'xoa': so_xoa}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xuất lịch giảng dạy ra file ICS theo giảng viên và đơn vị")
+    parser.add_argument('cac_file', nargs='*',
+                        help="File ThongKeTKB (mặc định: mọi ThongKeTKB*.xlsx trong thư mục hiện tại)")
+    parser.add_argument('--dau-ra', default="ics", help="Thư mục ghi file ICS (mặc định: ./ics)")
+    parser.add_argument('--so-tien-trinh', type=int, help="Số tiến trình ghi song song")
+    parser.add_argument('--tat-ca', action='store_true', help="Ghi lại mọi file, kể cả không đổi")
+    args = parser.parse_args(argv)
+
+    cac_file = args.cac_file or tim_cac_file_thongke()
+    if not cac_file:
+        print("⚠️ Không tìm thấy file ThongKeTKB", file=sys.stderr)
+        return 1
+
+    bat_dau = time.perf_counter()
+    try:
+        kho = nap_kho(cac_file)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    ket_qua = xuat_ics(kho, args.dau_ra, args.so_tien_trinh, args.tat_ca)
+    print(
+        f"📅 {len(kho)} buổi → {args.dau_ra}: ghi {ket_qua['ghi']}, "
+        f"giữ nguyên {ket_qua['giu_nguyen']}, xóa {ket_qua['xoa']} file "
+        f"({time.perf_counter() - bat_dau:.1f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,336 +2,100 @@
 Ứng dụng Lịch Giảng Dạy - Streamlit
 Đọc dữ liệu từ file ThongKeTKB*.xlsx (xuất từ th1.py)
 Hiển thị dạng Calendar cho giảng viên dễ theo dõi
+
+Phần xử lý dữ liệu nằm trong gói lich_giang_day (không phụ thuộc Streamlit);
+file này chỉ còn giao diện.
 """
 
 import streamlit as st
-import pandas as pd
 import os
-import glob
-import re
-from datetime import datetime
-from streamlit_calendar import calendar
-
-# --- CẤU HÌNH TRANG ---
-st.set_page_config(
-    page_title="Lịch Giảng Dạy", 
-    page_icon="📅",
-    layout="wide"
+import json
+from datetime import date, datetime, timedelta
+
+from lich_giang_day.cau_hinh import (
+    COT_TIM_KIEM,
+    DO_HIEU_NANG,
+    DON_VI_COLORS,
+    DON_VI_SHORT,
+    FILE_LOG_HIEU_NANG,
+    GIOI_HAN_TIET_TUAN,
+    SQLITE_DB,
 )
+from lich_giang_day.cache import doc_file_tai_ve, luu_file_tai_len
+from lich_giang_day.hieu_nang import do_buoc, nhat_ky_hieu_nang
+from lich_giang_day.doc_file import chu_ky_du_lieu, tim_cac_file_thongke, tim_file_thongke
+from lich_giang_day.tai_lieu_tkb import bang_khop_lop, bo_ghim_lop, ghim_lop, lay_chi_muc_tkb
+from lich_giang_day.nap import lay_kho_gop, lay_kho_su_kien
 
-# --- CSS TÙY CHỈNH ---
-st.markdown("""
-    <style>
-    .fc-event-title {
-        font-weight: bold !important;
-        font-size: 11px !important;
-    }
-    .fc-daygrid-event {
-        white-space: normal !important;
-    }
-    .stDialog > div {
-        max-width: 700px !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-# --- MAPPING ĐƠN VỊ ---
-DON_VI_COLORS = {
-    "Khoa Chính sách công": "#4472C4",
-    "Khoa Phát triển nông thôn": "#70AD47",
-    "Khoa Quản trị kinh doanh nông nghiệp": "#ED7D31",
-    "Trung tâm Kinh tế hợp tác": "#9E480E",
-    "Trung tâm Đào tạo nông dân": "#7030A0",
-    "Giảng viên mời": "#808080",
-}
+# --- THEO DÕI THƯ MỤC DỮ LIỆU ---
+CHU_KY_THEO_DOI_GIAY = float(os.environ.get("LICH_GIANG_DAY_CHU_KY_THEO_DOI_GIAY", 5))
 
-DON_VI_SHORT = {
-    "Khoa Chính sách công": "CSC",
-    "Khoa Phát triển nông thôn": "PTNT",
-    "Khoa Quản trị kinh doanh nông nghiệp": "QTKDNN",
-    "Trung tâm Kinh tế hợp tác": "TT KTHT",
-    "Trung tâm Đào tạo nông dân": "TT ĐTND",
+# --- CALENDAR ---
+CHE_DO_LICH = {
+    "Tháng": "dayGridMonth",
+    "Tuần": "timeGridWeek",
+    "Danh sách": "listWeek",
 }
+LICH_PREFETCH_NGAY = 7  # Gửi thêm sự kiện trước/sau khoảng hiển thị
 
 
 # ============================================================================
-# PHẦN 1: CÁC HÀM XỬ LÝ DỮ LIỆU
+# PHẦN 1: HIỂN THỊ KẾT QUẢ ĐỌC DỮ LIỆU
 # ============================================================================
 
-def tim_file_thongke():
-    """Tìm file ThongKeTKB mới nhất trong thư mục"""
-    cwd = os.getcwd()
-    list_files = glob.glob(os.path.join(cwd, "ThongKeTKB*.xlsx"))
-    if not list_files:
-        return None
-    return max(list_files, key=os.path.getctime)
-
+def _bang_thieu_file(lop_tkb):
+    """Dòng hiển thị các lớp thiếu file TKB (từ thống kê theo lớp lop_tkb)"""
+    thieu = lop_tkb[lop_tkb['file_goc'].isna()]
+    ngay_dau = thieu['ngay_dau'].dt.strftime("%d/%m/%Y")
+    ngay_cuoi = thieu['ngay_cuoi'].dt.strftime("%d/%m/%Y")
+    return thieu.assign(
+        ma_lop=thieu['ma_lop'].replace('', 'N/A'),
+        ten_lop=thieu['ten_lop'].str[:50],  # Cắt ngắn để hiển thị
+        ngay=ngay_dau.where(ngay_dau == ngay_cuoi, ngay_dau + " – " + ngay_cuoi),
+    )[['ma_lop', 'ten_lop', 'ten_gv', 'ngay', 'so_buoi']]
 
-def chuan_hoa_text(text):
-    """
-    Chuẩn hóa text để so sánh:
-    - Loại bỏ dấu tiếng Việt
-    - Chuyển thành chữ thường
-    - Loại bỏ khoảng trắng thừa và ký tự đặc biệt
-    """
-    if not text or pd.isna(text):
-        return ""
-    
-    text = str(text).lower().strip()
-    
-    # Loại bỏ dấu tiếng Việt
-    replacements = {
-        'á': 'a', 'à': 'a', 'ả': 'a', 'ã': 'a', 'ạ': 'a',
-        'ă': 'a', 'ắ': 'a', 'ằ': 'a', 'ẳ': 'a', 'ẵ': 'a', 'ặ': 'a',
-        'â': 'a', 'ấ': 'a', 'ầ': 'a', 'ẩ': 'a', 'ẫ': 'a', 'ậ': 'a',
-        'é': 'e', 'è': 'e', 'ẻ': 'e', 'ẽ': 'e', 'ẹ': 'e',
-        'ê': 'e', 'ế': 'e', 'ề': 'e', 'ể': 'e', 'ễ': 'e', 'ệ': 'e',
-        'í': 'i', 'ì': 'i', 'ỉ': 'i', 'ĩ': 'i', 'ị': 'i',
-        'ó': 'o', 'ò': 'o', 'ỏ': 'o', 'õ': 'o', 'ọ': 'o',
-        'ô': 'o', 'ố': 'o', 'ồ': 'o', 'ổ': 'o', 'ỗ': 'o', 'ộ': 'o',
-        'ơ': 'o', 'ớ': 'o', 'ờ': 'o', 'ở': 'o', 'ỡ': 'o', 'ợ': 'o',
-        'ú': 'u', 'ù': 'u', 'ủ': 'u', 'ũ': 'u', 'ụ': 'u',
-        'ư': 'u', 'ứ': 'u', 'ừ': 'u', 'ử': 'u', 'ữ': 'u', 'ự': 'u',
-        'ý': 'y', 'ỳ': 'y', 'ỷ': 'y', 'ỹ': 'y', 'ỵ': 'y',
-        'đ': 'd',
-    }
-    
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-    
-    # Loại bỏ ký tự đặc biệt, chỉ giữ chữ và số
-    text = re.sub(r'[^\w\s]', '', text)
-    # Loại bỏ khoảng trắng thừa
-    text = re.sub(r'\s+', '', text)
-    
-    return text
 
+def _bang_co_file(lop_tkb):
+    """Dòng hiển thị các file TKB đã tìm thấy (mỗi file một dòng)"""
+    co = lop_tkb[lop_tkb['file_goc'].notna()]
+    return co.assign(
+        ten_lop=co['ten_lop'].str[:50],
+        file=co['file_goc'].map(os.path.basename),
+    )[['ma_lop', 'ten_lop', 'file']].drop_duplicates(subset=['file'])
 
-def trich_xuat_keywords_tu_ten_lop(ten_lop):
-    """
-    Trích xuất các từ khóa quan trọng từ tên lớp
-    VD: "LỚP TẬP HUẤN KIẾN THỨC KỸ NĂNG NGH'41" → ["41", "ngh", "kien", "thuc"]
-    """
-    if not ten_lop or pd.isna(ten_lop):
-        return []
-    
-    text = str(ten_lop).lower()
-    
-    # Tìm các số (mã lớp thường có số)
-    numbers = re.findall(r'\d+', text)
-    
-    # Tìm các từ viết tắt (chữ hoa liên tiếp)
-    abbreviations = re.findall(r'\b[A-Z]{2,}\b', str(ten_lop))
-    
-    # Chuẩn hóa text và tách thành từ
-    text_normalized = chuan_hoa_text(text)
-    
-    # Lấy các từ có ý nghĩa (bỏ qua "lop", "tap", "huan", etc.)
-    skip_words = {'lop', 'tap', 'huan', 'boi', 'duong', 'theo', 'tieu', 'chuan', 'chu'}
-    words = [w for w in re.findall(r'\w+', text_normalized) if w not in skip_words and len(w) >= 3]
-    
-    # Kết hợp tất cả keywords
-    keywords = numbers + [chuan_hoa_text(a) for a in abbreviations] + words[:5]
-    
-    return [k for k in keywords if k]  # Loại bỏ empty strings
 
+def hien_thi_thong_ke_tkb(ket_qua):
+    """Hiển thị thống kê file TKB (có/thiếu file theo lớp, ngày lỗi) của một lần đọc"""
+    import pandas as pd  # Đã nạp cùng kho dữ liệu
 
-def tim_file_tkb_goc(ma_lop, ten_lop, thu_muc="."):
-    """
-    Tìm file TKB gốc (PDF/DOCX) dựa trên mã lớp VÀ tên lớp.
-    Trả về đường dẫn file nếu tìm thấy.
-    CẢI TIẾN: Tìm kiếm thông minh theo cả mã lớp và tên lớp
-    """
-    # Tìm tất cả file PDF và DOCX trong thư mục
-    all_files = []
-    for ext in ['*.pdf', '*.PDF', '*.docx', '*.DOCX']:
-        all_files.extend(glob.glob(os.path.join(thu_muc, ext)))
-    
-    # Loại bỏ file ThongKeTKB (không phải TKB gốc)
-    all_files = [f for f in all_files if 'ThongKeTKB' not in os.path.basename(f)]
-    
-    if not all_files:
-        return None
-    
-    # BƯỚC 1: Tìm theo MÃ LỚP (nếu có)
-    if ma_lop and not pd.isna(ma_lop):
-        ma_lop_str = str(ma_lop).strip()
-        if ma_lop_str and ma_lop_str.lower() != 'nan':
-            ma_lop_lower = ma_lop_str.lower()
-            ma_lop_clean = re.sub(r'[^\w]', '', ma_lop_str).lower()
-            
-            # Tìm khớp chính xác mã lớp trong tên file
-            for file in all_files:
-                filename_lower = os.path.basename(file).lower()
-                filename_clean = re.sub(r'[^\w]', '', filename_lower)
-                
-                # Kiểm tra mã lớp có trong tên file
-                if ma_lop_lower in filename_lower or ma_lop_clean in filename_clean:
-                    return file
-    
-    # BƯỚC 2: Tìm theo TÊN LỚP (keywords)
-    if ten_lop and not pd.isna(ten_lop):
-        keywords = trich_xuat_keywords_tu_ten_lop(ten_lop)
-        
-        if keywords:
-            # Tính điểm khớp cho mỗi file
-            best_match = None
-            best_score = 0
-            
-            for file in all_files:
-                filename = os.path.basename(file)
-                filename_normalized = chuan_hoa_text(filename)
-                
-                # Đếm số keywords khớp
-                score = sum(1 for keyword in keywords if keyword in filename_normalized)
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = file
-            
-            # Chỉ trả về nếu có ít nhất 2 keywords khớp
-            if best_score >= 2:
-                return best_match
-    
-    return None
-
-
-def chuan_hoa_ngay(text):
-    """Chuẩn hóa ngày từ text thành datetime"""
-    if pd.isna(text):
-        return None
-    
-    # Nếu đã là datetime
-    if isinstance(text, datetime):
-        return text
-    
-    text_str = str(text)
-    
-    # Tìm pattern ngày/tháng/năm
-    match = re.search(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', text_str)
-    if match:
-        try:
-            day, month, year = map(int, match.groups())
-            return datetime(year, month, day)
-        except:
-            pass
-    
-    return None
-
-
-def doc_file_thongke(filepath):
-    """
-    Đọc file ThongKeTKB và chuyển thành danh sách events cho calendar.
-    CẢI TIẾN: Tìm file TKB theo cả mã lớp và tên lớp
-    """
-    try:
-        df = pd.read_excel(filepath)
-    except Exception as e:
-        st.error(f"Lỗi đọc file: {e}")
-        return []
-    
-    events = []
-    thu_muc = os.path.dirname(filepath)
-    
-    # Thống kê file TKB
-    missing_files = []
-    found_files = []
-    total_rows = 0
-    
-    # Các cột cần thiết
-    required_cols = ['Tên lớp', 'Thời gian', 'Tên chuyên đề', 'Tên giảng viên']
-    for col in required_cols:
-        if col not in df.columns:
-            st.error(f"Thiếu cột '{col}' trong file Excel")
-            return []
-    
-    for idx, row in df.iterrows():
-        # Parse ngày
-        ngay = chuan_hoa_ngay(row.get('Thời gian'))
-        if not ngay:
-            continue
-        
-        total_rows += 1
-        
-        # Lấy thông tin
-        ten_lop = str(row.get('Tên lớp', '')).strip()
-        ma_lop = str(row.get('Mã lớp', '')).strip() if pd.notna(row.get('Mã lớp')) else ''
-        ten_chuyen_de = str(row.get('Tên chuyên đề', '')).strip()
-        ten_gv = str(row.get('Tên giảng viên', '')).strip()
-        so_tiet = row.get('Số tiết', 8)
-        don_vi = str(row.get('Đơn vị (GV)', '')).strip() if pd.notna(row.get('Đơn vị (GV)')) else 'Giảng viên mời'
-        tro_giang = str(row.get('Trợ giảng', '')).strip() if pd.notna(row.get('Trợ giảng')) else ''
-        don_vi_tg = str(row.get('vị (trợ giảng)', '')).strip() if pd.notna(row.get('vị (trợ giảng)')) else ''
-        
-        # Bỏ qua nếu thiếu thông tin quan trọng
-        if not ten_gv or ten_gv == 'nan':
-            continue
-        
-        # Tìm file TKB gốc (theo MÃ LỚP và TÊN LỚP)
-        file_goc = tim_file_tkb_goc(ma_lop, ten_lop, thu_muc)
-        
-        # Thống kê
-        if file_goc:
-            found_files.append({
-                'ma_lop': ma_lop,
-                'ten_lop': ten_lop[:50],  # Cắt ngắn để hiển thị
-                'file': os.path.basename(file_goc)
-            })
-        else:
-            missing_files.append({
-                'ma_lop': ma_lop if ma_lop else 'N/A',
-                'ten_lop': ten_lop[:50],
-                'ten_gv': ten_gv,
-                'ngay': ngay.strftime("%d/%m/%Y")
-            })
-        
-        # Màu theo đơn vị
-        color = DON_VI_COLORS.get(don_vi, "#808080")
-        don_vi_short = DON_VI_SHORT.get(don_vi, don_vi[:10] if don_vi else "")
-        
-        # Tạo title hiển thị trên calendar
-        title = f"{ten_gv}"
-        if don_vi_short:
-            title = f"[{don_vi_short}] {ten_gv}"
-        
-        # Tạo event
-        event = {
-            "title": title,
-            "start": ngay.strftime("%Y-%m-%d"),
-            "end": ngay.strftime("%Y-%m-%d"),
-            "backgroundColor": color,
-            "borderColor": color,
-            "extendedProps": {
-                "ten_gv": ten_gv,
-                "ten_lop": ten_lop,
-                "ma_lop": ma_lop,
-                "ten_chuyen_de": ten_chuyen_de,
-                "so_tiet": so_tiet,
-                "don_vi": don_vi,
-                "tro_giang": tro_giang,
-                "don_vi_tg": don_vi_tg,
-                "file_goc": file_goc,
-                "ngay_str": ngay.strftime("%d/%m/%Y"),
-            }
-        }
-        events.append(event)
+    lop_tkb = ket_qua['lop_tkb']
+    invalid_dates = ket_qua['invalid_dates']
+    total_rows = ket_qua['total_rows']
+    so_co_file = ket_qua['so_co_file']
+    so_thieu_file = ket_qua['so_thieu_file']
     
     # Hiển thị thống kê file TKB
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("📊 Tổng buổi dạy", total_rows)
     with col2:
-        st.metric("✅ Có file TKB", len(found_files), delta=f"{len(found_files)/total_rows*100:.0f}%" if total_rows > 0 else "0%")
+        st.metric("✅ Có file TKB", so_co_file, delta=f"{so_co_file/total_rows*100:.0f}%" if total_rows > 0 else "0%")
     with col3:
-        st.metric("❌ Thiếu file TKB", len(missing_files), delta=f"-{len(missing_files)/total_rows*100:.0f}%" if total_rows > 0 else "0%", delta_color="inverse")
+        st.metric("❌ Thiếu file TKB", so_thieu_file, delta=f"-{so_thieu_file/total_rows*100:.0f}%" if total_rows > 0 else "0%", delta_color="inverse")
+    
+    if ket_qua.get('so_them') or ket_qua.get('so_xoa'):
+        st.caption(f"🔄 Cập nhật tăng dần: +{ket_qua.get('so_them', 0)} / −{ket_qua.get('so_xoa', 0)} buổi so với phiên bản trước")
     
-    # Hiển thị chi tiết nếu có file thiếu
-    if missing_files:
-        with st.expander(f"⚠️ Chi tiết {len(missing_files)} file TKB không tìm thấy (click để xem)"):
+    if ket_qua.get('so_trung'):
+        st.caption(f"🔁 Đã bỏ {ket_qua['so_trung']} buổi trùng khi gộp {len(ket_qua.get('cac_file', []))} file")
+    
+    # Hiển thị chi tiết nếu có file thiếu (mỗi lớp một dòng)
+    if so_thieu_file:
+        df_missing = _bang_thieu_file(lop_tkb)
+        with st.expander(f"⚠️ {len(df_missing)} lớp ({so_thieu_file} buổi) không tìm thấy file TKB (click để xem)"):
             st.warning("**Lưu ý:** Tên file TKB nên chứa mã lớp hoặc từ khóa trong tên lớp để dễ tìm kiếm.")
             
             # Hiển thị bảng
-            df_missing = pd.DataFrame(missing_files)
             st.dataframe(
                 df_missing,
                 use_container_width=True,
@@ -340,18 +104,30 @@ def doc_file_thongke(filepath):
                     "ma_lop": "Mã lớp",
                     "ten_lop": "Tên lớp",
                     "ten_gv": "Giảng viên",
-                    "ngay": "Ngày"
+                    "ngay": "Ngày",
+                    "so_buoi": "Số buổi"
                 }
             )
             
             st.info("💡 **Gợi ý:** Đổi tên file TKB để chứa mã lớp hoặc từ khóa (VD: `TKB_175_QLBVRK.pdf`, `TKB_XPVPHC_2025.pdf`)")
     
+    # Hiển thị các dòng có ngày không đọc được
+    if invalid_dates:
+        with st.expander(f"⚠️ {len(invalid_dates)} dòng có ngày không đọc được (đã bỏ qua)"):
+            st.dataframe(
+                pd.DataFrame(invalid_dates),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "dong": "Dòng Excel",
+                    "gia_tri": "Giá trị 'Thời gian'"
+                }
+            )
+    
     # Hiển thị file tìm thấy (nếu muốn kiểm tra)
-    if found_files and st.checkbox("🔍 Xem danh sách file TKB đã tìm thấy", value=False):
-        with st.expander(f"✅ Danh sách {len(found_files)} file TKB tìm thấy"):
-            df_found = pd.DataFrame(found_files)
-            # Loại bỏ duplicate
-            df_found = df_found.drop_duplicates(subset=['file'])
+    if so_co_file and st.checkbox("🔍 Xem danh sách file TKB đã tìm thấy", value=False):
+        df_found = _bang_co_file(lop_tkb)
+        with st.expander(f"✅ Danh sách {len(df_found)} file TKB tìm thấy"):
             st.dataframe(
                 df_found,
                 use_container_width=True,
@@ -362,24 +138,6 @@ def doc_file_thongke(filepath):
                     "file": "Tên file TKB"
                 }
             )
-    
-    return events
-
-
-def loc_events(events, filter_gv=None, filter_don_vi=None, filter_lop=None):
-    """Lọc events theo các tiêu chí"""
-    result = events
-    
-    if filter_gv and filter_gv != "Tất cả":
-        result = [e for e in result if filter_gv.lower() in e['extendedProps']['ten_gv'].lower()]
-    
-    if filter_don_vi and filter_don_vi != "Tất cả":
-        result = [e for e in result if filter_don_vi in e['extendedProps']['don_vi']]
-    
-    if filter_lop and filter_lop != "Tất cả":
-        result = [e for e in result if filter_lop.lower() in e['extendedProps']['ten_lop'].lower()]
-    
-    return result
 
 
 # ============================================================================
@@ -391,6 +149,8 @@ def show_event_dialog(props):
     """Hiển thị popup chi tiết khi click vào event"""
     st.markdown(f"### 👨‍🏫 {props.get('ten_gv', 'N/A')}")
     st.caption(f"📅 Ngày: **{props.get('ngay_str', '')}**")
+    for canh_bao in props.get('canh_bao') or []:
+        st.error(f"⚠️ {canh_bao}")
     st.divider()
     
     col1, col2 = st.columns(2)
@@ -429,10 +189,14 @@ def show_event_dialog(props):
     file_goc = props.get('file_goc')
     if file_goc and os.path.exists(file_goc):
         file_name = os.path.basename(file_goc)
-        with open(file_goc, "rb") as f:
+        # Chỉ đọc file sau khi bấm "Tải" (không phải mỗi lần mở popup), qua cache bytes giới hạn
+        # dùng chung mọi phiên; phiên chỉ nhớ đường dẫn file đã chọn, không giữ bytes
+        if st.button(f"📄 Tải TKB gốc: {file_name}", key="tai_tkb_goc"):
+            st.session_state['tkb_goc_tai'] = file_goc
+        if st.session_state.get('tkb_goc_tai') == file_goc:
             st.download_button(
-                label=f"📥 Tải TKB gốc: {file_name}",
-                data=f,
+                label=f"📥 Lưu file: {file_name}",
+                data=doc_file_tai_ve(file_goc),
                 file_name=file_name,
                 mime="application/octet-stream"
             )
@@ -442,7 +206,344 @@ def show_event_dialog(props):
             st.caption(f"💡 Gợi ý: Đặt tên file chứa mã lớp **{props.get('ma_lop')}** hoặc từ khóa trong tên lớp")
 
 
+@st.fragment(run_every=1)
+def tien_do_nap(filepath, tien_do_luc_ve):
+    """
+    Fragment tiến độ nạp theo khối: chỉ thanh tiến độ chạy lại mỗi giây (không giữ luồng script,
+    không vẽ lại lịch); có kho tạm mới (thêm khối), nạp xong hoặc lỗi → chạy lại cả trang.
+    """
+    try:
+        kho = lay_kho_su_kien(filepath)
+    except ValueError:
+        st.rerun(scope="app")  # Trang chính hiển thị lỗi
+    if kho.hoan_tat or kho.tien_do != tien_do_luc_ve:
+        st.rerun(scope="app")
+    so_dong, tong_so_dong = kho.tien_do
+    st.progress(
+        min(so_dong / tong_so_dong, 1.0) if tong_so_dong else 0.0,
+        text=f"⏳ Đang tải dữ liệu theo khối: đã đọc {so_dong:,} dòng"
+             + (f" / {tong_so_dong:,}" if tong_so_dong else "")
+    )
+
+
+@st.fragment(run_every=CHU_KY_THEO_DOI_GIAY)
+def theo_doi_thu_muc(thu_muc, truoc):
+    """
+    Fragment tự chạy lại mỗi CHU_KY_THEO_DOI_GIAY giây (không giữ luồng script của phiên):
+    so chữ ký thư mục dữ liệu với lúc trang chạy (`truoc`), thay đổi → chạy lại cả trang.
+    """
+    if chu_ky_du_lieu(thu_muc) != truoc:
+        st.rerun(scope="app")
+    st.caption(f"🔄 Đang theo dõi thư mục dữ liệu · kiểm tra lúc {datetime.now():%H:%M:%S}")
+
+
+def khoang_hien_thi(ngay_moc, che_do):
+    """Khoảng ngày [bat_dau, ket_thuc) calendar hiển thị cho ngày mốc và chế độ xem (tuần bắt đầu thứ Hai)"""
+    if che_do == "dayGridMonth":
+        dau_thang = ngay_moc.replace(day=1)
+        bat_dau = dau_thang - timedelta(days=dau_thang.weekday())
+        return bat_dau, bat_dau + timedelta(weeks=6)
+    bat_dau = ngay_moc - timedelta(days=ngay_moc.weekday())
+    return bat_dau, bat_dau + timedelta(weeks=1)
+
+
+def dich_ngay_moc(ngay_moc, che_do, buoc):
+    """Dời ngày mốc `buoc` tháng (xem theo tháng) hoặc `buoc` tuần (các chế độ khác)"""
+    if che_do == "dayGridMonth":
+        thang = ngay_moc.month - 1 + buoc
+        return date(ngay_moc.year + thang // 12, thang % 12 + 1, 1)
+    return ngay_moc + timedelta(weeks=buoc)
+
+
+def moc_tu_view(view):
+    """
+    (ngày mốc, chế độ xem) của khung calendar báo về qua callback: lấy giữa currentStart và
+    currentEnd (ISO theo UTC, lệch múi giờ không đổi tháng/tuần đang xem)
+    """
+    dau = datetime.fromisoformat(view["currentStart"].replace("Z", "+00:00"))
+    cuoi = datetime.fromisoformat(view["currentEnd"].replace("Z", "+00:00"))
+    return (dau + (cuoi - dau) / 2).date(), view["type"]
+
+
+def hien_thi_lich(kho, filtered_ids):
+    """Lịch giảng dạy (chỉ gửi các buổi quanh khoảng đang xem) + chú thích màu"""
+    # --- CALENDAR ---
+    # Điều hướng bằng thanh công cụ của calendar. Component không báo khi đổi tháng (không có
+    # datesSet; eventsSet chỉ chạy khi dữ liệu sự kiện đổi) nên gửi thêm một kỳ trước và sau;
+    # khung đang xem báo về qua callback (eventsSet lúc dựng, bấm buổi / bấm ngày) → dời ngày mốc
+    st.session_state.setdefault('lich_ngay_moc', date.today())
+    st.session_state.setdefault('lich_che_do', "dayGridMonth")
+    ngay_moc, che_do = st.session_state.lich_ngay_moc, st.session_state.lich_che_do
+    # Sự kiện chỉ nạp lúc dựng calendar (initialEvents): key theo mốc → dời mốc thì dựng lại;
+    # key gồm phiên bản dữ liệu: id trong eventClick cũ không trỏ nhầm sang kho mới
+    calendar_key = f"teaching_calendar_{che_do}_{ngay_moc.isoformat()}_{abs(hash(kho.phien_ban))}"
+    
+    # Khoảng gửi đi: kỳ đang xem ± một kỳ (bấm trước/sau vẫn có dữ liệu) + biên prefetch
+    bat_dau = khoang_hien_thi(dich_ngay_moc(ngay_moc, che_do, -1), che_do)[0]
+    ket_thuc = khoang_hien_thi(dich_ngay_moc(ngay_moc, che_do, 1), che_do)[1]
+    with do_buoc('payload_lich', che_do=che_do) as chi_tiet:
+        window_ids = kho.trong_khoang(
+            bat_dau - timedelta(days=LICH_PREFETCH_NGAY),
+            ket_thuc + timedelta(days=LICH_PREFETCH_NGAY),
+            filtered_ids
+        )
+        filtered_events = kho.payload(window_ids)
+        if chi_tiet is not None:
+            chi_tiet['so_su_kien'] = len(filtered_events)
+            chi_tiet['bytes'] = len(json.dumps(filtered_events, ensure_ascii=False).encode('utf-8'))
+    
+    # Cấu hình Calendar (thanh công cụ gốc: trước / sau / hôm nay, đổi chế độ xem)
+    calendar_options = {
+        "headerToolbar": {
+            "left": "prev,next today",
+            "center": "title",
+            "right": ",".join(CHE_DO_LICH.values())
+        },
+        "views": {ten: {"buttonText": nhan} for nhan, ten in CHE_DO_LICH.items()},
+        "initialView": che_do,
+        "initialDate": ngay_moc.isoformat(),
+        "firstDay": 1,
+        "height": 700,
+        "selectable": True,
+        "dayMaxEvents": 3,
+        "locale": "vi",
+    }
+    
+    # Import khi vẽ: component đăng ký vào phiên Streamlit, import z3 không giao diện thì bỏ qua
+    from streamlit_calendar import calendar
+    calendar_state = calendar(
+        events=filtered_events, 
+        options=calendar_options, 
+        callbacks=["eventClick", "eventsSet", "dateClick"],
+        key=calendar_key
+    )
+    
+    # Khung đang xem đã rời kỳ của ngày mốc (bấm trước/sau, đổi chế độ) → dời mốc, dựng lại quanh khung đó
+    callback = calendar_state.get("callback")
+    view = (calendar_state.get(callback) or {}).get("view") if callback else None
+    if view and view.get("type") in CHE_DO_LICH.values():
+        moc_moi, che_do_moi = moc_tu_view(view)
+        if khoang_hien_thi(moc_moi, che_do_moi) != khoang_hien_thi(ngay_moc, che_do):
+            st.session_state.lich_ngay_moc = moc_moi
+            st.session_state.lich_che_do = che_do_moi
+            if callback != "eventClick":  # Bấm buổi: mở chi tiết trước, dựng lại ở lần chạy sau
+                st.rerun()
+    
+    # Xử lý khi click vào event
+    if calendar_state.get("eventClick"):
+        event_data = calendar_state["eventClick"]["event"]
+        # Chi tiết lấy từ kho theo id (không gửi kèm trong payload calendar)
+        event_id = int(event_data.get("id", -1))
+        props = kho.chi_tiet(event_id)
+        
+        # Gọi dialog popup
+        if props:
+            props['canh_bao'] = kho.canh_bao(event_id)
+            show_event_dialog(props)
+    
+    # --- LEGEND ---
+    st.divider()
+    st.markdown("### 🎨 Chú thích màu")
+    cols = st.columns(len(DON_VI_COLORS))
+    for i, (dv, color) in enumerate(DON_VI_COLORS.items()):
+        with cols[i]:
+            short = DON_VI_SHORT.get(dv, dv[:10])
+            st.markdown(
+                f'<span style="background-color:{color};color:white;padding:2px 8px;border-radius:4px;">{short}</span>',
+                unsafe_allow_html=True
+            )
+    st.caption(f"⚠️ = giảng viên trùng lịch trong ngày hoặc quá {GIOI_HAN_TIET_TUAN:g} tiết/tuần (xem trang \"Xung đột lịch\")")
+
+
+def hien_thi_thong_ke_gio_giang(kho):
+    """Số tiết / số buổi theo tháng của từng giảng viên, đơn vị, lớp (từ tổng hợp sẵn của kho)"""
+    st.subheader("📊 Thống kê giờ giảng theo tháng")
+    st.caption("Tính trên toàn bộ dữ liệu (không áp dụng bộ lọc bên trái).")
+    
+    col_theo, col_chi_so, col_nam = st.columns([2, 2, 1])
+    with col_theo:
+        ten_cot = st.radio("Theo", ["Giảng viên", "Đơn vị", "Lớp"], horizontal=True, key="tk_theo")
+    with col_chi_so:
+        ten_chi_so = st.radio("Số liệu", ["Số tiết", "Số buổi"], horizontal=True, key="tk_chi_so")
+    with col_nam:
+        nam = st.selectbox("Năm", ["Tất cả"] + kho.cac_nam(), key="tk_nam")
+    
+    cot = {"Giảng viên": 'ten_gv', "Đơn vị": 'don_vi', "Lớp": 'ten_lop'}[ten_cot]
+    bang = kho.bang_tong_hop(
+        cot,
+        'so_tiet' if ten_chi_so == "Số tiết" else 'so_buoi',
+        None if nam == "Tất cả" else nam
+    )
+    if bang.empty:
+        st.info("Không có buổi dạy trong khoảng đã chọn.")
+        return
+    
+    st.dataframe(bang.rename_axis(ten_cot), use_container_width=True)
+    st.download_button(
+        "⬇️ Tải bảng (CSV)",
+        bang.rename_axis(ten_cot).to_csv().encode('utf-8-sig'),
+        file_name=f"thong_ke_{cot}_{ten_chi_so.replace(' ', '_')}_{nam}.csv",
+        mime="text/csv"
+    )
+
+
+def hien_thi_xung_dot(kho):
+    """Báo cáo xung đột lịch: giảng viên trùng lịch trong ngày, quá tải tiết trong tuần"""
+    trung_lich = kho.bao_cao_trung_lich()
+    qua_tai = kho.bao_cao_qua_tai()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("👥 Trùng lịch (giảng viên · ngày)", len(trung_lich))
+    with col2:
+        st.metric(f"🔥 Quá tải > {GIOI_HAN_TIET_TUAN:g} tiết/tuần", len(qua_tai))
+    
+    st.markdown("**👥 Một giảng viên dạy nhiều lớp trong cùng một ngày:**")
+    if trung_lich.empty:
+        st.success("Không có trùng lịch.")
+    else:
+        st.dataframe(
+            trung_lich,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "ten_gv": "Giảng viên",
+                "ngay": st.column_config.DateColumn("Ngày", format="DD/MM/YYYY"),
+                "so_buoi": "Số buổi",
+                "so_tiet": "Số tiết",
+                "cac_lop": "Các lớp",
+            }
+        )
+    
+    st.markdown(f"**🔥 Giảng viên dạy quá {GIOI_HAN_TIET_TUAN:g} tiết trong một tuần:**")
+    if qua_tai.empty:
+        st.success("Không có tuần quá tải.")
+    else:
+        st.dataframe(
+            qua_tai,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "ten_gv": "Giảng viên",
+                "tuan_tu": st.column_config.DateColumn("Tuần từ (thứ Hai)", format="DD/MM/YYYY"),
+                "so_buoi": "Số buổi",
+                "so_tiet": "Số tiết",
+            }
+        )
+
+
+def hien_thi_hieu_nang():
+    """Bảng quản trị: thời gian / bộ nhớ các bước đo gần nhất (bật bằng LICH_GIANG_DAY_DO_HIEU_NANG=1)"""
+    cac_ban_ghi = nhat_ky_hieu_nang()
+    with st.expander(f"⏱️ Hiệu năng các bước ({len(cac_ban_ghi)} lần đo gần nhất)"):
+        if not cac_ban_ghi:
+            st.caption("Chưa có lần đo nào.")
+            return
+        
+        import pandas as pd
+        
+        df = pd.DataFrame(cac_ban_ghi)
+        tong_hop = df.groupby('buoc', sort=False).agg(
+            so_lan=('giay', 'size'),
+            giay_tb=('giay', 'mean'),
+            giay_max=('giay', 'max'),
+            mb_max=('mb', 'max'),
+        ).reset_index()
+        st.dataframe(
+            tong_hop,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "buoc": "Bước",
+                "so_lan": "Số lần",
+                "giay_tb": st.column_config.NumberColumn("Giây (TB)", format="%.3f"),
+                "giay_max": st.column_config.NumberColumn("Giây (max)", format="%.3f"),
+                "mb_max": st.column_config.NumberColumn("MB đỉnh (max)", format="%.1f"),
+            }
+        )
+        st.dataframe(df.iloc[::-1], use_container_width=True, hide_index=True)
+        st.caption(f"📝 Log: `{FILE_LOG_HIEU_NANG}`")
+
+
+def hien_thi_ket_qua_tim_kiem(ket_qua_tim):
+    """Chọn trong các kết quả tìm kiếm (mặc định: tất cả); trả về các kết quả dùng để lọc"""
+    if not ket_qua_tim:
+        st.caption("Không tìm thấy kết quả.")
+        return []
+    
+    def nhan(i):
+        if i == 0:
+            return f"Tất cả {len(ket_qua_tim)} kết quả"
+        kq = ket_qua_tim[i - 1]
+        gia_tri = kq['gia_tri'] if len(kq['gia_tri']) <= 60 else kq['gia_tri'][:57] + "..."
+        return f"{COT_TIM_KIEM[kq['cot']]}: {gia_tri} ({kq['so_buoi']} buổi)"
+    
+    chon = st.selectbox("Kết quả:", range(len(ket_qua_tim) + 1), format_func=nhan, key="tim_kiem_chon")
+    return ket_qua_tim if chon == 0 else [ket_qua_tim[chon - 1]]
+
+
+def hien_thi_ghep_lop(kho, thu_muc):
+    """Xem lớp nào ghép với file TKB nào, ghim/bỏ ghim thủ công"""
+    with st.expander("📌 Ghép lớp ↔ file TKB (xem / ghim thủ công)"):
+        bang = bang_khop_lop(kho, thu_muc)
+        st.dataframe(
+            bang,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "ma_lop": "Mã lớp",
+                "ten_lop": "Tên lớp",
+                "file": "File TKB",
+                "nguon": "Nguồn"
+            }
+        )
+        
+        if bang.empty:
+            return
+        
+        vi_tri = st.selectbox(
+            "Lớp cần ghim:",
+            range(len(bang)),
+            format_func=lambda i: f"{bang['ma_lop'].iat[i]} · {bang['ten_lop'].iat[i]}",
+            key="ghim_lop"
+        )
+        cac_file = lay_chi_muc_tkb(thu_muc)['files']
+        lua_chon = ["(Tìm tự động)", "(Không có file)"] + [os.path.basename(f) for f in cac_file]
+        chon = st.selectbox("File TKB:", range(len(lua_chon)), format_func=lua_chon.__getitem__, key="ghim_file")
+        
+        if st.button("📌 Lưu ghim", key="ghim_luu"):
+            ma_lop, ten_lop = bang['ma_lop'].iat[vi_tri], bang['ten_lop'].iat[vi_tri]
+            if chon == 0:
+                bo_ghim_lop(thu_muc, ma_lop, ten_lop)
+            else:
+                ghim_lop(thu_muc, ma_lop, ten_lop, cac_file[chon - 2] if chon >= 2 else None)
+            st.rerun()
+
+
 def main():
+    # --- CẤU HÌNH TRANG (trong main: import module không đụng tới giao diện) ---
+    st.set_page_config(
+        page_title="Lịch Giảng Dạy", 
+        page_icon="📅",
+        layout="wide"
+    )
+
+    # --- CSS TÙY CHỈNH ---
+    st.markdown("""
+        <style>
+        .fc-event-title {
+            font-weight: bold !important;
+            font-size: 11px !important;
+        }
+        .fc-daygrid-event {
+            white-space: normal !important;
+        }
+        .stDialog > div {
+            max-width: 700px !important;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
     st.title("📅 Lịch Giảng Dạy")
     
     # --- SIDEBAR: Upload và Filter ---
@@ -451,6 +552,7 @@ def main():
         
         # Option 1: Tự động tìm file
         auto_file = tim_file_thongke()
+        cac_file = tim_cac_file_thongke()
         
         # Option 2: Upload file
         uploaded_file = st.file_uploader(
@@ -460,12 +562,18 @@ def main():
         
         # Xác định file sử dụng
         if uploaded_file:
-            # Lưu file tạm
-            temp_path = f"/tmp/{uploaded_file.name}"
-            with open(temp_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            file_to_use = temp_path
+            # Lưu theo hash nội dung (mỗi nội dung một lần); đường dẫn chứa hash nên là khóa cache:
+            # upload lại cùng file không parse lại, hai file cùng tên không lẫn nhau
+            da_luu = st.session_state.get('file_tai_len')
+            if da_luu is None or da_luu[0] != uploaded_file.file_id or not os.path.exists(da_luu[1]):
+                da_luu = (uploaded_file.file_id, luu_file_tai_len(uploaded_file.name, uploaded_file.getbuffer()))
+                st.session_state['file_tai_len'] = da_luu
+            file_to_use = da_luu[1]
             st.success(f"✅ Đã upload: {uploaded_file.name}")
+        elif len(cac_file) > 1 and st.checkbox(f"🗂️ Gộp tất cả {len(cac_file)} file ThongKeTKB", value=False):
+            # Mỗi đơn vị xuất một file: gộp thành một lịch, bỏ buổi trùng
+            file_to_use = tuple(cac_file)
+            st.info("📄 Sử dụng: " + ", ".join(os.path.basename(f) for f in cac_file))
         elif auto_file:
             file_to_use = auto_file
             st.info(f"📄 Sử dụng: {os.path.basename(auto_file)}")
@@ -473,6 +581,11 @@ def main():
             file_to_use = None
             st.warning("⚠️ Không tìm thấy file ThongKeTKB")
         
+        tu_dong_cap_nhat = st.checkbox(
+            "🔄 Tự động cập nhật khi thư mục thay đổi", value=False,
+            help="Chỉ áp dụng các buổi thêm/xóa, không đọc lại từ đầu"
+        )
+        
         st.divider()
         
         # --- FILTER ---
@@ -489,24 +602,50 @@ def main():
         """)
         return
     
-    # Load dữ liệu
-    if 'events' not in st.session_state or st.session_state.get('file_path') != file_to_use:
-        with st.spinner('Đang tải dữ liệu...'):
-            st.session_state.events = doc_file_thongke(file_to_use)
-            st.session_state.file_path = file_to_use
+    # Load dữ liệu (kho dùng chung cho mọi phiên, chỉ đọc file một lần mỗi phiên bản)
+    if SQLITE_DB:
+        thong_bao_nap = "Đang nhập dữ liệu vào SQLite..."
+    elif isinstance(file_to_use, tuple):
+        thong_bao_nap = "Đang gộp dữ liệu các file..."
+    else:
+        thong_bao_nap = "Đang tải dữ liệu..."
+    # Chữ ký thư mục lấy trước khi nạp: file đổi trong lúc nạp vẫn được nhận ra
+    chu_ky_luc_nap = chu_ky_du_lieu(os.getcwd()) if tu_dong_cap_nhat else None
+    try:
+        # Spinner chỉ hiện khi phải đọc file (kho đã có trong cache tiến trình → trả về ngay)
+        with st.spinner(thong_bao_nap):
+            if isinstance(file_to_use, tuple):
+                kho = lay_kho_gop(file_to_use)
+            else:
+                kho = lay_kho_su_kien(file_to_use)
+    except ValueError as e:
+        st.error(str(e))
+        st.warning("Không có dữ liệu lịch giảng.")
+        return
     
-    events = st.session_state.events
+    hien_thi_thong_ke_tkb(kho.thong_ke)
+    # Bảng hiệu năng cạnh thống kê, điền ở cuối trang (sau khi đo xong các bước của lần chạy này)
+    o_hieu_nang = st.container() if DO_HIEU_NANG else None
     
-    if not events:
-        st.warning("Không có dữ liệu lịch giảng.")
+    # Đang nạp theo khối (chỉ kho một file): hiển thị phần đã đọc, thanh tiến độ tự theo dõi tới khi xong
+    if not kho.hoan_tat:
+        tien_do_nap(file_to_use, kho.tien_do)
+    
+    if not len(kho):
+        if kho.hoan_tat:
+            st.warning("Không có dữ liệu lịch giảng.")
         return
     
+    if kho.hoan_tat:
+        thu_muc_tkb = os.path.dirname(file_to_use[0] if isinstance(file_to_use, tuple) else file_to_use)
+        hien_thi_ghep_lop(kho, thu_muc_tkb)
+    
     # --- SIDEBAR FILTERS (tiếp) ---
     with st.sidebar:
-        # Lấy danh sách unique values
-        all_gv = sorted(set(e['extendedProps']['ten_gv'] for e in events))
-        all_don_vi = sorted(set(e['extendedProps']['don_vi'] for e in events if e['extendedProps']['don_vi']))
-        all_lop = sorted(set(e['extendedProps']['ten_lop'] for e in events))
+        # Lấy danh sách unique values (có sẵn trong chỉ mục của kho)
+        all_gv = kho.danh_sach('ten_gv')
+        all_don_vi = kho.danh_sach('don_vi')
+        all_lop = kho.danh_sach('ten_lop')
         
         filter_don_vi = st.selectbox(
             "Đơn vị:",
@@ -523,71 +662,72 @@ def main():
             ["Tất cả"] + all_lop[:20]  # Giới hạn 20 để không quá dài
         )
         
+        # Tìm không dấu (mọi giá trị, không giới hạn như dropdown lớp)
+        tu_khoa = st.text_input(
+            "🔎 Tìm kiếm:",
+            placeholder="VD: chinh sach cong",
+            help="Tìm không dấu theo giảng viên, lớp, mã lớp, chuyên đề, đơn vị",
+            key="tim_kiem"
+        )
+        ket_qua_tim = None
+        if tu_khoa.strip():
+            with do_buoc('tim_kiem'):
+                ket_qua_tim = kho.tim_kiem(tu_khoa)
+            ket_qua_tim = hien_thi_ket_qua_tim_kiem(ket_qua_tim)
+        
         st.divider()
         
         # Thống kê nhanh
         st.header("📊 Thống kê")
-        filtered_events = loc_events(events, filter_gv, filter_don_vi, filter_lop)
-        st.metric("Tổng số buổi dạy", len(filtered_events))
+        with do_buoc('loc', so_su_kien=len(kho)):
+            filtered_ids = kho.loc(filter_gv, filter_don_vi, filter_lop)
+            if ket_qua_tim is not None:
+                filtered_ids = kho.loc_theo_tim_kiem(filtered_ids, ket_qua_tim)
+        # Số buổi / số tiết theo đơn vị (không lọc → đọc từ tổng hợp sẵn của kho)
+        tong_don_vi = kho.tong_theo('don_vi', filtered_ids)
+        col_buoi, col_tiet = st.columns(2)
+        col_buoi.metric("Tổng số buổi dạy", len(filtered_ids))
+        col_tiet.metric("Tổng số tiết", f"{sum(t for _, t in tong_don_vi.values()):g}")
         
-        # Thống kê theo đơn vị
+        # Thống kê theo đơn vị (đếm trên cùng tập chỉ số đã lọc)
         if filter_don_vi == "Tất cả":
             st.markdown("**Theo đơn vị:**")
             for dv in all_don_vi:
-                count = len([e for e in filtered_events if e['extendedProps']['don_vi'] == dv])
+                count, so_tiet = tong_don_vi.get(dv, (0, 0))
                 if count > 0:
                     short = DON_VI_SHORT.get(dv, dv[:8])
-                    st.caption(f"• {short}: {count} buổi")
-    
-    # --- CALENDAR ---
-    filtered_events = loc_events(events, filter_gv, filter_don_vi, filter_lop)
-    
-    # Cấu hình Calendar
-    calendar_options = {
-        "headerToolbar": {
-            "left": "today prev,next",
-            "center": "title",
-            "right": "dayGridMonth,timeGridWeek,listWeek"
-        },
-        "initialView": "dayGridMonth",
-        "height": 700,
-        "selectable": True,
-        "dayMaxEvents": 3,
-        "locale": "vi",
-        "buttonText": {
-            "today": "Hôm nay",
-            "month": "Tháng",
-            "week": "Tuần",
-            "list": "Danh sách"
-        }
-    }
+                    st.caption(f"• {short}: {count} buổi · {so_tiet:g} tiết")
+        
+        # Bộ nhớ của kho dùng chung (không tăng theo số người xem)
+        bo_nho = kho.bo_nho()
+        st.caption(
+            f"💾 Kho dùng chung: {bo_nho['so_su_kien']} buổi · "
+            f"~{bo_nho['tong_bytes'] / 1024 / 1024:.1f} MB"
+            + (f" · SQLite {bo_nho['db_bytes'] / 1024 / 1024:.1f} MB" if 'db_bytes' in bo_nho else "")
+        )
     
-    # Hiển thị Calendar
-    calendar_state = calendar(
-        events=filtered_events, 
-        options=calendar_options, 
-        key='teaching_calendar'
+    # --- NỘI DUNG CHÍNH: lịch hoặc thống kê giờ giảng ---
+    trang = st.radio(
+        "Trang",
+        ["📅 Lịch giảng dạy", "📊 Thống kê giờ giảng", "⚠️ Xung đột lịch"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="trang"
     )
+    if trang == "📊 Thống kê giờ giảng":
+        hien_thi_thong_ke_gio_giang(kho)
+    elif trang == "⚠️ Xung đột lịch":
+        hien_thi_xung_dot(kho)
+    else:
+        hien_thi_lich(kho, filtered_ids)
     
-    # Xử lý khi click vào event
-    if calendar_state.get("eventClick"):
-        event_data = calendar_state["eventClick"]["event"]
-        props = event_data.get("extendedProps", {})
-        
-        # Gọi dialog popup
-        show_event_dialog(props)
+    if o_hieu_nang is not None:
+        with o_hieu_nang:
+            hien_thi_hieu_nang()
     
-    # --- LEGEND ---
-    st.divider()
-    st.markdown("### 🎨 Chú thích màu")
-    cols = st.columns(len(DON_VI_COLORS))
-    for i, (dv, color) in enumerate(DON_VI_COLORS.items()):
-        with cols[i]:
-            short = DON_VI_SHORT.get(dv, dv[:10])
-            st.markdown(
-                f'<span style="background-color:{color};color:white;padding:2px 8px;border-radius:4px;">{short}</span>',
-                unsafe_allow_html=True
-            )
+    # Theo dõi thư mục dữ liệu: file mới/đổi → chạy lại (chỉ cập nhật phần thay đổi)
+    if tu_dong_cap_nhat:
+        theo_doi_thu_muc(os.getcwd(), chu_ky_luc_nap)
 
 
 if __name__ == "__main__":